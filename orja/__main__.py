@@ -1,6 +1,10 @@
-from orja.core.app import run
+import sys
 
+from orja.core.app import maintain, run
 
-if __name__ == "__main__":
-    run()
 
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["maintain"]:
+        maintain(sys.argv[2:])
+    else:
+        run()
@@ -1,6 +1,8 @@
 from orja.agents.evaluator import EvaluatorAgent
 from orja.agents.router import RouterAgent
 from orja.agents.responder import ResponderAgent
+from orja.agents.summarizer import SummarizerAgent
+from orja.agents.triage import TriageAgent
 
-__all__ = ["EvaluatorAgent", "RouterAgent", "ResponderAgent"]
+__all__ = ["EvaluatorAgent", "RouterAgent", "ResponderAgent", "SummarizerAgent", "TriageAgent"]
 
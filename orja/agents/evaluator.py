@@ -1,11 +1,37 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 
+from orja.agents.schemas import EVALUATOR_SCHEMA
 from orja.agents.utils import parse_json_safely
 from orja.llm.provider import ChatMessage, LLMProvider
+from orja.core.budget import TokenBudget
+from orja.core.context import ContextBuilder
 from orja.core.prompts import PromptLoader
+from orja.memory.db import Message
+
+FALLBACK_EVALUATION = {
+    "difficulty": "medium",
+    "needs_cloud": False,
+    "reason": "skip",
+}
+
+
+def normalize_evaluation(parsed: Dict) -> Dict:
+    """Coerce a parsed evaluator object into the pipeline's evaluation dict."""
+    difficulty = str(parsed.get("difficulty", "medium")).lower()
+    if difficulty not in {"easy", "medium", "hard"}:
+        difficulty = "medium"
+    needs_cloud = bool(parsed.get("needs_cloud", False))
+    reason = str(parsed.get("reason", "")).strip() or "no reason provided"
+
+    return {
+        "difficulty": difficulty,
+        "needs_cloud": needs_cloud,
+        "reason": reason,
+    }
 
 
 class EvaluatorAgent:
@@ -18,54 +44,100 @@ class EvaluatorAgent:
         agent_config: Dict,
         logger: logging.Logger,
         json_mode: bool = False,
+        context_builder: Optional[ContextBuilder] = None,
+        budget: Optional[TokenBudget] = None,
     ) -> None:
         self.provider = provider
         self.prompts = prompts
         self.logger = logger
         self.enabled = agent_config.get("enabled", True)
         self.max_tokens = agent_config.get("max_tokens", 80)
+        self.stop = list(agent_config.get("stop") or [])
+        self.context_tokens = agent_config.get("context_tokens", 768)
         self.json_mode = json_mode
+        self.context = context_builder or ContextBuilder(provider)
+        self.budget = budget
+        self.calls = 0
+        self.parse_failures = 0
 
-    def run(self, user_text: str, recent_context: List[str]) -> Dict:
-        fallback = {
-            "difficulty": "medium",
-            "needs_cloud": False,
-            "reason": "skip",
-        }
+    def run(
+        self,
+        user_text: str,
+        history: List[Message],
+        usage: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict:
+        if not self.enabled:
+            return dict(FALLBACK_EVALUATION)
+        raw = self.provider.generate(**self._request(user_text, history, usage), timeout=timeout)
+        return self._parse(raw, usage)
+
+    async def arun(
+        self,
+        user_text: str,
+        history: List[Message],
+        usage: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict:
+        """run() for the async pipeline."""
         if not self.enabled:
-            return fallback
+            return dict(FALLBACK_EVALUATION)
+        # Packing may count tokens over blocking HTTP.
+        request = await asyncio.to_thread(self._request, user_text, history, usage)
+        raw = await self.provider.agenerate(**request, timeout=timeout)
+        return self._parse(raw, usage)
 
+    def _request(
+        self, user_text: str, history: List[Message], usage: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Keyword arguments for provider.generate/agenerate."""
         system_prompt = self.prompts.get_prompt("evaluator_system")
-        context_text = "\n".join(recent_context) if recent_context else "no history"
-        user_prompt = (
+        head = (
             "Evaluate the request difficulty and whether cloud might be needed later.\n"
             f"Request: {user_text}\n"
-            f"Short context:\n{context_text}\n"
-            "Respond with only a JSON object."
+            "Short context:\n"
         )
-
-        raw = self.provider.generate(
-            [ChatMessage(role="user", content=user_prompt)],
+        tail = "\nRespond with only a JSON object."
+        packed = self.context.pack(
+            budget=self.context_tokens,
             system_prompt=system_prompt,
-            max_tokens=self.max_tokens,
-            temperature=0.2,
-            top_p=0.9,
-            json_mode=self.json_mode,
+            parts=[head, tail],
+            history=history,
         )
-        parsed = parse_json_safely(raw)
-        if not parsed:
-            self.logger.warning("Evaluator JSON parsing failed, raw=%s", raw)
-            return {**fallback, "reason": "parse_failed"}
-
-        difficulty = str(parsed.get("difficulty", "medium")).lower()
-        if difficulty not in {"easy", "medium", "hard"}:
-            difficulty = "medium"
-        needs_cloud = bool(parsed.get("needs_cloud", False))
-        reason = str(parsed.get("reason", "")).strip() or "no reason provided"
+        user_prompt = head + packed.history_text() + tail
+        if usage is not None:
+            usage["context_tokens"] = packed.tokens
+            usage["history_dropped"] = packed.dropped
 
+        max_tokens = self.max_tokens
+        if self.budget is not None:
+            max_tokens = self.budget.limit("evaluator", self.max_tokens, usage)
         return {
-            "difficulty": difficulty,
-            "needs_cloud": needs_cloud,
-            "reason": reason,
+            "messages": [ChatMessage(role="user", content=user_prompt)],
+            "system_prompt": system_prompt,
+            "max_tokens": max_tokens,
+            "temperature": 0.2,
+            "top_p": 0.9,
+            "json_mode": self.json_mode,
+            "json_schema": EVALUATOR_SCHEMA,
+            "stop": self.stop,
+            "prompt_key": "evaluator_system",
+            "usage": usage,
         }
 
+    def _parse(self, raw: str, usage: Optional[Dict[str, Any]]) -> Dict:
+        parsed = parse_json_safely(raw)
+        self.calls += 1
+        if usage is not None:
+            usage["parse_failed"] = not parsed
+        if not parsed:
+            self.parse_failures += 1
+            self.logger.warning(
+                "Evaluator JSON parsing failed (%d/%d calls), raw=%s",
+                self.parse_failures,
+                self.calls,
+                raw,
+            )
+            return {**FALLBACK_EVALUATION, "reason": "parse_failed"}
+
+        return normalize_evaluation(parsed)
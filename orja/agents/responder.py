@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
+from orja.core.budget import TokenBudget
+from orja.core.context import ContextBuilder
 from orja.core.prompts import PromptLoader
 from orja.llm.provider import ChatMessage, LLMProvider
+from orja.memory.db import Message
 
 
 class ResponderAgent:
@@ -17,46 +20,97 @@ class ResponderAgent:
         prompts: PromptLoader,
         agent_config: Dict,
         logger: logging.Logger,
+        context_builder: Optional[ContextBuilder] = None,
+        budget: Optional[TokenBudget] = None,
     ) -> None:
         self.provider = provider
         self.prompts = prompts
         self.logger = logger
         self.enabled = agent_config.get("enabled", True)
         self.max_tokens = agent_config.get("max_tokens", 200)
+        self.stop = list(agent_config.get("stop") or [])
+        self.context_tokens = agent_config.get("context_tokens", 1536)
+        self.context = context_builder or ContextBuilder(provider)
+        self.budget = budget
 
     def run(
         self,
         user_text: str,
-        history: List[str],
+        history: List[Message],
         evaluation: Dict,
         router_result: Dict,
         skill_output: Optional[str],
+        on_token: Optional[Callable[[str], None]] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        provider: Optional[LLMProvider] = None,
+        timeout: Optional[float] = None,
+        max_tokens: Optional[int] = None,
     ) -> str:
+        """Build the reply; when on_token is given, chunks are passed to it as they arrive.
+
+        provider overrides the agent's own provider for this call (model tiers).
+        timeout and max_tokens tighten the call when the request deadline is short.
+        """
         if not self.enabled:
             return "Responder is disabled."
 
         system_prompt = self.prompts.get_prompt("responder_system")
-        history_text = "\n".join(history) if history else "no history"
         evaluation_json = json.dumps(evaluation, ensure_ascii=False)
         router_json = json.dumps(router_result, ensure_ascii=False)
         skill_text = skill_output or "no skill result"
 
-        user_prompt = (
-            f"User request: {user_text}\n"
-            f"Recent messages:\n{history_text}\n"
-            f"Evaluation: {evaluation_json}\n"
+        head = f"User request: {user_text}\nRecent messages:\n"
+        tail = (
+            f"\nEvaluation: {evaluation_json}\n"
             f"Routing: {router_json}\n"
             f"Skill result: {skill_text}\n"
             "Generate the final, brief answer in English."
         )
-
-        raw = self.provider.generate(
-            [ChatMessage(role="user", content=user_prompt)],
+        packed = self.context.pack(
+            budget=self.context_tokens,
             system_prompt=system_prompt,
-            max_tokens=self.max_tokens,
-            temperature=0.6,
-            top_p=0.9,
+            parts=[head, tail],
+            history=history,
         )
+        user_prompt = head + packed.history_text() + tail
+        if usage is not None:
+            usage["context_tokens"] = packed.tokens
+            usage["history_dropped"] = packed.dropped
+
+        messages = [ChatMessage(role="user", content=user_prompt)]
+        provider = provider or self.provider
+        cap = self.max_tokens if max_tokens is None else min(self.max_tokens, max_tokens)
+        max_tokens = cap
+        if self.budget is not None:
+            max_tokens = self.budget.limit("responder", cap, usage)
+        if on_token is None:
+            raw = provider.generate(
+                messages,
+                system_prompt=system_prompt,
+                max_tokens=max_tokens,
+                temperature=0.6,
+                top_p=0.9,
+                stop=self.stop,
+                prompt_key="responder_system",
+                timeout=timeout,
+                usage=usage,
+            )
+        else:
+            chunks: List[str] = []
+            for chunk in provider.generate_stream(
+                messages,
+                system_prompt=system_prompt,
+                max_tokens=max_tokens,
+                temperature=0.6,
+                top_p=0.9,
+                stop=self.stop,
+                prompt_key="responder_system",
+                timeout=timeout,
+                usage=usage,
+            ):
+                chunks.append(chunk)
+                on_token(chunk)
+            raw = "".join(chunks)
         final = raw.strip() or "I could not find an answer, please try again."
         return final
 
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from orja.llm.provider import LLMProvider
+
+try:  # numpy is optional; without it the semantic cache stays disabled
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on environment
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticRouteCache:
+    """Reuses router decisions for requests that mean the same thing.
+
+    Requests are embedded through the provider and kept as unit rows of a
+    matrix next to the router decision they produced. A new request whose
+    nearest neighbour has cosine similarity >= threshold reuses that
+    decision. The least recently used row is evicted when max_entries is
+    reached. Changes only mark the cache dirty; a daemon thread saves it as
+    an .npz file at most every ``save_interval_sec`` and close() writes what
+    is left, so no request waits for the file.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        path: Optional[Path],
+        *,
+        threshold: float = 0.92,
+        max_entries: int = 512,
+        save_interval_sec: float = 30.0,
+    ) -> None:
+        self.provider = provider
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.save_interval_sec = max(0.1, save_interval_sec)
+        self.enabled = np is not None
+        self.hits = 0
+        self.misses = 0
+        self.saves = 0
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._last_used = None
+        self._entries: List[Dict[str, Any]] = []
+        self._dirty = False
+        self._stop = threading.Event()
+        self._saver: Optional[threading.Thread] = None
+        if not self.enabled:
+            logger.warning("numpy is not installed; semantic router cache disabled")
+        elif self.path is not None:
+            self._load()
+            self._saver = threading.Thread(target=self._run_saver, name="orja-route-cache", daemon=True)
+            self._saver.start()
+            atexit.register(self.close)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["model"]) != self.provider.model_name:
+                    logger.info("Semantic router cache built for another model, starting empty")
+                    return
+                self._matrix = data["matrix"].astype(np.float32)
+                self._last_used = data["last_used"].astype(np.float64)
+                self._entries = json.loads(str(data["entries"]))
+        except (OSError, KeyError, ValueError) as exc:
+            logger.warning("Could not load semantic router cache %s: %s", self.path, exc)
+            self._matrix, self._last_used, self._entries = None, None, []
+            return
+        logger.info("Loaded %d cached routes from %s", len(self._entries), self.path)
+
+    def _save(self, matrix, last_used, entries_json: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.stem + ".tmp.npz")
+        np.savez(
+            tmp_path,
+            model=np.array(self.provider.model_name),
+            matrix=matrix,
+            last_used=last_used,
+            entries=np.array(entries_json),
+        )
+        os.replace(tmp_path, self.path)
+
+    def flush(self) -> bool:
+        """Write the cache file if anything changed since the last save; True if written."""
+        if self.path is None:
+            return False
+        with self._lock:
+            if not self._dirty or self._matrix is None:
+                return False
+            # Snapshot under the lock, write without it: add() and lookup() never wait for disk.
+            snapshot = (self._matrix.copy(), self._last_used.copy(), json.dumps(self._entries, ensure_ascii=False))
+            self._dirty = False
+        try:
+            self._save(*snapshot)
+        except OSError as exc:
+            logger.warning("Could not save semantic router cache: %s", exc)
+            with self._lock:
+                self._dirty = True
+            return False
+        self.saves += 1
+        return True
+
+    def _run_saver(self) -> None:
+        while not self._stop.wait(self.save_interval_sec):
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the saver thread and write pending changes."""
+        self._stop.set()
+        if self._saver is not None and self._saver is not threading.current_thread():
+            self._saver.join(timeout=5)
+        self.flush()
+
+    def embed(self, text: str):
+        """Unit-length embedding of text, or None when embeddings are unavailable."""
+        if not self.enabled:
+            return None
+        vector = self.provider.embed(text.strip().lower())
+        if not vector:
+            return None
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else None
+
+    def lookup(self, embedding) -> Optional[Tuple[Dict[str, Any], float, str]]:
+        """Return (decision, similarity, matched request) for the nearest cached request."""
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != embedding.shape[0]:
+                self.misses += 1
+                return None
+            scores = self._matrix @ embedding
+            index = int(np.argmax(scores))
+            similarity = float(scores[index])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+            self._last_used[index] = time.time()
+            self._dirty = True
+            self.hits += 1
+            entry = self._entries[index]
+            return dict(entry["decision"]), similarity, entry["text"]
+
+    def add(self, embedding, text: str, decision: Dict[str, Any]) -> None:
+        with self._lock:
+            entry = {"text": text, "decision": decision}
+            now = time.time()
+            if self._matrix is None or self._matrix.shape[1] != embedding.shape[0]:
+                self._matrix = embedding[np.newaxis, :].copy()
+                self._last_used = np.array([now])
+                self._entries = [entry]
+            elif len(self._entries) >= self.max_entries:
+                index = int(np.argmin(self._last_used))
+                self._matrix[index] = embedding
+                self._last_used[index] = now
+                self._entries[index] = entry
+            else:
+                self._matrix = np.vstack([self._matrix, embedding])
+                self._last_used = np.append(self._last_used, now)
+                self._entries.append(entry)
+            self._dirty = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._matrix, self._last_used, self._entries = None, None, []
+            self._dirty = False
+            if self.path is not None and self.path.exists():
+                self.path.unlink()
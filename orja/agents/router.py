@@ -1,12 +1,52 @@
 from __future__ import annotations
 
 import logging
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
+from orja.agents.schemas import router_schema
 from orja.agents.utils import parse_json_safely
+from orja.core.budget import TokenBudget
 from orja.core.prompts import PromptLoader
 from orja.llm.provider import ChatMessage, LLMProvider
 
+FALLBACK_ROUTE = {
+    "action": "chat",
+    "skill": None,
+    "arguments": {},
+    "confidence": 0.0,
+}
+
+
+def normalize_route(parsed: Dict, available_skills: List[str]) -> Dict:
+    """Coerce a parsed router object into a valid routing decision."""
+    action = str(parsed.get("action", "chat")).lower()
+    skill = parsed.get("skill")
+    if skill not in available_skills:
+        skill = None
+    arguments: Dict = parsed.get("arguments") if isinstance(parsed.get("arguments"), dict) else {}
+    confidence = parsed.get("confidence", 0.0)
+    try:
+        confidence_value = float(confidence)
+    except (TypeError, ValueError):
+        confidence_value = 0.0
+    confidence_value = max(0.0, min(1.0, confidence_value))
+
+    if action not in {"skill", "chat"}:
+        action = "chat"
+    # Heuristic: if model suggests a valid skill but left action=chat, treat it as skill.
+    if skill and action == "chat" and confidence_value >= 0.5:
+        action = "skill"
+    # If action=skill but skill missing, downgrade to chat.
+    if action == "skill" and not skill:
+        action = "chat"
+
+    return {
+        "action": action,
+        "skill": skill,
+        "arguments": arguments,
+        "confidence": confidence_value,
+    }
+
 
 class RouterAgent:
     """Decides whether to call a skill or stay in chat."""
@@ -18,29 +58,56 @@ class RouterAgent:
         agent_config: Dict,
         logger: logging.Logger,
         json_mode: bool = False,
+        budget: Optional[TokenBudget] = None,
     ) -> None:
         self.provider = provider
         self.prompts = prompts
         self.logger = logger
         self.enabled = agent_config.get("enabled", True)
         self.max_tokens = agent_config.get("max_tokens", 80)
+        self.stop = list(agent_config.get("stop") or [])
         self.json_mode = json_mode
+        self.budget = budget
+        self.calls = 0
+        self.parse_failures = 0
 
     def run(
         self,
         user_text: str,
         available_skills: List[str],
         skill_summaries: str,
+        usage: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
     ) -> Dict:
-        fallback = {
-            "action": "chat",
-            "skill": None,
-            "arguments": {},
-            "confidence": 0.0,
-        }
         if not self.enabled:
-            return fallback
+            return {**FALLBACK_ROUTE, "arguments": {}}
+        request = self._request(user_text, available_skills, skill_summaries, usage)
+        raw = self.provider.generate(**request, timeout=timeout)
+        return self._parse(raw, available_skills, usage)
+
+    async def arun(
+        self,
+        user_text: str,
+        available_skills: List[str],
+        skill_summaries: str,
+        usage: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict:
+        """run() for the async pipeline."""
+        if not self.enabled:
+            return {**FALLBACK_ROUTE, "arguments": {}}
+        request = self._request(user_text, available_skills, skill_summaries, usage)
+        raw = await self.provider.agenerate(**request, timeout=timeout)
+        return self._parse(raw, available_skills, usage)
 
+    def _request(
+        self,
+        user_text: str,
+        available_skills: List[str],
+        skill_summaries: str,
+        usage: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Keyword arguments for provider.generate/agenerate."""
         system_prompt = self.prompts.get_prompt("router_system")
         skills_line = ", ".join(sorted(available_skills))
         user_prompt = (
@@ -50,44 +117,35 @@ class RouterAgent:
             "Choose a skill or chat. Return JSON only."
         )
 
-        raw = self.provider.generate(
-            [ChatMessage(role="user", content=user_prompt)],
-            system_prompt=system_prompt,
-            max_tokens=self.max_tokens,
-            temperature=0.25,
-            top_p=0.9,
-            json_mode=self.json_mode,
-        )
-        parsed = parse_json_safely(raw)
-        if not parsed:
-            self.logger.warning("Router JSON parsing failed, raw=%s", raw)
-            return fallback
-
-        action = str(parsed.get("action", "chat")).lower()
-        skill = parsed.get("skill")
-        if skill not in available_skills:
-            skill = None
-        arguments: Dict = parsed.get("arguments") if isinstance(parsed.get("arguments"), dict) else {}
-        confidence = parsed.get("confidence", 0.0)
-        try:
-            confidence_value = float(confidence)
-        except (TypeError, ValueError):
-            confidence_value = 0.0
-        confidence_value = max(0.0, min(1.0, confidence_value))
-
-        if action not in {"skill", "chat"}:
-            action = "chat"
-        # Heuristic: if model suggests a valid skill but left action=chat, treat it as skill.
-        if skill and action == "chat" and confidence_value >= 0.5:
-            action = "skill"
-        # If action=skill but skill missing, downgrade to chat.
-        if action == "skill" and not skill:
-            action = "chat"
-
+        max_tokens = self.max_tokens
+        if self.budget is not None:
+            max_tokens = self.budget.limit("router", self.max_tokens, usage)
         return {
-            "action": action,
-            "skill": skill,
-            "arguments": arguments,
-            "confidence": confidence_value,
+            "messages": [ChatMessage(role="user", content=user_prompt)],
+            "system_prompt": system_prompt,
+            "max_tokens": max_tokens,
+            "temperature": 0.25,
+            "top_p": 0.9,
+            "json_mode": self.json_mode,
+            "json_schema": router_schema(available_skills),
+            "stop": self.stop,
+            "prompt_key": "router_system",
+            "usage": usage,
         }
 
+    def _parse(self, raw: str, available_skills: List[str], usage: Optional[Dict[str, Any]]) -> Dict:
+        parsed = parse_json_safely(raw)
+        self.calls += 1
+        if usage is not None:
+            usage["parse_failed"] = not parsed
+        if not parsed:
+            self.parse_failures += 1
+            self.logger.warning(
+                "Router JSON parsing failed (%d/%d calls), raw=%s",
+                self.parse_failures,
+                self.calls,
+                raw,
+            )
+            return {**FALLBACK_ROUTE, "arguments": {}}
+
+        return normalize_route(parsed, available_skills)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable
+
+EVALUATOR_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "difficulty": {"enum": ["easy", "medium", "hard"]},
+        "needs_cloud": {"type": "boolean"},
+        "reason": {"type": "string"},
+    },
+    "required": ["difficulty", "needs_cloud", "reason"],
+}
+
+
+def router_schema(available_skills: Iterable[str]) -> Dict[str, Any]:
+    """Router output schema with the skill enum taken from the registered skills."""
+    return {
+        "type": "object",
+        "properties": {
+            "action": {"enum": ["skill", "chat"]},
+            "skill": {"anyOf": [{"enum": sorted(available_skills)}, {"type": "null"}]},
+            "arguments": {"type": "object"},
+            "confidence": {"type": "number"},
+        },
+        "required": ["action", "skill", "arguments", "confidence"],
+    }
+
+
+def triage_schema(available_skills: Iterable[str]) -> Dict[str, Any]:
+    """Fused evaluator + router output: the router fields first, then the evaluation."""
+    route = router_schema(available_skills)
+    return {
+        "type": "object",
+        "properties": {**route["properties"], **EVALUATOR_SCHEMA["properties"]},
+        "required": route["required"] + EVALUATOR_SCHEMA["required"],
+    }
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from orja.core.context import ContextBuilder
+from orja.core.prompts import PromptLoader
+from orja.llm.provider import ChatMessage, LLMProvider
+from orja.memory.db import Message
+
+
+class SummarizerAgent:
+    """Folds older conversation turns into a session's running summary."""
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        prompts: PromptLoader,
+        agent_config: Dict,
+        logger: logging.Logger,
+        context_builder: Optional[ContextBuilder] = None,
+    ) -> None:
+        self.provider = provider
+        self.prompts = prompts
+        self.logger = logger
+        self.enabled = agent_config.get("enabled", True)
+        self.max_tokens = agent_config.get("max_tokens", 120)
+        self.stop = list(agent_config.get("stop") or [])
+        self.context_tokens = agent_config.get("context_tokens", 1280)
+        self.context = context_builder or ContextBuilder(provider)
+
+    def run(
+        self,
+        previous_summary: Optional[str],
+        messages: List[Message],
+        usage: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Optional[str]:
+        """Updated summary covering previous_summary plus messages (oldest first); None on failure."""
+        if not self.enabled or not messages:
+            return None
+        system_prompt = self.prompts.get_prompt("summarizer_system")
+        head = f"Current summary: {previous_summary or 'none'}\nNew messages:\n"
+        tail = "\nWrite the updated summary."
+        packed = self.context.pack(
+            budget=self.context_tokens,
+            system_prompt=system_prompt,
+            parts=[head, tail],
+            history=messages,
+        )
+        user_prompt = head + packed.history_text() + tail
+        if usage is not None:
+            usage["context_tokens"] = packed.tokens
+            usage["history_dropped"] = packed.dropped
+
+        raw = self.provider.generate(
+            [ChatMessage(role="user", content=user_prompt)],
+            system_prompt=system_prompt,
+            max_tokens=self.max_tokens,
+            temperature=0.2,
+            top_p=0.9,
+            stop=self.stop,
+            prompt_key="summarizer_system",
+            timeout=timeout,
+            usage=usage,
+        )
+        summary = raw.strip()
+        if not summary or (usage is not None and usage.get("fallback")):
+            self.logger.warning("Summarizer returned no usable summary")
+            return None
+        return summary
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from orja.agents.evaluator import FALLBACK_EVALUATION, normalize_evaluation
+from orja.agents.router import FALLBACK_ROUTE, normalize_route
+from orja.agents.schemas import triage_schema
+from orja.agents.utils import parse_json_safely
+from orja.core.budget import TokenBudget
+from orja.core.context import ContextBuilder
+from orja.core.prompts import PromptLoader
+from orja.llm.provider import ChatMessage, LLMProvider
+from orja.memory.db import Message
+
+
+class TriageAgent:
+    """Evaluates and routes a request in a single constrained generation.
+
+    Replaces the separate evaluator and router calls in the fused agent
+    mode; output goes through the same normalisation as those agents.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        prompts: PromptLoader,
+        agent_config: Dict,
+        logger: logging.Logger,
+        json_mode: bool = False,
+        context_builder: Optional[ContextBuilder] = None,
+        budget: Optional[TokenBudget] = None,
+    ) -> None:
+        self.provider = provider
+        self.prompts = prompts
+        self.logger = logger
+        self.enabled = agent_config.get("enabled", True)
+        self.max_tokens = agent_config.get("max_tokens", 120)
+        self.stop = list(agent_config.get("stop") or [])
+        self.context_tokens = agent_config.get("context_tokens", 1280)
+        self.json_mode = json_mode
+        self.context = context_builder or ContextBuilder(provider)
+        self.budget = budget
+        self.calls = 0
+        self.parse_failures = 0
+
+    @staticmethod
+    def _fallback(reason: str) -> Tuple[Dict, Dict]:
+        return {**FALLBACK_EVALUATION, "reason": reason}, {**FALLBACK_ROUTE, "arguments": {}}
+
+    def run(
+        self,
+        user_text: str,
+        history: List[Message],
+        available_skills: List[str],
+        skill_summaries: str,
+        usage: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[Dict, Dict]:
+        """Return (evaluation, route)."""
+        if not self.enabled:
+            return self._fallback("skip")
+        request = self._request(user_text, history, available_skills, skill_summaries, usage)
+        raw = self.provider.generate(**request, timeout=timeout)
+        return self._parse(raw, available_skills, usage)
+
+    async def arun(
+        self,
+        user_text: str,
+        history: List[Message],
+        available_skills: List[str],
+        skill_summaries: str,
+        usage: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[Dict, Dict]:
+        """run() for the async pipeline."""
+        if not self.enabled:
+            return self._fallback("skip")
+        # Packing may count tokens over blocking HTTP.
+        request = await asyncio.to_thread(
+            self._request, user_text, history, available_skills, skill_summaries, usage
+        )
+        raw = await self.provider.agenerate(**request, timeout=timeout)
+        return self._parse(raw, available_skills, usage)
+
+    def _request(
+        self,
+        user_text: str,
+        history: List[Message],
+        available_skills: List[str],
+        skill_summaries: str,
+        usage: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Keyword arguments for provider.generate/agenerate."""
+        system_prompt = self.prompts.get_prompt("triage_system")
+        skills_line = ", ".join(sorted(available_skills))
+        head = (
+            f"Available skills: {skills_line}\n"
+            f"Skill descriptions:\n{skill_summaries}\n"
+            "Short context:\n"
+        )
+        tail = f"\nRequest: {user_text}\nClassify and route the request. Return JSON only."
+        packed = self.context.pack(
+            budget=self.context_tokens,
+            system_prompt=system_prompt,
+            parts=[head, tail],
+            history=history,
+        )
+        user_prompt = head + packed.history_text() + tail
+        if usage is not None:
+            usage["context_tokens"] = packed.tokens
+            usage["history_dropped"] = packed.dropped
+
+        max_tokens = self.max_tokens
+        if self.budget is not None:
+            max_tokens = self.budget.limit("triage", self.max_tokens, usage)
+        return {
+            "messages": [ChatMessage(role="user", content=user_prompt)],
+            "system_prompt": system_prompt,
+            "max_tokens": max_tokens,
+            "temperature": 0.2,
+            "top_p": 0.9,
+            "json_mode": self.json_mode,
+            "json_schema": triage_schema(available_skills),
+            "stop": self.stop,
+            "prompt_key": "triage_system",
+            "usage": usage,
+        }
+
+    def _parse(
+        self, raw: str, available_skills: List[str], usage: Optional[Dict[str, Any]]
+    ) -> Tuple[Dict, Dict]:
+        parsed = parse_json_safely(raw)
+        self.calls += 1
+        if usage is not None:
+            usage["parse_failed"] = not parsed
+        if not parsed:
+            self.parse_failures += 1
+            self.logger.warning(
+                "Triage JSON parsing failed (%d/%d calls), raw=%s",
+                self.parse_failures,
+                self.calls,
+                raw,
+            )
+            return self._fallback("parse_failed")
+        return normalize_evaluation(parsed), normalize_route(parsed, available_skills)
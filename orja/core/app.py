@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import argparse
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from uuid import uuid4
 
 from rich.console import Console
@@ -13,10 +14,22 @@ from orja.core.logger import setup_logger
 from orja.core.pipeline import Pipeline
 from orja.core.router import Router
 from orja.memory.db import MemoryStore
+from orja.memory.maintenance import Maintenance, MaintenanceScheduler
 
 console = Console()
 
 
+def _maintenance(memory: MemoryStore, config: Dict[str, Any]) -> Maintenance:
+    cfg = config.get("maintenance", {})
+    return Maintenance(
+        memory,
+        retention_days=float(cfg.get("retention_days", 14)),
+        rollup_retention_days=float(cfg.get("rollup_retention_days", 365)),
+        delete_batch=int(cfg.get("delete_batch", 2000)),
+        vacuum_pages=int(cfg.get("vacuum_pages", 256)),
+    )
+
+
 def run() -> None:
     base_path = Path(__file__).resolve().parent.parent
     project_root = base_path.parent
@@ -28,12 +41,24 @@ def run() -> None:
     logger = setup_logger(log_file, level=config["logging"].get("level", "INFO"))
 
     db_path = project_root / config["database"]["path"]
-    memory = MemoryStore(db_path)
+    memory = MemoryStore(db_path, config["database"])
 
     pipeline_enabled = config.get("pipeline", {}).get("enabled", True)
     pipeline = Pipeline(memory, config, logger) if pipeline_enabled else None
     router = Router(memory, config) if not pipeline_enabled else None
 
+    maintenance_cfg = config.get("maintenance", {})
+    scheduler: Optional[MaintenanceScheduler] = None
+    if maintenance_cfg.get("enabled", False) and pipeline is not None:
+        scheduler = MaintenanceScheduler(
+            _maintenance(memory, config),
+            pipeline.idle_for,
+            interval_sec=float(maintenance_cfg.get("interval_sec", 3600)),
+            idle_sec=float(maintenance_cfg.get("idle_sec", 30)),
+            slice_pause_sec=float(maintenance_cfg.get("slice_pause_sec", 0.1)),
+        )
+        scheduler.start()
+
     wake_phrase = config["assistant"]["wake_phrase"].lower()
     session_id = f"session-{uuid4()}"
     hint_shown = False
@@ -70,9 +95,19 @@ def run() -> None:
                 timestamp=datetime.now(timezone.utc),
             )
 
+            streamed: List[str] = []
+
+            def print_token(chunk: str) -> None:
+                if not streamed:
+                    console.print("[bold cyan]orja:[/bold cyan] ", end="")
+                streamed.append(chunk)
+                console.print(chunk, end="", markup=False, highlight=False)
+
             try:
                 if pipeline is not None:
-                    response = pipeline.handle_user_request(command, session_id)
+                    response = pipeline.handle_user_request(
+                        command, session_id, on_token=print_token
+                    )
                 elif router is not None:
                     response = router.dispatch(command)
                 else:
@@ -88,7 +123,12 @@ def run() -> None:
                 timestamp=datetime.now(timezone.utc),
             )
 
-            console.print(f"[bold cyan]orja:[/bold cyan] {response}")
+            if streamed:
+                console.print()
+                if "".join(streamed).strip() != response:
+                    console.print(f"[bold cyan]orja:[/bold cyan] {response}")
+            else:
+                console.print(f"[bold cyan]orja:[/bold cyan] {response}")
             logger.info("Handled command: %s", command)
 
     except KeyboardInterrupt:
@@ -98,4 +138,47 @@ def run() -> None:
         logger.exception("Assistant crashed: %s", exc)
         console.print(f"Unexpected error: {exc}")
         sys.exit(1)
+    finally:
+        if scheduler is not None:
+            scheduler.stop()
+        if pipeline is not None:
+            pipeline.close()
+
+
+def maintain(argv: Optional[List[str]] = None) -> None:
+    """`python -m orja maintain`: roll up, prune and vacuum the database once, to completion."""
+    parser = argparse.ArgumentParser(prog="python -m orja maintain", description=maintain.__doc__)
+    parser.add_argument(
+        "--full-vacuum",
+        action="store_true",
+        help="convert a database created without auto_vacuum=INCREMENTAL (rewrites the file; stop the assistant first)",
+    )
+    args = parser.parse_args(argv)
+
+    project_root = Path(__file__).resolve().parent.parent.parent
+    config = load_config(project_root / "config" / "config.yaml")
+    setup_logger(project_root / config["logging"]["file"], level=config["logging"].get("level", "INFO"))
+    memory = MemoryStore(project_root / config["database"]["path"], config["database"])
+    maintenance = _maintenance(memory, config)
+    try:
+        if args.full_vacuum and maintenance.convert_auto_vacuum():
+            console.print("Converted database to incremental auto_vacuum.")
+        elif memory.db.auto_vacuum == "INCREMENTAL" and not maintenance.incremental_vacuum_enabled():
+            console.print("auto_vacuum is not INCREMENTAL; run with --full-vacuum to reclaim space.")
+        health = maintenance.event_writer_health()
+        report = maintenance.run()
+    finally:
+        memory.close()
+    if health is None:
+        console.print("Event writer: no stats recorded in the last 24 h.")
+    else:
+        console.print(
+            f"Event writer (last 24 h, {health['reports']} reports): {health['written']} events written, "
+            f"{health['dropped']} dropped, {health['sampled_out']} sampled out, {health['failed']} failed; "
+            f"max queue depth {health['max_depth']}, slowest batch {health['write_ms_max']:.1f} ms."
+        )
+    console.print(
+        f"Rolled up {report['hours_rolled_up']} hours, deleted {report['events_deleted']} events "
+        f"and {report['rollups_deleted']} rollups, freed {report['pages_freed']} pages."
+    )
 
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+
+class EventLoopThread:
+    """One long-lived asyncio loop on a daemon thread, for synchronous callers.
+
+    Keeping a single loop (instead of asyncio.run per call) lets async HTTP
+    connections stay pooled across requests.
+    """
+
+    def __init__(self, name: str = "orja-event-loop") -> None:
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name=self.name, daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run coro on the loop thread and block until it finishes."""
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+        loop.close()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from orja.memory.db import MemoryStore
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBudget:
+    """Per-step max_tokens learned from how long past outputs actually were.
+
+    Output lengths (``tokens_predicted``) per step_name are seeded from the
+    metrics of recent pipeline_events and then tracked live. A step's budget
+    is the given percentile of its last ``window`` lengths plus ``margin``,
+    rounded up to a multiple of ``quantum`` (keeps cache keys stable) and
+    clamped to [floor, cap], where cap is the agent's configured max_tokens.
+    A generation cut off by an adaptive budget is recorded as truncated and
+    widens that step's budget by ``backoff`` for as long as it stays in the
+    window.
+    """
+
+    def __init__(
+        self,
+        memory: Optional[MemoryStore],
+        *,
+        percentile: float = 95.0,
+        margin: int = 8,
+        min_samples: int = 20,
+        window: int = 200,
+        floor: int = 16,
+        quantum: int = 8,
+        backoff: float = 1.5,
+    ) -> None:
+        self.memory = memory
+        self.percentile = min(max(percentile, 0.0), 100.0)
+        self.margin = margin
+        self.min_samples = max(1, min_samples)
+        self.window = max(self.min_samples, window)
+        self.floor = max(1, floor)
+        self.quantum = max(1, quantum)
+        self.backoff = max(1.0, backoff)
+        self._samples: Dict[str, Deque[Tuple[int, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def _history(self, step_name: str) -> Deque[Tuple[int, bool]]:
+        samples = self._samples.get(step_name)
+        if samples is None:
+            samples = deque(maxlen=self.window)
+            if self.memory is not None:
+                try:
+                    rows = self.memory.recent_event_metrics(step_name, limit=self.window)
+                except Exception as exc:  # pragma: no cover - defensive
+                    logger.warning("Could not load output lengths for %s: %s", step_name, exc)
+                    rows = []
+                for metrics in reversed(rows):  # oldest first
+                    if "tokens_predicted" in metrics and not metrics.get("fallback"):
+                        samples.append((int(metrics["tokens_predicted"]), bool(metrics.get("budget_truncated"))))
+            self._samples[step_name] = samples
+        return samples
+
+    def _budget(self, samples: Deque[Tuple[int, bool]], cap: int) -> int:
+        lengths = sorted(tokens for tokens, _ in samples)
+        rank = max(1, math.ceil(self.percentile / 100.0 * len(lengths)))
+        budget = lengths[rank - 1] + self.margin
+        truncations = sum(1 for _, truncated in samples if truncated)
+        budget = math.ceil(budget * self.backoff**truncations / self.quantum) * self.quantum
+        return min(cap, max(self.floor, budget))
+
+    def limit(self, step_name: str, cap: int, usage: Optional[Dict[str, Any]] = None) -> int:
+        """max_tokens to request for step_name; the cap is used until enough samples exist."""
+        with self._lock:
+            samples = self._history(step_name)
+            limit = cap if len(samples) < self.min_samples else self._budget(samples, cap)
+        if usage is not None:
+            usage["max_tokens"] = limit
+            usage["max_tokens_adaptive"] = limit < cap
+        return limit
+
+    def observe(self, step_name: str, metrics: Optional[Dict[str, Any]]) -> None:
+        """Record one generation's length; marks metrics["budget_truncated"] when the budget cut it off."""
+        if not metrics or "tokens_predicted" not in metrics or metrics.get("fallback"):
+            return
+        if "max_tokens" not in metrics:
+            return  # step does not use the adaptive budget
+        truncated = bool(metrics.get("stopped_limit")) and bool(metrics.get("max_tokens_adaptive"))
+        if truncated:
+            metrics["budget_truncated"] = True
+            logger.warning(
+                "%s output hit its adaptive budget of %s tokens; widening it",
+                step_name,
+                metrics["max_tokens"],
+            )
+        with self._lock:
+            self._history(step_name).append((int(metrics["tokens_predicted"]), truncated))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                step_name: {
+                    "samples": len(samples),
+                    "truncations": sum(1 for _, truncated in samples if truncated),
+                }
+                for step_name, samples in self._samples.items()
+            }
@@ -13,13 +13,108 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         "timezone": "Europe/Helsinki",
     },
     "dev": {"reload_prompts": True},
-    "pipeline": {"enabled": True, "max_history_messages": 6},
+    "pipeline": {
+        "enabled": True,
+        "max_history_messages": 20,
+        "concurrent_agents": True,
+        "agent_mode": "split",
+        "route_cache": {
+            "enabled": True,
+            "path": "data/route_cache.npz",
+            "threshold": 0.92,
+            "max_entries": 512,
+            "save_interval_sec": 30,
+        },
+        "deadline": {
+            "enabled": True,
+            "budget_sec": 30,
+            "responder_reserve_sec": 8,
+            "min_call_sec": 1.0,
+            "skip_evaluator_below_sec": 20,
+            "manual_router_below_sec": 12,
+            "shrink_responder_below_sec": 8,
+            "min_responder_tokens": 32,
+        },
+        "event_writer": {
+            "enabled": True,
+            "max_queue": 1000,
+            "batch_size": 64,
+            "flush_interval_sec": 0.5,
+            "overflow": "drop",
+            "sample_every": 10,
+            "block_timeout_sec": 1.0,
+            "stats_interval_sec": 300,
+        },
+        "summary": {
+            "enabled": True,
+            "idle_sec": 5,
+            "keep_recent": 6,
+            "min_new_messages": 4,
+            "max_batch": 12,
+            "timeout_sec": 20,
+        },
+        "token_budget": {
+            "enabled": True,
+            "percentile": 95,
+            "margin": 8,
+            "min_samples": 20,
+            "window": 200,
+            "backoff": 1.5,
+        },
+    },
     "agents": {
-        "evaluator": {"enabled": True, "max_tokens": 80},
-        "router": {"enabled": True, "max_tokens": 80},
-        "responder": {"enabled": True, "max_tokens": 200},
+        "evaluator": {
+            "enabled": True,
+            "max_tokens": 80,
+            "context_tokens": 768,
+            "cache": True,
+            "adaptive_tokens": True,
+            "stop": ["\n\n"],
+        },
+        "router": {
+            "enabled": True,
+            "max_tokens": 80,
+            "cache": True,
+            "adaptive_tokens": True,
+            "stop": ["\n\n"],
+        },
+        "responder": {"enabled": True, "max_tokens": 200, "context_tokens": 1536, "adaptive_tokens": False},
+        "summarizer": {"enabled": True, "max_tokens": 120, "context_tokens": 1280, "cache": False},
+        "triage": {
+            "enabled": True,
+            "max_tokens": 120,
+            "context_tokens": 1280,
+            "cache": True,
+            "adaptive_tokens": True,
+            "stop": ["\n\n"],
+        },
+    },
+    "skills": {
+        "help": {"respond": "direct"},
+        "time": {"respond": "direct", "template": None},
+        "timer": {"respond": "direct"},
+    },
+    "database": {
+        "path": "data/orja.sqlite",
+        "persistent_connections": True,
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size_kb": 8192,
+        "busy_timeout_ms": 5000,
+        "statement_cache": 128,
+        "history_cache": {"enabled": True, "max_sessions": 32, "max_messages": 50},
+    },
+    "maintenance": {
+        "enabled": True,
+        "interval_sec": 3600,
+        "idle_sec": 30,
+        "slice_pause_sec": 0.1,
+        "retention_days": 14,
+        "rollup_retention_days": 365,
+        "delete_batch": 2000,
+        "vacuum_pages": 256,
     },
-    "database": {"path": "data/orja.sqlite"},
     "logging": {"file": "logs/orja.log", "level": "INFO"},
     "llm": {
         "backend": "llama_cpp_cli",
@@ -30,6 +125,22 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         ),
         "language": "en",
         "history_messages": 6,
+        "cache": {
+            "path": "data/llm_cache.sqlite",
+            "memory_entries": 256,
+            "ttl_sec": 86400,
+            "max_rows": 5000,
+            "prune_every": 100,
+        },
+        "cloud": {
+            "enabled": False,
+            "base_url": "https://api.openai.com/v1",
+            "model": "gpt-4o-mini",
+            "api_key_env": "OPENAI_API_KEY",
+            "timeout_sec": 30,
+            "max_tokens": 300,
+            "hedge_after_sec": 2.0,
+        },
         "llama_cpp": {
             "bin_path": "vendor/llama.cpp/build/bin/llama-cli",
             "model_path": "models/SmolLM2-360M-Instruct-Q4_K_M.gguf",
@@ -41,10 +152,45 @@ DEFAULT_CONFIG: Dict[str, Any] = {
             "repeat_penalty": 1.1,
             "batch_size": 256,
             "timeout_sec": 45,
+            "grammar": True,
+            "ram_mb": None,
+            "ram_budget_mb": 0,
+            "models": [],
+            "tiers": {"easy": "default", "medium": "default", "hard": "default"},
+            "cli_worker": {
+                "enabled": True,
+                "max_workers": 4,
+                "startup_timeout_sec": 60,
+                "recycle_chars": 5000,
+                "reset_context": False,
+                "extra_args": ["-no-cnv"],
+            },
+            "embedding": {
+                "enabled": False,
+                "host": "127.0.0.1",
+                "port": 8091,
+                "model_path": "",
+                "managed": True,
+                "threads": 1,
+            },
             "server": {
                 "enabled": True,
                 "host": "127.0.0.1",
                 "port": 8080,
+                "cache_prompt": True,
+                "slots": ["evaluator_system", "router_system", "responder_system"],
+                "instances": 1,
+                "managed": True,
+                "threads_per_instance": None,
+                "background_start": True,
+                "prime": True,
+                "restart": {
+                    "enabled": True,
+                    "backoff_sec": 1.0,
+                    "max_backoff_sec": 30.0,
+                    "max_restarts": 5,
+                    "stable_sec": 60.0,
+                },
             },
         },
     },
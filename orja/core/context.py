@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Hashable, List, Optional, Sequence
+
+from orja.llm.provider import ChatMessage, LLMProvider
+from orja.memory.db import Message, SessionSummary
+
+logger = logging.getLogger(__name__)
+
+# Chat template tokens around each message (<|im_start|>role\n ... <|im_end|>\n).
+MESSAGE_OVERHEAD_TOKENS = 6
+# Role of the pseudo-message that carries a session summary at the head of history.
+SUMMARY_ROLE = "summary"
+
+
+def summary_message(summary: SessionSummary) -> Message:
+    """History entry standing in for every message the summary covers."""
+    return Message(
+        id=0,
+        timestamp_utc=summary.updated_utc,
+        role=SUMMARY_ROLE,
+        content=summary.summary,
+        session_id=summary.session_id,
+        line=f"Earlier in this conversation: {summary.summary}",
+    )
+
+
+@dataclass
+class PackedContext:
+    history: List[str] = field(default_factory=list)
+    tokens: int = 0
+    budget: int = 0
+    dropped: int = 0
+
+    def history_text(self) -> str:
+        return "\n".join(self.history) if self.history else "no history"
+
+
+class ContextBuilder:
+    """Packs prompt parts and conversation history under a token budget.
+
+    Token counts come from the provider's tokenizer and are memoised: stored
+    messages by id, everything else by text. When the budget is tight the
+    oldest history turns are dropped first.
+    """
+
+    def __init__(self, provider: LLMProvider, *, memo_size: int = 2048) -> None:
+        self.provider = provider
+        self.memo_size = memo_size
+        self.lookups = 0
+        self.misses = 0
+        self._memo: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, text: str, key: Optional[Hashable] = None) -> int:
+        if not text:
+            return 0
+        memo_key = key if key is not None else text
+        with self._lock:
+            self.lookups += 1
+            cached = self._memo.get(memo_key)
+            if cached is not None:
+                self._memo.move_to_end(memo_key)
+                return cached
+            self.misses += 1
+        tokens = self.provider.count_tokens(text)
+        with self._lock:
+            self._memo[memo_key] = tokens
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return tokens
+
+    def pack(
+        self,
+        *,
+        budget: int,
+        system_prompt: str,
+        parts: Sequence[str],
+        history: Sequence[Message],
+    ) -> PackedContext:
+        """Fit history (oldest first) alongside the fixed prompt parts.
+
+        The system prompt, parts and a leading session summary (SUMMARY_ROLE)
+        are always kept; history turns are added newest first until the
+        budget is reached.
+        """
+        used = 2 * MESSAGE_OVERHEAD_TOKENS + self.count(system_prompt)
+        used += sum(self.count(part) for part in parts)
+        summary: Optional[Message] = None
+        if history and history[0].role == SUMMARY_ROLE:
+            summary, history = history[0], history[1:]
+            used += self.count(summary.line) + 1
+        kept: List[str] = []
+        for message in reversed(history):
+            # +1 for the newline joining history lines.
+            cost = self.count(message.line, key=("message", message.id)) + 1
+            if used + cost > budget:
+                break
+            kept.append(message.line)
+            used += cost
+        dropped = len(history) - len(kept)
+        if summary is not None:
+            kept.append(summary.line)
+        kept.reverse()
+        packed = PackedContext(history=kept, tokens=used, budget=budget, dropped=dropped)
+        if used > budget:
+            logger.warning("Prompt needs %d tokens, over the %d token budget", used, budget)
+        elif packed.dropped:
+            logger.debug("Dropped %d oldest history messages to fit %d tokens", packed.dropped, budget)
+        return packed
+
+    def fit_messages(
+        self, messages: Sequence[ChatMessage], *, system_prompt: str, budget: int
+    ) -> List[ChatMessage]:
+        """Drop the oldest chat messages until the prompt fits; the last one is always kept."""
+        if not messages:
+            return []
+        used = MESSAGE_OVERHEAD_TOKENS + self.count(system_prompt)
+        kept: List[ChatMessage] = []
+        for index, message in enumerate(reversed(messages)):
+            cost = MESSAGE_OVERHEAD_TOKENS + self.count(message.content)
+            if index > 0 and used + cost > budget:
+                break
+            kept.append(message)
+            used += cost
+        kept.reverse()
+        return kept
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, Optional
+
+
+class Deadline:
+    """Time budget for one user request, shared by every pipeline stage.
+
+    Created when the request arrives; each stage asks how much is left and
+    passes that on as the provider call's timeout, so the stages together
+    cannot overrun the budget the way per-call timeouts do.
+    """
+
+    def __init__(self, budget_sec: float, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self.budget_sec = float(budget_sec)
+        self._clock = clock
+        self.started = clock()
+        self.expires = self.started + self.budget_sec
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires - self._clock())
+
+    def elapsed_ms(self) -> float:
+        return (self._clock() - self.started) * 1000
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def below(self, seconds: Optional[float]) -> bool:
+        """True when less than seconds remain; None or 0 disables the check."""
+        return bool(seconds) and self.remaining() < float(seconds)
+
+    def timeout(self, *, reserve: float = 0.0, floor: float = 0.0) -> float:
+        """Timeout for the next call: time left minus reserve (kept for later stages), at least floor."""
+        return max(floor, self.remaining() - reserve)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Counters for event metrics."""
+        return {
+            "deadline_ms": round(self.budget_sec * 1000, 1),
+            "remaining_ms": round(self.remaining() * 1000, 1),
+        }
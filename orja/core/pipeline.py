@@ -1,24 +1,42 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import re
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
-
-from orja.agents import EvaluatorAgent, ResponderAgent, RouterAgent
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from orja.agents import EvaluatorAgent, ResponderAgent, RouterAgent, SummarizerAgent
+from orja.agents.evaluator import FALLBACK_EVALUATION
+from orja.agents.route_cache import SemanticRouteCache
+from orja.agents.router import FALLBACK_ROUTE
+from orja.agents.triage import TriageAgent
+from orja.core.async_runner import EventLoopThread
+from orja.core.budget import TokenBudget
+from orja.core.context import ContextBuilder
+from orja.core.deadline import Deadline
 from orja.core.prompts import PromptLoader
-from orja.llm.provider import ProviderFactory
+from orja.core.summary import SummaryMemory
+from orja.llm.cache import CachedProvider, ResponseCache
+from orja.llm.hedge import HedgedProvider
+from orja.llm.provider import LLMProvider, ProviderFactory
+from orja.llm.registry import DEFAULT_MODEL, ModelRegistry
 from orja.memory.db import MemoryStore, Message
+from orja.memory.event_writer import EventWriter
 from orja.skills.help_skill import help_skill
+from orja.skills.result import SkillResult
 from orja.skills.time_skill import time_skill
 from orja.skills.timer_skill import timer_skill
 
 logger = logging.getLogger(__name__)
 
 
+SKILL_RESPOND_POLICIES = ("direct", "llm")
+
+
 def _truncate(text: str, limit: int = 800) -> str:
     return text if len(text) <= limit else text[: limit - 3] + "..."
 
@@ -41,8 +59,14 @@ class Pipeline:
         self.logger = logger_obj
         self.config = config
         self.pipeline_enabled = config.get("pipeline", {}).get("enabled", True)
-        self.max_history = config.get("pipeline", {}).get("max_history_messages", 6)
+        self.max_history = config.get("pipeline", {}).get("max_history_messages", 20)
+        self.concurrent_agents = config.get("pipeline", {}).get("concurrent_agents", True)
+        self.agent_mode = config.get("pipeline", {}).get("agent_mode", "split")
+        if self.agent_mode not in ("split", "fused"):
+            raise ValueError(f"Unknown pipeline.agent_mode: {self.agent_mode}")
         self.json_mode = config.get("llm", {}).get("json_strict", True)
+        self.skill_policies = config.get("skills", {})
+        self._loop = EventLoopThread()
 
         base_path = Path(__file__).resolve().parent.parent
         project_root = base_path.parent
@@ -52,35 +76,167 @@ class Pipeline:
 
         self.provider = ProviderFactory.create_provider(config.get("llm", {}))
 
+        self.context = ContextBuilder(self.provider)
+        self.models = ModelRegistry(self.provider, config.get("llm", {}))
+        cloud_cfg = config.get("llm", {}).get("cloud", {})
+        self.cloud: Optional[LLMProvider] = None
+        self.hedge_after_sec = float(cloud_cfg.get("hedge_after_sec", 2.0))
+        if cloud_cfg.get("enabled", False):
+            self.cloud = ProviderFactory.create_provider({**config.get("llm", {}), "backend": "cloud"})
+
+        cache_cfg = config.get("llm", {}).get("cache", {})
+        cache_path = cache_cfg.get("path")
+        self.response_cache = ResponseCache(
+            project_root / cache_path if cache_path else None,
+            memory_entries=int(cache_cfg.get("memory_entries", 256)),
+            ttl_sec=float(cache_cfg.get("ttl_sec", 86400)),
+            max_rows=int(cache_cfg.get("max_rows", 5000)),
+            prune_every=int(cache_cfg.get("prune_every", 100)),
+            db_options=config.get("database"),
+        )
+        route_cache_cfg = config.get("pipeline", {}).get("route_cache", {})
+        route_cache_path = route_cache_cfg.get("path")
+        self.route_cache: Optional[SemanticRouteCache] = None
+        if route_cache_cfg.get("enabled", False):
+            self.route_cache = SemanticRouteCache(
+                self.provider,
+                project_root / route_cache_path if route_cache_path else None,
+                threshold=float(route_cache_cfg.get("threshold", 0.92)),
+                max_entries=int(route_cache_cfg.get("max_entries", 512)),
+                save_interval_sec=float(route_cache_cfg.get("save_interval_sec", 30)),
+            )
+        self.prompts.add_listener(self._on_prompt_changed)
+
+        budget_cfg = config.get("pipeline", {}).get("token_budget", {})
+        self.token_budget: Optional[TokenBudget] = None
+        if budget_cfg.get("enabled", False):
+            self.token_budget = TokenBudget(
+                memory,
+                percentile=float(budget_cfg.get("percentile", 95)),
+                margin=int(budget_cfg.get("margin", 8)),
+                min_samples=int(budget_cfg.get("min_samples", 20)),
+                window=int(budget_cfg.get("window", 200)),
+                backoff=float(budget_cfg.get("backoff", 1.5)),
+            )
+
+        deadline_cfg = config.get("pipeline", {}).get("deadline", {})
+        self.deadline_enabled = deadline_cfg.get("enabled", False)
+        self.deadline_sec = float(deadline_cfg.get("budget_sec", 30))
+        self.responder_reserve_sec = float(deadline_cfg.get("responder_reserve_sec", 8))
+        self.min_call_sec = float(deadline_cfg.get("min_call_sec", 1.0))
+        self.skip_evaluator_below_sec = float(deadline_cfg.get("skip_evaluator_below_sec", 0))
+        self.manual_router_below_sec = float(deadline_cfg.get("manual_router_below_sec", 0))
+        self.shrink_responder_below_sec = float(deadline_cfg.get("shrink_responder_below_sec", 0))
+        self.min_responder_tokens = int(deadline_cfg.get("min_responder_tokens", 32))
+
+        self._active_requests = 0
+        self._last_activity = time.monotonic()
+
+        writer_cfg = config.get("pipeline", {}).get("event_writer", {})
+        self.event_writer: Optional[EventWriter] = None
+        if writer_cfg.get("enabled", False):
+            self.event_writer = EventWriter(
+                memory,
+                max_queue=int(writer_cfg.get("max_queue", 1000)),
+                batch_size=int(writer_cfg.get("batch_size", 64)),
+                flush_interval_sec=float(writer_cfg.get("flush_interval_sec", 0.5)),
+                overflow=writer_cfg.get("overflow", "drop"),
+                sample_every=int(writer_cfg.get("sample_every", 10)),
+                block_timeout_sec=float(writer_cfg.get("block_timeout_sec", 1.0)),
+                stats_interval_sec=float(writer_cfg.get("stats_interval_sec", 300)),
+            )
+
         agents_cfg = config.get("agents", {})
         self.evaluator = EvaluatorAgent(
-            self.provider,
+            self._agent_provider(agents_cfg.get("evaluator", {})),
             self.prompts,
             agents_cfg.get("evaluator", {}),
             logger_obj,
             json_mode=self.json_mode,
+            context_builder=self.context,
+            budget=self._agent_budget(agents_cfg.get("evaluator", {})),
         )
         self.router = RouterAgent(
-            self.provider,
+            self._agent_provider(agents_cfg.get("router", {})),
             self.prompts,
             agents_cfg.get("router", {}),
             logger_obj,
             json_mode=self.json_mode,
+            budget=self._agent_budget(agents_cfg.get("router", {})),
+        )
+        self.triage = TriageAgent(
+            self._agent_provider(agents_cfg.get("triage", {})),
+            self.prompts,
+            agents_cfg.get("triage", {}),
+            logger_obj,
+            json_mode=self.json_mode,
+            context_builder=self.context,
+            budget=self._agent_budget(agents_cfg.get("triage", {})),
         )
         self.responder = ResponderAgent(
-            self.provider, self.prompts, agents_cfg.get("responder", {}), logger_obj
+            self._agent_provider(agents_cfg.get("responder", {})),
+            self.prompts,
+            agents_cfg.get("responder", {}),
+            logger_obj,
+            context_builder=self.context,
+            budget=self._agent_budget(agents_cfg.get("responder", {})),
         )
 
+        summary_cfg = config.get("pipeline", {}).get("summary", {})
+        self.summary_memory: Optional[SummaryMemory] = None
+        if summary_cfg.get("enabled", False):
+            self.summary_memory = SummaryMemory(
+                memory,
+                SummarizerAgent(
+                    self._agent_provider(agents_cfg.get("summarizer", {})),
+                    self.prompts,
+                    agents_cfg.get("summarizer", {}),
+                    logger_obj,
+                    context_builder=self.context,
+                ),
+                self.idle_for,
+                record_event=self._record_event,
+                idle_sec=float(summary_cfg.get("idle_sec", 5)),
+                keep_recent=int(summary_cfg.get("keep_recent", 6)),
+                min_new_messages=int(summary_cfg.get("min_new_messages", 4)),
+                max_batch=int(summary_cfg.get("max_batch", 12)),
+                timeout_sec=float(summary_cfg.get("timeout_sec", 20)),
+            )
+
+        # System prompts to prefill into their server slots at startup and after edits.
+        self.primed_prompts = ["evaluator_system", "responder_system"]
+        self.primed_prompts.append("triage_system" if self.agent_mode == "fused" else "router_system")
+        self.provider.warm_up({name: self.prompts.get_prompt(name) for name in self.primed_prompts})
+
         self.skill_functions = {
             "help": help_skill,
             "time": time_skill,
             "timer": timer_skill,
         }
+        self._check_skill_policies()
         self.manual_prefixes = {
             "help": ("help", "commands", "what can you do"),
             "time": ("time", "clock", "what time", "what's the time", "whats the time", "current time"),
         }
 
+    def _agent_provider(self, agent_config: Dict) -> LLMProvider:
+        if agent_config.get("cache", False):
+            return CachedProvider(self.provider, self.response_cache)
+        return self.provider
+
+    def _agent_budget(self, agent_config: Dict) -> Optional[TokenBudget]:
+        return self.token_budget if agent_config.get("adaptive_tokens", False) else None
+
+    def _on_prompt_changed(self, name: str) -> None:
+        # Skill summaries are embedded in the routing prompts rather than being a family of their own.
+        families = ["router_system", "triage_system"] if name == "skill_summaries" else [name]
+        for family in families:
+            self.response_cache.invalidate(family)
+        if self.route_cache is not None and {"router_system", "triage_system"} & set(families):
+            self.route_cache.clear()
+        if name in self.primed_prompts:
+            self.provider.warm_up({name: self.prompts.get_prompt(name)})
+
     def _record_event(
         self,
         session_id: str,
@@ -89,9 +245,13 @@ class Pipeline:
         output_data: str,
         success: bool,
         latency_ms: Optional[float],
+        metrics: Optional[Dict[str, Any]] = None,
     ) -> None:
+        if self.token_budget is not None and success:
+            # Feeds output lengths back and flags generations cut off by the budget.
+            self.token_budget.observe(step_name, metrics)
         try:
-            self.memory.add_pipeline_event(
+            row = MemoryStore.pipeline_event_row(
                 session_id=session_id,
                 step_name=step_name,
                 input_summary=_truncate(input_summary, 400),
@@ -99,16 +259,105 @@ class Pipeline:
                 success=success,
                 latency_ms=latency_ms,
                 timestamp=datetime.now(timezone.utc),
+                metrics=metrics,
             )
+            if self.event_writer is not None:
+                self.event_writer.submit(row)
+            else:
+                self.memory.add_pipeline_events([row])
         except Exception as exc:  # pragma: no cover - defensive
             self.logger.warning("Failed to persist pipeline event %s: %s", step_name, exc)
 
-    def _run_evaluator(self, user_text: str, history: List[str], session_id: str) -> Dict:
+    def close(self) -> None:
+        """Stop summary refreshes, flush pending cache writes and pipeline events, then stop the event loop.
+
+        Call once at shutdown.
+        """
+        if self.summary_memory is not None:
+            self.summary_memory.close()
+        if self.route_cache is not None:
+            self.route_cache.close()
+        self.response_cache.close()
+        if self.event_writer is not None:
+            self.event_writer.close()
+        self._loop.close()
+
+    def _new_deadline(self) -> Optional[Deadline]:
+        return Deadline(self.deadline_sec) if self.deadline_enabled else None
+
+    def _stage_timeout(self, deadline: Optional[Deadline], skip_below_sec: float = 0.0) -> Optional[float]:
+        """Timeout for an evaluator/router/triage call.
+
+        The call must finish while skip_below_sec (and at least
+        responder_reserve_sec) is still left. The up-front skip checks only
+        fire when a stage starts late; this is what applies them to a stage
+        that started early and then spent its time queueing or decoding.
+        """
+        if deadline is None:
+            return None
+        return deadline.timeout(reserve=max(self.responder_reserve_sec, skip_below_sec), floor=self.min_call_sec)
+
+    def _degrade(
+        self,
+        session_id: str,
+        user_text: str,
+        stage: str,
+        action: str,
+        deadline: Deadline,
+        **details: Any,
+    ) -> None:
+        """Record that a stage was skipped, reduced or cut off to stay within the deadline."""
+        metrics = {"stage": stage, "action": action, **deadline.snapshot(), **details}
+        self.logger.warning(
+            "Deadline: %s %s with %.0f ms of %.0f ms left",
+            stage,
+            action,
+            metrics["remaining_ms"],
+            metrics["deadline_ms"],
+        )
+        self._record_event(
+            session_id,
+            "degrade",
+            input_summary=user_text,
+            output_data=f"{stage} {action}",
+            success=True,
+            latency_ms=deadline.elapsed_ms(),
+            metrics=metrics,
+        )
+
+    def _note_overrun(
+        self,
+        session_id: str,
+        user_text: str,
+        stage: str,
+        deadline: Optional[Deadline],
+        usage: Dict[str, Any],
+        skip_below_sec: float = 0.0,
+    ) -> None:
+        """A routing stage that fell back after using up its share of the deadline timed out."""
+        if deadline is None or not usage.get("fallback"):
+            return
+        if deadline.remaining() <= max(self.responder_reserve_sec, skip_below_sec):
+            self._degrade(session_id, user_text, stage, "timed_out", deadline)
+
+    async def _arun_evaluator(
+        self, user_text: str, history: List[Message], session_id: str, deadline: Optional[Deadline] = None
+    ) -> Dict:
+        if deadline is not None and deadline.below(self.skip_evaluator_below_sec):
+            self._degrade(session_id, user_text, "evaluator", "skipped", deadline)
+            return {**FALLBACK_EVALUATION, "reason": "deadline"}
         start = time.perf_counter()
-        result = self.evaluator.run(user_text, history)
+        usage: Dict[str, Any] = {}
+        result = await self.evaluator.arun(
+            user_text, history, usage=usage, timeout=self._stage_timeout(deadline, self.skip_evaluator_below_sec)
+        )
+        self._note_overrun(session_id, user_text, "evaluator", deadline, usage, self.skip_evaluator_below_sec)
         latency = (time.perf_counter() - start) * 1000
         self.logger.info(
-            "Evaluator result: %s (%.1f ms)", json.dumps(result, ensure_ascii=False), latency
+            "Evaluator result: %s (%.1f ms, %s tokens)",
+            json.dumps(result, ensure_ascii=False),
+            latency,
+            usage.get("tokens_predicted", "?"),
         )
         self._record_event(
             session_id,
@@ -117,6 +366,7 @@ class Pipeline:
             output_data=json.dumps(result, ensure_ascii=False),
             success=True,
             latency_ms=latency,
+            metrics=usage,
         )
         return result
 
@@ -144,7 +394,53 @@ class Pipeline:
             }
         return None
 
-    def _run_router(self, user_text: str, session_id: str) -> Dict:
+    @staticmethod
+    def _fill_timer_minutes(result: Dict, user_text: str) -> None:
+        if result.get("skill") == "timer":
+            arguments = result.get("arguments") or {}
+            if arguments.get("minutes") is None:
+                minutes = _extract_minutes(user_text)
+                if minutes is not None:
+                    arguments["minutes"] = minutes
+                    result["arguments"] = arguments
+
+    def _cached_route(self, user_text: str, session_id: str, start: float) -> Tuple[Optional[Dict], Any]:
+        """Semantic cache lookup; returns (cached decision or None, request embedding)."""
+        if self.route_cache is None:
+            return None, None
+        embedding = self.route_cache.embed(user_text)
+        if embedding is None:
+            return None, None
+        cached = self.route_cache.lookup(embedding)
+        if cached is None:
+            return None, embedding
+        result, similarity, matched_text = cached
+        self._fill_timer_minutes(result, user_text)
+        latency = (time.perf_counter() - start) * 1000
+        self.logger.info(
+            "Router result from semantic cache: %s (similarity %.3f to %r, %.1f ms)",
+            json.dumps(result, ensure_ascii=False),
+            similarity,
+            matched_text,
+            latency,
+        )
+        self._record_event(
+            session_id,
+            "router_cache",
+            input_summary=user_text,
+            output_data=json.dumps(result, ensure_ascii=False),
+            success=True,
+            latency_ms=latency,
+            metrics={
+                "similarity": round(similarity, 4),
+                "matched": matched_text,
+                "cache_hits": self.route_cache.hits,
+                "cache_misses": self.route_cache.misses,
+            },
+        )
+        return result, embedding
+
+    def _manual_route(self, user_text: str, session_id: str) -> Optional[Dict]:
         manual = self._manual_router(user_text)
         if manual:
             self._record_event(
@@ -155,25 +451,54 @@ class Pipeline:
                 success=True,
                 latency_ms=0.0,
             )
+        return manual
+
+    async def _finish_route(
+        self, result: Dict, usage: Dict[str, Any], embedding: Any, user_text: str
+    ) -> None:
+        """Remember a fresh LLM routing decision and fill in request-specific arguments."""
+        if embedding is not None and not usage.get("parse_failed") and not usage.get("fallback"):
+            # Arguments belong to this request's wording; only the decision is reused.
+            self.route_cache.add(embedding, user_text, {**result, "arguments": {}})
+        self._fill_timer_minutes(result, user_text)
+
+    async def _arun_router(
+        self,
+        user_text: str,
+        session_id: str,
+        manual: Optional[Dict] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict:
+        if manual:
             return manual
+        if deadline is not None and deadline.below(self.manual_router_below_sec):
+            # Only the manual router ran; no cache embedding, no LLM call.
+            self._degrade(session_id, user_text, "router", "manual_only", deadline)
+            return {**FALLBACK_ROUTE, "arguments": {}}
 
         start = time.perf_counter()
+        # Embedding goes over blocking HTTP.
+        cached, embedding = await asyncio.to_thread(self._cached_route, user_text, session_id, start)
+        if cached is not None:
+            return cached
+
         skill_summaries = self.prompts.get_prompt("skill_summaries")
-        result = self.router.run(
+        usage: Dict[str, Any] = {}
+        result = await self.router.arun(
             user_text=user_text,
             available_skills=list(self.skill_functions.keys()),
             skill_summaries=skill_summaries,
+            usage=usage,
+            timeout=self._stage_timeout(deadline, self.manual_router_below_sec),
         )
-        if result.get("skill") == "timer":
-            arguments = result.get("arguments") or {}
-            if arguments.get("minutes") is None:
-                minutes = _extract_minutes(user_text)
-                if minutes is not None:
-                    arguments["minutes"] = minutes
-                    result["arguments"] = arguments
+        self._note_overrun(session_id, user_text, "router", deadline, usage, self.manual_router_below_sec)
+        await self._finish_route(result, usage, embedding, user_text)
         latency = (time.perf_counter() - start) * 1000
         self.logger.info(
-            "Router result: %s (%.1f ms)", json.dumps(result, ensure_ascii=False), latency
+            "Router result: %s (%.1f ms, %s tokens)",
+            json.dumps(result, ensure_ascii=False),
+            latency,
+            usage.get("tokens_predicted", "?"),
         )
         self._record_event(
             session_id,
@@ -182,14 +507,72 @@ class Pipeline:
             output_data=json.dumps(result, ensure_ascii=False),
             success=True,
             latency_ms=latency,
+            metrics=usage,
         )
         return result
 
-    def _run_skill(self, skill_name: str, arguments: Dict, user_text: str, session_id: str) -> str:
+    async def _arun_triage(
+        self,
+        user_text: str,
+        history: List[Message],
+        session_id: str,
+        manual: Optional[Dict] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[Dict, Dict]:
+        """Fused mode: one triage call yields both the evaluation and the route.
+
+        When the route is already known (manual match or semantic cache) only
+        the evaluator runs; when the deadline rules out the evaluator only the
+        router runs.
+        """
+        if not manual and deadline is not None and deadline.below(self.skip_evaluator_below_sec):
+            self._degrade(session_id, user_text, "evaluator", "skipped", deadline)
+            route = await self._arun_router(user_text, session_id, None, deadline)
+            return {**FALLBACK_EVALUATION, "reason": "deadline"}, route
+        route = manual
+        start = time.perf_counter()
+        embedding = None
+        if not route:
+            route, embedding = await asyncio.to_thread(self._cached_route, user_text, session_id, start)
+        if route:
+            return await self._arun_evaluator(user_text, history, session_id, deadline), route
+
+        skill_summaries = self.prompts.get_prompt("skill_summaries")
+        usage: Dict[str, Any] = {}
+        evaluation, result = await self.triage.arun(
+            user_text,
+            history,
+            available_skills=list(self.skill_functions.keys()),
+            skill_summaries=skill_summaries,
+            usage=usage,
+            timeout=self._stage_timeout(deadline, self.manual_router_below_sec),
+        )
+        self._note_overrun(session_id, user_text, "triage", deadline, usage, self.manual_router_below_sec)
+        await self._finish_route(result, usage, embedding, user_text)
+        latency = (time.perf_counter() - start) * 1000
+        output = json.dumps({"evaluation": evaluation, "route": result}, ensure_ascii=False)
+        self.logger.info(
+            "Triage result: %s (%.1f ms, %s tokens)",
+            output,
+            latency,
+            usage.get("tokens_predicted", "?"),
+        )
+        self._record_event(
+            session_id,
+            "triage",
+            input_summary=user_text,
+            output_data=output,
+            success=True,
+            latency_ms=latency,
+            metrics=usage,
+        )
+        return evaluation, result
+
+    def _run_skill(self, skill_name: str, arguments: Dict, user_text: str, session_id: str) -> SkillResult:
         start = time.perf_counter()
         handler = self.skill_functions.get(skill_name)
         if not handler:
-            return "Skill not found."
+            return SkillResult("Skill not found.")
 
         try:
             if skill_name == "timer":
@@ -197,10 +580,11 @@ class Pipeline:
                 result = handler(user_text, minutes=minutes)
             else:
                 result = handler(user_text)
+            result = SkillResult.coerce(result)
             success = True
         except Exception as exc:  # pragma: no cover - defensive
             self.logger.exception("Skill %s failed: %s", skill_name, exc)
-            result = "Skill execution failed."
+            result = SkillResult("Skill execution failed.")
             success = False
 
         latency = (time.perf_counter() - start) * 1000
@@ -208,30 +592,125 @@ class Pipeline:
             session_id,
             f"skill_{skill_name}",
             input_summary=user_text,
-            output_data=result,
+            output_data=result.text,
             success=success,
             latency_ms=latency,
+            metrics={"kind": result.kind},
         )
         return result
 
+    def _check_skill_policies(self) -> None:
+        """Reject unknown skills.<name>.respond policies at startup rather than mid-request."""
+        for skill_name, policy in self.skill_policies.items():
+            respond = (policy or {}).get("respond", "direct")
+            if respond not in SKILL_RESPOND_POLICIES:
+                raise ValueError(f"Unknown skills.{skill_name}.respond policy: {respond}")
+            if skill_name not in self.skill_functions:
+                self.logger.warning("skills.%s is configured but no such skill is registered", skill_name)
+
+    def _skill_respond_policy(self, skill_name: str) -> str:
+        """skills.<name>.respond: "direct" serves final/template results as-is, "llm" always polishes."""
+        return (self.skill_policies.get(skill_name) or {}).get("respond", "direct")
+
+    def _direct_answer(
+        self, skill_name: str, result: SkillResult, user_text: str, session_id: str, skipped: List[str]
+    ) -> Optional[str]:
+        """Answer text when the skill result may bypass the responder, else None."""
+        if not result.is_direct or self._skill_respond_policy(skill_name) != "direct":
+            return None
+        answer = result.render((self.skill_policies.get(skill_name) or {}).get("template"))
+        self._record_event(
+            session_id,
+            "direct_answer",
+            input_summary=user_text,
+            output_data=answer,
+            success=True,
+            latency_ms=0.0,
+            metrics={"skill": skill_name, "kind": result.kind, "skipped": skipped},
+        )
+        return answer
+
     def _run_responder(
         self,
         user_text: str,
-        history: List[str],
+        history: List[Message],
         evaluation: Dict,
         router_result: Dict,
         skill_output: Optional[str],
         session_id: str,
+        on_token: Optional[Callable[[str], None]] = None,
+        deadline: Optional[Deadline] = None,
     ) -> str:
         start = time.perf_counter()
-        result = self.responder.run(
-            user_text=user_text,
-            history=history,
-            evaluation=evaluation,
-            router_result=router_result,
-            skill_output=skill_output,
-        )
+        usage: Dict[str, Any] = {}
+        timeout: Optional[float] = None
+        max_tokens: Optional[int] = None
+        if deadline is not None:
+            timeout = deadline.timeout(floor=self.min_call_sec)
+            if deadline.below(self.shrink_responder_below_sec):
+                # Fewer tokens in proportion to the time left.
+                share = deadline.remaining() / self.shrink_responder_below_sec
+                max_tokens = max(self.min_responder_tokens, int(self.responder.max_tokens * share))
+                if max_tokens < self.responder.max_tokens:
+                    self._degrade(session_id, user_text, "responder", "shrunk", deadline, max_tokens=max_tokens)
+                else:
+                    max_tokens = None
+        first_token_at: List[float] = []
+
+        def forward(chunk: str) -> None:
+            if not first_token_at:
+                first_token_at.append(time.perf_counter())
+            on_token(chunk)
+
+        # Routing already ran on the default model; only the reply moves up a tier.
+        difficulty = str(evaluation.get("difficulty", "easy"))
+        model, provider = self.models.provider_for(difficulty, timeout)
+        try:
+            override = None if model == DEFAULT_MODEL else provider
+            if self.cloud is not None:
+                # Race the cloud model: at once when the evaluator asked for it,
+                # otherwise only if the local model has not answered in time.
+                override = HedgedProvider(
+                    override or self.responder.provider,
+                    self.cloud,
+                    hedge_after_sec=0.0 if evaluation.get("needs_cloud") else self.hedge_after_sec,
+                )
+            result = self.responder.run(
+                user_text=user_text,
+                history=history,
+                evaluation=evaluation,
+                router_result=router_result,
+                skill_output=skill_output,
+                on_token=forward if on_token is not None else None,
+                usage=usage,
+                provider=override,
+                timeout=timeout,
+                max_tokens=max_tokens,
+            )
+        finally:
+            self.models.release(model)
         latency = (time.perf_counter() - start) * 1000
+        if deadline is not None and usage.get("fallback") and deadline.expired:
+            self._degrade(session_id, user_text, "responder", "timed_out", deadline)
+        if usage.get("hedge_winner") == "remote":
+            model = self.cloud.model_name
+        else:
+            self.models.record(difficulty, model, latency)
+        metrics: Dict[str, Any] = {
+            **usage,
+            "streamed": on_token is not None,
+            "tier": difficulty,
+            "model": model,
+        }
+        if deadline is not None:
+            metrics.update(deadline.snapshot())
+            if max_tokens is not None:
+                metrics["deadline_max_tokens"] = max_tokens
+        if first_token_at:
+            metrics["ttft_ms"] = round((first_token_at[0] - start) * 1000, 1)
+            self.logger.info(
+                "Responder first token after %.1f ms (total %.1f ms)", metrics["ttft_ms"], latency
+            )
         self._record_event(
             session_id,
             "responder",
@@ -239,16 +718,62 @@ class Pipeline:
             output_data=result,
             success=True,
             latency_ms=latency,
+            metrics=metrics,
         )
         return result
 
-    def _history_strings(self, messages: List[Message]) -> List[str]:
-        ordered = list(reversed(messages))  # oldest first
-        return [f"{m.role}: {m.content}" for m in ordered]
+    async def _guarded_step(
+        self, step_name: str, step: Awaitable[Any], fallback: Any, user_text: str, session_id: str
+    ) -> Any:
+        try:
+            return await step
+        except Exception as exc:  # pragma: no cover - defensive
+            self.logger.exception("%s step failed: %s", step_name.capitalize(), exc)
+            self._record_event(
+                session_id,
+                step_name,
+                input_summary=user_text,
+                output_data=str(exc),
+                success=False,
+                latency_ms=None,
+            )
+            return fallback
+
+    def handle_user_request(
+        self,
+        user_text: str,
+        session_id: str,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Run the pipeline; responder chunks are passed to on_token as they arrive."""
+        self._active_requests += 1
+        try:
+            return self._loop.run(self.ahandle_user_request(user_text, session_id, on_token=on_token))
+        finally:
+            self._active_requests -= 1
+            self._last_activity = time.monotonic()
+
+    def idle_for(self) -> float:
+        """Seconds since the last request finished; 0 while one is running."""
+        if self._active_requests:
+            return 0.0
+        return time.monotonic() - self._last_activity
+
+    async def ahandle_user_request(
+        self,
+        user_text: str,
+        session_id: str,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Async pipeline run.
 
-    def handle_user_request(self, user_text: str, session_id: str) -> str:
+        The router never reads the evaluation, so both run concurrently
+        (pipeline.concurrent_agents) before the skill and responder stages.
+        """
         if not self.pipeline_enabled:
             return "Pipeline is disabled."
+        # One budget for the whole turn; each stage gets only what is left.
+        deadline = self._new_deadline()
 
         try:
             recent_messages = self.memory.recent_messages(
@@ -258,51 +783,84 @@ class Pipeline:
             self.logger.warning("Unable to load history: %s", exc)
             recent_messages = []
 
-        history_strings = self._history_strings(recent_messages)
-
-        try:
-            evaluation = self._run_evaluator(user_text, history_strings, session_id)
-        except Exception as exc:  # pragma: no cover - defensive
-            self.logger.exception("Evaluator step failed: %s", exc)
-            evaluation = {"difficulty": "medium", "needs_cloud": False, "reason": "error"}
-            self._record_event(
+        history = list(reversed(recent_messages))  # oldest first
+        if self.summary_memory is not None:
+            # Older turns are replaced by the running summary; refreshed after this turn, off the reply path.
+            try:
+                history = self.summary_memory.with_summary(session_id, history)
+            except Exception as exc:  # pragma: no cover - defensive
+                self.logger.warning("Unable to load session summary: %s", exc)
+            self.summary_memory.schedule(session_id)
+
+        # Manual routes are known before any model call; deterministic skills
+        # can answer without the evaluator, router and responder.
+        manual = self._manual_route(user_text, session_id)
+        skill_result: Optional[SkillResult] = None
+        if manual and self._skill_respond_policy(manual["skill"]) == "direct":
+            skill_result = self._run_skill(manual["skill"], manual.get("arguments") or {}, user_text, session_id)
+            answer = self._direct_answer(
+                manual["skill"], skill_result, user_text, session_id, ["evaluator", "router", "responder"]
+            )
+            if answer is not None:
+                return answer
+
+        evaluation_fallback = {**FALLBACK_EVALUATION, "reason": "error"}
+        route_fallback = {**FALLBACK_ROUTE, "arguments": {}}
+        if self.agent_mode == "fused":
+            evaluation, router_result = await self._guarded_step(
+                "triage",
+                self._arun_triage(user_text, history, session_id, manual, deadline),
+                (evaluation_fallback, route_fallback),
+                user_text,
                 session_id,
-                "evaluator",
-                input_summary=user_text,
-                output_data=str(exc),
-                success=False,
-                latency_ms=None,
             )
-
-        try:
-            router_result = self._run_router(user_text, session_id)
-        except Exception as exc:  # pragma: no cover - defensive
-            self.logger.exception("Router step failed: %s", exc)
-            router_result = {"action": "chat", "skill": None, "arguments": {}, "confidence": 0.0}
-            self._record_event(
+        else:
+            evaluation_step = self._guarded_step(
+                "evaluator",
+                self._arun_evaluator(user_text, history, session_id, deadline),
+                evaluation_fallback,
+                user_text,
                 session_id,
+            )
+            router_step = self._guarded_step(
                 "router",
-                input_summary=user_text,
-                output_data=str(exc),
-                success=False,
-                latency_ms=None,
+                self._arun_router(user_text, session_id, manual, deadline),
+                route_fallback,
+                user_text,
+                session_id,
             )
+            if self.concurrent_agents:
+                evaluation, router_result = await asyncio.gather(evaluation_step, router_step)
+            else:
+                evaluation = await evaluation_step
+                router_result = await router_step
 
         skill_output: Optional[str] = None
         if router_result.get("action") == "skill" and router_result.get("skill") in self.skill_functions:
-            arguments = router_result.get("arguments") or {}
-            skill_output = self._run_skill(
-                router_result["skill"], arguments, user_text, session_id
-            )
+            if skill_result is None:
+                arguments = router_result.get("arguments") or {}
+                skill_result = self._run_skill(
+                    router_result["skill"], arguments, user_text, session_id
+                )
+                answer = self._direct_answer(
+                    router_result["skill"], skill_result, user_text, session_id, ["responder"]
+                )
+                if answer is not None:
+                    return answer
+            skill_output = skill_result.text
 
         try:
-            response = self._run_responder(
+            # Streaming the reply uses blocking I/O and callbacks; keep it off the loop.
+            response = await asyncio.to_thread(
+                self._run_responder,
                 user_text,
-                history_strings,
+                history,
                 evaluation,
                 router_result,
                 skill_output,
                 session_id,
+                on_token=on_token,
+                deadline=deadline,
             )
         except Exception as exc:  # pragma: no cover - defensive
             self.logger.exception("Responder step failed: %s", exc)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import logging
 from pathlib import Path
-from typing import Dict
+from typing import Callable, Dict, List
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +10,8 @@ PROMPT_FILES: Dict[str, str] = {
     "evaluator_system": "evaluator_system.txt",
     "router_system": "router_system.txt",
     "responder_system": "responder_system.txt",
+    "triage_system": "triage_system.txt",
+    "summarizer_system": "summarizer_system.txt",
     "skill_summaries": "skill_summaries.txt",
 }
 
@@ -22,6 +24,7 @@ class PromptLoader:
         self.reload_enabled = reload_enabled
         self.cache: Dict[str, str] = {}
         self.mtimes: Dict[str, float] = {}
+        self.listeners: List[Callable[[str], None]] = []
         self.prompts_dir.mkdir(parents=True, exist_ok=True)
         self._load_all()
 
@@ -42,6 +45,10 @@ class PromptLoader:
             self.cache[name] = ""
             self.mtimes[name] = 0.0
 
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """Call callback(name) whenever a hot-reloaded prompt's content changes."""
+        self.listeners.append(callback)
+
     def _load_all(self) -> None:
         for name in PROMPT_FILES:
             self._load_prompt(name)
@@ -54,6 +61,10 @@ class PromptLoader:
             except FileNotFoundError:
                 current_mtime = 0.0
             if current_mtime != self.mtimes.get(name):
+                previous = self.cache.get(name)
                 self._load_prompt(name)
+                if self.cache.get(name) != previous:
+                    for callback in self.listeners:
+                        callback(name)
         return self.cache.get(name, "")
 
@@ -27,10 +27,10 @@ class Router:
 
         for intent, handler in self.intent_map.items():
             if lowered.startswith(intent):
-                return handler(normalized)
+                return str(handler(normalized))
 
         if "timer" in lowered or "countdown" in lowered:
-            return timer_skill(normalized)
+            return str(timer_skill(normalized))
 
         history_limit = self.llm_config.get("history_messages", 6)
         recent_db_messages = self.memory.recent_messages(limit=history_limit)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from orja.agents.summarizer import SummarizerAgent
+from orja.core.context import summary_message
+from orja.memory.db import MemoryStore, Message, SessionSummary
+
+logger = logging.getLogger(__name__)
+
+# Same signature as Pipeline._record_event.
+EventRecorder = Callable[..., None]
+
+
+class SummaryMemory:
+    """Per-session running summaries that replace older history in prompts.
+
+    with_summary() is the read side, used on the reply path: it swaps every
+    message the stored summary covers for one summary entry, so prompts stay
+    the same size however long the session gets. The write side runs on a
+    daemon thread: schedule() marks a session after a turn, and once the
+    pipeline has been idle for ``idle_sec`` the thread folds uncovered
+    messages into the summary, ``max_batch`` at a time, always leaving the
+    latest ``keep_recent`` messages raw and waiting for ``min_new_messages``
+    before spending an LLM call. A request arriving in between stops the
+    refresh until the next idle spell; nothing on the reply path waits for it.
+    """
+
+    def __init__(
+        self,
+        memory: MemoryStore,
+        summarizer: SummarizerAgent,
+        idle_for: Callable[[], float],
+        *,
+        record_event: Optional[EventRecorder] = None,
+        idle_sec: float = 5.0,
+        keep_recent: int = 6,
+        min_new_messages: int = 4,
+        max_batch: int = 12,
+        timeout_sec: float = 20.0,
+        max_sessions: int = 32,
+    ) -> None:
+        self.memory = memory
+        self.summarizer = summarizer
+        self.idle_for = idle_for
+        self.record_event = record_event
+        self.idle_sec = max(0.0, idle_sec)
+        self.keep_recent = max(1, keep_recent)
+        self.min_new_messages = max(1, min_new_messages)
+        self.max_batch = max(self.min_new_messages, max_batch)
+        self.timeout_sec = timeout_sec
+        self.max_sessions = max(1, max_sessions)
+        self.refreshes = 0
+        self._summaries: "OrderedDict[str, Optional[SessionSummary]]" = OrderedDict()
+        self._pending: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="orja-summary", daemon=True)
+        self._thread.start()
+
+    # -- read side ------------------------------------------------------------
+
+    def summary(self, session_id: str) -> Optional[SessionSummary]:
+        with self._lock:
+            if session_id in self._summaries:
+                self._summaries.move_to_end(session_id)
+                return self._summaries[session_id]
+        loaded = self.memory.session_summary(session_id)
+        self._remember(session_id, loaded)
+        return loaded
+
+    def _remember(self, session_id: str, summary: Optional[SessionSummary]) -> None:
+        with self._lock:
+            self._summaries[session_id] = summary
+            self._summaries.move_to_end(session_id)
+            while len(self._summaries) > self.max_sessions:
+                self._summaries.popitem(last=False)
+
+    def with_summary(self, session_id: str, history: List[Message]) -> List[Message]:
+        """history (oldest first) with covered messages replaced by the summary entry."""
+        summary = self.summary(session_id)
+        if summary is None:
+            return history
+        return [summary_message(summary)] + [message for message in history if message.id > summary.covered_message_id]
+
+    # -- write side -----------------------------------------------------------
+
+    def schedule(self, session_id: str) -> None:
+        """Refresh this session's summary at the next idle spell."""
+        with self._lock:
+            self._pending[session_id] = None
+        self._wake.set()
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def _idle(self) -> bool:
+        return not self._stop.is_set() and self.idle_for() >= self.idle_sec
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait()
+            if self._stop.is_set():
+                return
+            # Let the reply finish and the user settle before using the model.
+            while not self._idle():
+                if self._stop.wait(max(0.5, self.idle_sec - self.idle_for())):
+                    return
+            with self._lock:
+                if not self._pending:
+                    self._wake.clear()
+                    continue
+                session_id = next(iter(self._pending))
+            try:
+                finished = self._refresh(session_id)
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.warning("Summary refresh for %s failed: %s", session_id, exc)
+                finished = True
+            if finished:
+                with self._lock:
+                    self._pending.pop(session_id, None)
+
+    def _refresh(self, session_id: str) -> bool:
+        """Fold uncovered messages into the summary; False if interrupted by a request."""
+        while self._idle():
+            current = self.summary(session_id)
+            covered = current.covered_message_id if current else 0
+            uncovered = self.memory.session_messages_after(session_id, covered, self.max_batch + self.keep_recent)
+            batch = uncovered[: max(0, len(uncovered) - self.keep_recent)][: self.max_batch]
+            if len(batch) < self.min_new_messages:
+                return True
+            usage: Dict[str, Any] = {}
+            start = time.perf_counter()
+            text = self.summarizer.run(
+                current.summary if current else None, batch, usage=usage, timeout=self.timeout_sec
+            )
+            latency_ms = (time.perf_counter() - start) * 1000
+            usage.update({"new_messages": len(batch), "covered_message_id": batch[-1].id})
+            if self.record_event is not None:
+                self.record_event(
+                    session_id,
+                    "summarizer",
+                    f"{len(batch)} messages after id {covered}",
+                    text or "",
+                    text is not None,
+                    latency_ms,
+                    metrics=usage,
+                )
+            if text is None:
+                return True  # retried after the next turn
+            saved = self.memory.save_session_summary(session_id, text, batch[-1].id, datetime.now(timezone.utc))
+            self._remember(session_id, saved)
+            self.refreshes += 1
+            logger.debug("Summarised %d messages of %s in %.0f ms", len(batch), session_id, latency_ms)
+        return False
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from orja.llm.http import HttpStatusError
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean a kept-alive socket was closed by the peer while idle.
+_STALE_CONNECTION_ERRORS = (
+    asyncio.IncompleteReadError,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+_Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncHttpConnectionPool:
+    """asyncio counterpart of HttpConnectionPool for JSON requests.
+
+    Speaks just enough HTTP/1.1 for llama-server (Content-Length or chunked
+    bodies, keep-alive). Connections belong to the event loop that opened
+    them, so one pool must only be used from a single loop.
+    """
+
+    def __init__(self, host: str, port: int, *, timeout: float = 45.0, max_idle: int = 4) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.healthy: Optional[bool] = None
+        self.last_ok: Optional[float] = None
+        self.consecutive_failures = 0
+        self.connects = 0
+        self._idle: List[_Connection] = []
+
+    async def _acquire(self, timeout: float) -> Tuple[_Connection, bool]:
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return (reader, writer), True
+            writer.close()
+        self.connects += 1
+        connection = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), timeout)
+        return connection, False
+
+    def _release(self, connection: _Connection, keep_alive: bool) -> None:
+        if keep_alive and len(self._idle) < self.max_idle:
+            self._idle.append(connection)
+        else:
+            connection[1].close()
+
+    def _mark_ok(self) -> None:
+        self.healthy = True
+        self.last_ok = time.monotonic()
+        self.consecutive_failures = 0
+
+    def _mark_failed(self) -> None:
+        self.healthy = False
+        self.consecutive_failures += 1
+
+    def _encode_request(self, method: str, path: str, body: Optional[bytes]) -> bytes:
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Accept: application/json",
+            "Connection: keep-alive",
+        ]
+        if body is not None:
+            lines += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, str, bytes, bool]:
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before response")
+        parts = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        status = int(parts[1])
+        reason = parts[2] if len(parts) > 2 else ""
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    # Skip optional trailers up to the terminating blank line.
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            headers["connection"] = "close"
+        keep_alive = headers.get("connection", "").lower() != "close"
+        return status, reason, body, keep_alive
+
+    async def request_json(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        *,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Send a request and decode the JSON response body."""
+        timeout = timeout or self.timeout
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = self._encode_request(method, path, body)
+        for attempt in range(2):
+            try:
+                connection, reused = await self._acquire(timeout)
+            except OSError as exc:
+                self._mark_failed()
+                raise ConnectionError(f"Connection to {self.host}:{self.port} failed: {exc}") from exc
+            reader, writer = connection
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, reason, raw, keep_alive = await asyncio.wait_for(
+                    self._read_response(reader), timeout
+                )
+            except _STALE_CONNECTION_ERRORS as exc:
+                writer.close()
+                if reused and attempt == 0:
+                    logger.debug("Stale keep-alive connection to %s:%s, reconnecting", self.host, self.port)
+                    continue
+                self._mark_failed()
+                raise ConnectionError(f"Connection to {self.host}:{self.port} failed: {exc}") from exc
+            except (OSError, asyncio.TimeoutError):
+                writer.close()
+                self._mark_failed()
+                raise
+            self._mark_ok()
+            self._release(connection, keep_alive)
+            text = raw.decode("utf-8", errors="replace")
+            if status >= 400:
+                raise HttpStatusError(status, reason, text)
+            return json.loads(text) if text else None
+        raise ConnectionError(f"Connection to {self.host}:{self.port} failed")  # pragma: no cover
+
+    def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import codecs
+import logging
+import os
+import queue
+import signal
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Passed as --in-prefix: llama-cli prints it every time it hands control back
+# for input, which frames the end of each completion on stdout. It is also
+# prepended to the next prompt, where a ChatML end marker is harmless.
+FRAME_MARKER = "<|im_end|>\n"
+
+_EOF = object()
+
+
+class LlamaCliWorker:
+    """One long-lived interactive llama-cli process.
+
+    Prompts are written to stdin (multi-line input is joined with llama-cli's
+    trailing-backslash continuation) and completions are read from stdout up
+    to the next FRAME_MARKER. The model stays loaded between calls.
+
+    An interactive session keeps every turn in its context, and llama-cli
+    has no way to clear it in place. By default the process is recycled once
+    ``recycle_chars`` of prompts and output have gone through it, so earlier
+    turns can colour later completions until then. With ``reset_context``
+    the process is replaced after every call instead (a fresh one is started
+    on a background thread): no context carries over, but the model is
+    reloaded for each completion, which only pays off when calls are sparse.
+    """
+
+    def __init__(
+        self,
+        cmd: List[str],
+        *,
+        startup_timeout: float,
+        recycle_chars: int,
+        reset_context: bool = False,
+    ) -> None:
+        self.cmd = cmd
+        self.startup_timeout = startup_timeout
+        self.recycle_chars = recycle_chars
+        self.reset_context = reset_context
+        self.closed = False
+        self.proc: Optional[subprocess.Popen] = None
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.last_used = 0.0
+        self._chunks: "queue.Queue[object]" = queue.Queue()
+        self._buffer = ""
+        self._used_chars = 0
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self) -> None:
+        self.stop()
+        started = time.perf_counter()
+        self.proc = subprocess.Popen(
+            self.cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+        self._chunks = queue.Queue()
+        self._buffer = ""
+        self._used_chars = 0
+        threading.Thread(target=self._read_stdout, args=(self.proc, self._chunks), daemon=True).start()
+        threading.Thread(target=self._drain_stderr, args=(self.proc,), daemon=True).start()
+        # The first marker is printed once the model is loaded and input is awaited.
+        try:
+            for _ in self._read_until_marker(self.startup_timeout):
+                pass
+        except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
+            self.stop()
+            raise
+        logger.info(
+            "llama-cli worker pid=%s ready in %.1f ms",
+            self.proc.pid,
+            (time.perf_counter() - started) * 1000,
+        )
+
+    def _interrupt(self, timeout: float = 2.0) -> bool:
+        """Stop the generation in progress and wait for llama-cli to ask for input again.
+
+        llama-cli returns to interactive input on SIGINT, keeping the model
+        loaded. If that does not happen within timeout the process is stopped.
+        """
+        if not self.alive() or os.name != "posix":
+            self.stop()
+            return False
+        try:
+            self.proc.send_signal(signal.SIGINT)
+            for _ in self._read_until_marker(timeout):
+                pass
+        except (OSError, subprocess.TimeoutExpired, subprocess.CalledProcessError):
+            self.stop()
+            return False
+        return True
+
+    def restart_in_background(self) -> None:
+        """Start a fresh process on a thread so the next call finds it loaded."""
+
+        def run() -> None:
+            with self.lock:
+                if self.closed or self.alive():
+                    return
+                try:
+                    self.start()
+                except (OSError, subprocess.SubprocessError) as exc:
+                    logger.warning("llama-cli worker restart failed: %s", exc)
+                    return
+                if self.closed:
+                    self.stop()
+
+        threading.Thread(target=run, name="orja-llama-cli-restart", daemon=True).start()
+
+    def close(self) -> None:
+        self.closed = True
+        self.stop()
+
+    def stop(self) -> None:
+        proc, self.proc = self.proc, None
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            if proc.stdin:
+                proc.stdin.close()
+            proc.terminate()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+    @staticmethod
+    def _read_stdout(proc: subprocess.Popen, sink: "queue.Queue[object]") -> None:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        fd = proc.stdout.fileno()
+        while True:
+            try:
+                data = os.read(fd, 4096)
+            except OSError:
+                data = b""
+            if not data:
+                sink.put(_EOF)
+                return
+            text = decoder.decode(data)
+            if text:
+                sink.put(text)
+
+    @staticmethod
+    def _drain_stderr(proc: subprocess.Popen) -> None:
+        for raw_line in iter(proc.stderr.readline, b""):
+            logger.debug("llama-cli[%s]: %s", proc.pid, raw_line.decode("utf-8", "replace").rstrip())
+
+    def _read_until_marker(self, timeout: float) -> Iterator[str]:
+        deadline = time.monotonic() + timeout
+        keep = len(FRAME_MARKER) - 1
+        while True:
+            index = self._buffer.find(FRAME_MARKER)
+            if index != -1:
+                text, self._buffer = self._buffer[:index], self._buffer[index + len(FRAME_MARKER) :]
+                if text:
+                    yield text
+                return
+            if len(self._buffer) > keep:
+                text, self._buffer = self._buffer[:-keep], self._buffer[-keep:]
+                yield text
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(self.cmd, timeout)
+            try:
+                chunk = self._chunks.get(timeout=remaining)
+            except queue.Empty:
+                raise subprocess.TimeoutExpired(self.cmd, timeout) from None
+            if chunk is _EOF:
+                code = None
+                if self.proc is not None:
+                    try:
+                        code = self.proc.wait(timeout=1)
+                    except subprocess.TimeoutExpired:
+                        pass
+                raise subprocess.CalledProcessError(code if code is not None else -1, self.cmd)
+            self._buffer += chunk
+
+    @staticmethod
+    def _frame_input(prompt: str) -> bytes:
+        lines = prompt.rstrip("\n").split("\n")
+        framed = []
+        for line in lines:
+            # A trailing "\" or "/" is a control character for llama-cli input.
+            if line.endswith(("\\", "/")):
+                line += " "
+            framed.append(line)
+        return ("\\\n".join(framed) + "\n").encode("utf-8")
+
+    def complete(self, prompt: str, *, timeout: float, max_tokens: Optional[int] = None) -> Iterator[str]:
+        """Send one prompt and yield output chunks until control returns.
+
+        The process runs with a generous --n-predict; max_tokens caps this
+        call, estimated at four characters per token (llama-cli reports no
+        token counts). Hitting the cap, or the caller stopping early,
+        interrupts the generation in place.
+        """
+        if not self.alive():
+            self.start()
+        self.calls += 1
+        self.last_used = time.monotonic()
+        try:
+            self.proc.stdin.write(self._frame_input(prompt))
+            self.proc.stdin.flush()
+        except OSError as exc:
+            self.stop()
+            raise subprocess.CalledProcessError(-1, self.cmd, stderr=str(exc)) from exc
+        limit = max_tokens * 4 if max_tokens and max_tokens > 0 else None
+        produced = 0
+        capped = False
+        try:
+            for text in self._read_until_marker(timeout):
+                if limit is not None and produced + len(text) >= limit:
+                    text, capped = text[: limit - produced], True
+                produced += len(text)
+                if text:
+                    yield text
+                if capped:
+                    break
+        except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
+            self.stop()
+            raise
+        except GeneratorExit:
+            # Caller stopped early; the rest of this turn would corrupt framing.
+            self._interrupt()
+            raise
+        if capped:
+            logger.debug("llama-cli worker hit the %s token cap", max_tokens)
+            self._interrupt()
+        self._used_chars += len(prompt) + produced
+        if self.reset_context:
+            logger.debug("Replacing llama-cli worker after call %s", self.calls)
+            self.stop()
+            # The next call takes the lock first if it comes sooner; then the
+            # restart finds the process alive and does nothing.
+            self.restart_in_background()
+        elif self._used_chars >= self.recycle_chars:
+            # Start fresh before the context fills up rather than relying on context shifting.
+            logger.debug("Recycling llama-cli worker after %s calls", self.calls)
+            self.stop()
+
+
+class LlamaCliWorkerPool:
+    """Keeps a few llama-cli workers alive, one per profile.
+
+    Grammar and the remaining fixed sampling flags are set per llama-cli
+    process, so each distinct profile gets its own worker; the least recently
+    used one is stopped when more than max_workers profiles are in use. The
+    token cap is not part of the profile: it is enforced per call (see
+    LlamaCliWorker.complete), so a shrinking budget does not spawn processes.
+    """
+
+    def __init__(
+        self,
+        build_cmd: Callable[[Hashable], List[str]],
+        *,
+        max_workers: int = 4,
+        startup_timeout: float = 60.0,
+        recycle_chars: int = 5000,
+        reset_context: bool = False,
+    ) -> None:
+        self.build_cmd = build_cmd
+        self.max_workers = max(1, max_workers)
+        self.startup_timeout = startup_timeout
+        self.recycle_chars = recycle_chars
+        self.reset_context = reset_context
+        self.workers: "OrderedDict[Hashable, LlamaCliWorker]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _worker_for(self, profile: Hashable) -> LlamaCliWorker:
+        with self._lock:
+            worker = self.workers.get(profile)
+            if worker is None:
+                worker = LlamaCliWorker(
+                    self.build_cmd(profile),
+                    startup_timeout=self.startup_timeout,
+                    recycle_chars=self.recycle_chars,
+                    reset_context=self.reset_context,
+                )
+                self.workers[profile] = worker
+            self.workers.move_to_end(profile)
+            # Evict least recently used idle workers; busy ones are left alone.
+            for key in list(self.workers)[:-1]:
+                if len(self.workers) <= self.max_workers:
+                    break
+                candidate = self.workers[key]
+                if candidate.lock.acquire(blocking=False):
+                    try:
+                        candidate.close()
+                    finally:
+                        candidate.lock.release()
+                    del self.workers[key]
+            return worker
+
+    def complete(
+        self, profile: Hashable, prompt: str, *, timeout: float, max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        """Yield completion chunks from the worker for this profile.
+
+        A worker that died before producing output is restarted once.
+        """
+        worker = self._worker_for(profile)
+        with worker.lock:
+            for attempt in range(2):
+                produced = False
+                try:
+                    for text in worker.complete(prompt, timeout=timeout, max_tokens=max_tokens):
+                        produced = True
+                        yield text
+                    return
+                except subprocess.CalledProcessError as exc:
+                    if produced or attempt == 1:
+                        raise
+                    logger.warning("llama-cli worker exited (%s), restarting", exc.returncode)
+
+    def close(self) -> None:
+        with self._lock:
+            workers = list(self.workers.values())
+            self.workers.clear()
+        for worker in workers:
+            worker.close()
@@ -1,30 +1,98 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import functools
 import logging
-import socket
 import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from urllib import error, request
-
-from orja.llm.provider import ChatMessage, LLMProvider
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from orja.core.context import ContextBuilder
+from orja.llm.backends.llama_cli_worker import FRAME_MARKER, LlamaCliWorkerPool
+from orja.llm.backends.slots import SlotAffinity, completion_usage
+from orja.llm.backends.server_pool import LlamaServerPool, ServerInstance
+from orja.llm.grammar import GENERIC_JSON_GRAMMAR, schema_to_gbnf
+from orja.llm.http import HttpStatusError
+from orja.llm.provider import (
+    ChatMessage,
+    GenerationRequest,
+    GenerationResult,
+    LLMProvider,
+    batch_usage,
+    estimate_tokens,
+)
 
 logger = logging.getLogger(__name__)
 
+CHATML_STOP_MARKERS = ("<|im_end|>", "<|im_start|>")
+# /tokenize is only used for budgeting, so a slow answer falls back to estimate_tokens.
+TOKENIZE_TIMEOUT_SEC = 2.0
+
+
+class ChatMLStreamFilter:
+    """Incrementally strips ChatML stop markers and surrounding whitespace.
+
+    Produces the same text as the non-streaming cleanup (cut at the first
+    marker, then strip) while holding back only what might still turn into
+    a marker or trailing whitespace.
+    """
+
+    def __init__(self, markers: tuple = CHATML_STOP_MARKERS) -> None:
+        self.markers = markers
+        self.stopped = False
+        self._pending = ""
+        self._started = False
+
+    def _held_back(self, text: str) -> int:
+        """Length of the longest suffix of text that is a prefix of a marker."""
+        longest = 0
+        for marker in self.markers:
+            for size in range(min(len(marker) - 1, len(text)), longest, -1):
+                if marker.startswith(text[-size:]):
+                    longest = size
+                    break
+        return longest
+
+    def feed(self, chunk: str) -> str:
+        if self.stopped or not chunk:
+            return ""
+        text = self._pending + chunk
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                self._pending = ""
+                return ""
+            self._started = True
+
+        cut = min((text.find(m) for m in self.markers if m in text), default=-1)
+        if cut != -1:
+            self.stopped = True
+            self._pending = ""
+            return text[:cut].rstrip()
+
+        keep = self._held_back(text)
+        ready, tail = (text[:-keep], text[-keep:]) if keep else (text, "")
+        stripped = ready.rstrip()
+        self._pending = ready[len(stripped) :] + tail
+        return stripped
+
+    def flush(self) -> str:
+        """Return held-back text once the stream has ended."""
+        if self.stopped:
+            return ""
+        text, self._pending = self._pending, ""
+        return text.rstrip()
+
 
 class LlamaCppCliProvider(LLMProvider):
     """LLM provider that uses llama.cpp CLI via subprocess."""
 
-    _server_proc: Optional[subprocess.Popen] = None
-    _server_host: str = "127.0.0.1"
-    _server_port: int = 8080
-
     def __init__(self, config: Dict[str, Any]) -> None:
         self.llama_config = config.get("llama_cpp", {})
         self.system_prompt = config.get("system_prompt", "")
-        self.history_messages = config.get("history_messages", 6)
 
         # Extract llama.cpp parameters
         self.bin_path = Path(self.llama_config.get("bin_path", ""))
@@ -37,6 +105,7 @@ class LlamaCppCliProvider(LLMProvider):
         self.repeat_penalty = self.llama_config.get("repeat_penalty", 1.1)
         self.batch_size = self.llama_config.get("batch_size", 256)
         self.timeout_sec = self.llama_config.get("timeout_sec", 45)
+        self.grammar_enabled = self.llama_config.get("grammar", True)
         self.server_enabled = self.llama_config.get("server", {}).get("enabled", False)
         self.server_host = self.llama_config.get("server", {}).get("host", "127.0.0.1")
         self.server_port = int(self.llama_config.get("server", {}).get("port", 8080))
@@ -44,9 +113,127 @@ class LlamaCppCliProvider(LLMProvider):
             self.llama_config.get("server_bin_path")
             or self.bin_path.parent / "llama-server"
         )
+        server_config = self.llama_config.get("server", {})
+        self.cache_prompt = server_config.get("cache_prompt", True)
+        self.slots = SlotAffinity(server_config.get("slots") or [])
+        self.server_instances = max(1, int(server_config.get("instances", 1)))
+        self.server_managed = server_config.get("managed", True)
+        self.server_background_start = server_config.get("background_start", True)
+        self.server_autostart = server_config.get("autostart", True)
+        self.server_prime = server_config.get("prime", True)
+        self._servers = LlamaServerPool.from_port_range(
+            self.server_host,
+            self.server_port,
+            self.server_instances,
+            threads=int(
+                server_config.get("threads_per_instance")
+                or max(1, self.threads // self.server_instances)
+            ),
+            timeout=self.timeout_sec,
+            capacity=self.slots.parallel,
+            build_cmd=self._server_cmd if self.server_managed else None,
+            restart=server_config.get("restart"),
+        )
+
+        embedding_config = self.llama_config.get("embedding", {})
+        self.embedding_enabled = embedding_config.get("enabled", False)
+        self.embedding_model_path = Path(embedding_config.get("model_path") or self.model_path)
+        self._embedder = LlamaServerPool.from_port_range(
+            embedding_config.get("host", self.server_host),
+            int(embedding_config.get("port", 8091)),
+            1,
+            threads=int(embedding_config.get("threads", 1)),
+            timeout=self.timeout_sec,
+            capacity=1,
+            # Started on first use, only if nothing is listening yet.
+            build_cmd=self._embedding_server_cmd if embedding_config.get("managed", True) else None,
+            restart=server_config.get("restart"),
+        )
+
+        worker_config = self.llama_config.get("cli_worker", {})
+        self.cli_worker_enabled = worker_config.get("enabled", True)
+        self.cli_worker_args = list(worker_config.get("extra_args") or [])
+        self._cli_workers = LlamaCliWorkerPool(
+            self._cli_worker_cmd,
+            max_workers=int(worker_config.get("max_workers", 4)),
+            startup_timeout=float(worker_config.get("startup_timeout_sec", 60)),
+            recycle_chars=int(worker_config.get("recycle_chars", 5000)),
+            reset_context=bool(worker_config.get("reset_context", False)),
+        )
 
-        if self.server_enabled:
-            self._ensure_server()
+        self.context = ContextBuilder(self)
+
+        if self.server_enabled and self.server_autostart:
+            self.start_servers()
+
+    def start_servers(self) -> None:
+        """Launch (or connect to) the llama-server pool for this model."""
+        if self.server_background_start:
+            # Requests issued before the model is loaded wait on the pool's ready_future.
+            self._servers.start_in_background()
+        else:
+            self._servers.start_all()
+
+    def wait_servers_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait for background llama-server startup; False if it failed or is still loading."""
+        return self._servers.wait_ready(timeout)
+
+    def stop_servers(self) -> None:
+        """Terminate the llama-server processes this provider launched."""
+        self._servers.stop()
+
+    @property
+    def server_in_flight(self) -> int:
+        return sum(instance.in_flight for instance in self._servers.instances)
+
+    def _call_timeout(self, timeout: Optional[float]) -> float:
+        """Seconds one call may take: timeout_sec, capped by the caller's remaining deadline."""
+        return self.timeout_sec if timeout is None else min(self.timeout_sec, timeout)
+
+    @staticmethod
+    def _time_left(expires: float) -> float:
+        """Request timeout for what is left of a call after queueing for a slot."""
+        return max(0.05, expires - time.monotonic())
+
+    def count_tokens(self, text: str) -> int:
+        """Exact count from llama-server's tokenizer; estimated without a ready server."""
+        if not text or not self.server_enabled:
+            return estimate_tokens(text)
+        if not self._servers.wait_ready(0):
+            return estimate_tokens(text)
+        try:
+            body = self._servers.request_json(
+                "POST", "/tokenize", {"content": text, "add_special": False}, timeout=TOKENIZE_TIMEOUT_SEC
+            )
+            return len(body.get("tokens") or [])
+        except (OSError, ValueError, HttpStatusError) as err:
+            logger.debug("Tokenize failed (%s), estimating token count", err)
+            return estimate_tokens(text)
+
+    @property
+    def model_name(self) -> str:
+        return str(self.model_path)
+
+    def render_prompt(
+        self,
+        messages: List[ChatMessage],
+        *,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        return self._fit_prompt(
+            messages, system_prompt, max_tokens if max_tokens is not None else self.max_tokens
+        )
+
+    def _fit_prompt(
+        self, messages: List[ChatMessage], system_prompt: Optional[str], max_tokens: int
+    ) -> str:
+        """ChatML prompt with the oldest messages dropped until it fits the context window."""
+        applied_system = system_prompt if system_prompt is not None else self.system_prompt
+        recent_messages = self.context.fit_messages(
+            messages, system_prompt=applied_system, budget=self.ctx_size - max_tokens
+        )
+        return self._build_prompt(recent_messages, system_prompt=applied_system)
 
     def _build_prompt(
         self, messages: List[ChatMessage], *, system_prompt: Optional[str] = None
@@ -65,7 +252,18 @@ class LlamaCppCliProvider(LLMProvider):
         conversation += "<|im_start|>assistant\n"
         return system_msg + conversation
 
-    def _run_llama_cli(self, prompt: str, *, max_tokens: int, temperature: float, top_p: float, repeat_penalty: float) -> str:
+    def _run_llama_cli(
+        self,
+        prompt: str,
+        *,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        repeat_penalty: float,
+        grammar: Optional[str] = None,
+        stop: Sequence[str] = (),
+        timeout: Optional[float] = None,
+    ) -> str:
         """Run llama-cli with the given prompt and return response."""
         if not self.bin_path.exists():
             raise FileNotFoundError(f"llama-cli binary not found at: {self.bin_path}")
@@ -94,14 +292,16 @@ class LlamaCppCliProvider(LLMProvider):
             str(self.batch_size),
             "--simple-io",
         ]
+        if grammar:
+            cmd += ["--grammar", grammar]
 
-        logger.debug("Running llama-cli command: %s", " ".join(cmd[:-1]) + " --simple-io")
+        logger.debug("Running llama-cli command: %s", " ".join(cmd[:5]) + " ...")
 
         result = subprocess.run(
             cmd,
             capture_output=True,
             text=True,
-            timeout=self.timeout_sec,
+            timeout=self._call_timeout(timeout),
         )
 
         if result.returncode != 0:
@@ -113,70 +313,187 @@ class LlamaCppCliProvider(LLMProvider):
 
         return result.stdout.strip()
 
-    def _ensure_server(self) -> None:
-        """Start llama-server if not already running."""
-        # If already running and reachable, keep it.
-        if self._server_proc and self._server_proc.poll() is None:
-            if self._server_ready():
-                return
+    def _cli_worker_cmd(self, profile: tuple) -> List[str]:
+        """Command line for an interactive llama-cli worker with fixed sampling.
+
+        --n-predict is only a ceiling; each call's max_tokens is enforced by the worker.
+        """
+        temperature, top_p, repeat_penalty, grammar = profile
+        cmd = [
+            str(self.bin_path),
+            "--model",
+            str(self.model_path),
+            "--threads",
+            str(self.threads),
+            "--ctx-size",
+            str(self.ctx_size),
+            "--n-predict",
+            str(self.ctx_size),
+            "--temp",
+            str(temperature),
+            "--top-p",
+            str(top_p),
+            "--repeat-penalty",
+            str(repeat_penalty),
+            "--batch-size",
+            str(self.batch_size),
+            "--simple-io",
+            "--interactive-first",
+            "--in-prefix",
+            FRAME_MARKER,
+            *self.cli_worker_args,
+        ]
+        if grammar:
+            cmd += ["--grammar", grammar]
+        return cmd
+
+    def _stream_cli_worker(
+        self,
+        prompt: str,
+        *,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        repeat_penalty: float,
+        grammar: Optional[str] = None,
+        stop: Sequence[str] = (),
+        timeout: Optional[float] = None,
+    ) -> Iterator[str]:
+        """Run the prompt on a persistent llama-cli worker, yielding output chunks.
+
+        stop is not passed on; worker output is cut at the ChatML markers by the callers.
+        max_tokens is enforced per call, so it is not part of the worker profile;
+        the agents' fixed temperatures are, adding at most a few workers.
+        """
+        if not self.bin_path.exists():
+            raise FileNotFoundError(f"llama-cli binary not found at: {self.bin_path}")
+        if not self.model_path.exists():
+            raise FileNotFoundError(f"Model file not found at: {self.model_path}")
+        profile = (temperature, top_p, repeat_penalty, grammar)
+        return self._cli_workers.complete(
+            profile, prompt, timeout=self._call_timeout(timeout), max_tokens=max_tokens
+        )
 
+    def _server_cmd(self, instance: ServerInstance) -> List[str]:
+        """Command line for one llama-server instance of the pool."""
         if not self.server_bin_path.exists():
             raise FileNotFoundError(
                 f"llama-server binary not found at: {self.server_bin_path}"
             )
         if not self.model_path.exists():
             raise FileNotFoundError(f"Model file not found at: {self.model_path}")
-
-        cmd = [
+        return [
             str(self.server_bin_path),
             "--model",
             str(self.model_path),
             "--host",
-            self.server_host,
+            instance.host,
             "--port",
-            str(self.server_port),
+            str(instance.port),
+            # The server splits its context evenly across slots, so scale it
+            # up to give every slot the configured ctx_size.
             "--ctx-size",
-            str(self.ctx_size),
+            str(self.ctx_size * self.slots.parallel),
+            "--parallel",
+            str(self.slots.parallel),
             "--threads",
-            str(self.threads),
+            str(instance.threads),
             "--batch-size",
             str(self.batch_size),
         ]
 
+    def _embedding_server_cmd(self, instance: ServerInstance) -> List[str]:
+        """Command line for the separate embedding-only llama-server."""
+        if not self.server_bin_path.exists():
+            raise FileNotFoundError(
+                f"llama-server binary not found at: {self.server_bin_path}"
+            )
+        if not self.embedding_model_path.exists():
+            raise FileNotFoundError(f"Embedding model not found at: {self.embedding_model_path}")
+        return [
+            str(self.server_bin_path),
+            "--model",
+            str(self.embedding_model_path),
+            "--host",
+            instance.host,
+            "--port",
+            str(instance.port),
+            "--embeddings",
+            "--pooling",
+            "mean",
+            "--ctx-size",
+            "512",
+            "--threads",
+            str(instance.threads),
+        ]
+
+    def embed(self, text: str) -> Optional[List[float]]:
+        """Pooled embedding from the embedding llama-server; None if disabled or failing."""
+        if not self.embedding_enabled or not text:
+            return None
+
+        def send(instance: ServerInstance) -> Any:
+            return instance.client.request_json("POST", "/embedding", {"content": text})
+
+        try:
+            body = self._embedder.call(send)
+        except (OSError, ValueError, TimeoutError, HttpStatusError) as err:
+            logger.warning("Embedding request failed: %s", err)
+            return None
+        # Newer servers answer with a list of {"index", "embedding"} objects.
+        if isinstance(body, list):
+            body = body[0] if body else {}
+        vector = body.get("embedding") or []
+        if vector and isinstance(vector[0], list):
+            vector = vector[0]
+        return [float(value) for value in vector] or None
+
+    def warm_up(self, system_prompts: Dict[str, str]) -> None:
+        """Prefill each family's system prompt into its pinned slot once the servers are up.
+
+        Runs on a daemon thread so startup never blocks on it.
+        """
+        if not (self.server_enabled and self.server_prime and self.cache_prompt):
+            return
+        threading.Thread(
+            target=self._prime_slots, args=(dict(system_prompts),), name="llama-server-prime", daemon=True
+        ).start()
+
+    def _prime_slots(self, system_prompts: Dict[str, str]) -> None:
+        if not self._servers.wait_ready():
+            return
+        started = time.perf_counter()
+        for instance in self._servers.instances:
+            for prompt_key, system_prompt in system_prompts.items():
+                payload = self._completion_payload(
+                    self._build_prompt([], system_prompt=system_prompt),
+                    max_tokens=1,
+                    temperature=0.0,
+                    top_p=1.0,
+                    repeat_penalty=1.0,
+                    stream=False,
+                    prompt_key=prompt_key,
+                    grammar=None,
+                )
+                try:
+                    body = instance.client.request_json("POST", "/completion", payload)
+                except (OSError, ValueError, HttpStatusError) as err:
+                    logger.warning("Priming %s on %s failed: %s", prompt_key, instance.name, err)
+                    continue
+                evaluated = body.get("tokens_evaluated") if isinstance(body, dict) else None
+                logger.debug("Primed %s on %s (%s tokens)", prompt_key, instance.name, evaluated)
         logger.info(
-            "Starting llama-server on %s:%s using model %s",
-            self.server_host,
-            self.server_port,
-            self.model_path,
-        )
-        self._server_proc = subprocess.Popen(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
-        self._server_host = self.server_host
-        self._server_port = self.server_port
-
-        # Wait for server to be ready
-        start = time.time()
-        while time.time() - start < self.timeout_sec:
-            if self._server_ready():
-                logger.info("llama-server is ready at %s:%s", self.server_host, self.server_port)
-                return
-            time.sleep(0.5)
-
-        raise TimeoutError(
-            f"llama-server did not become ready within {self.timeout_sec} seconds"
+            "Primed %d prompt families on %d llama-server instance(s) in %.1f ms",
+            len(system_prompts),
+            len(self._servers.instances),
+            (time.perf_counter() - started) * 1000,
         )
 
-    def _server_ready(self) -> bool:
-        try:
-            with socket.create_connection(
-                (self.server_host, self.server_port), timeout=1
-            ):
-                return True
-        except OSError:
-            return False
+    def server_stats(self) -> List[Dict[str, Any]]:
+        """Per-instance queue depth, throughput and queue time."""
+        return self._servers.stats()
 
-    def _run_server_completion(
+    def _completion_payload(
         self,
         prompt: str,
         *,
@@ -184,42 +501,238 @@ class LlamaCppCliProvider(LLMProvider):
         temperature: float,
         top_p: float,
         repeat_penalty: float,
-    ) -> str:
-        """Send completion request to llama-server."""
-        if not self._server_ready():
-            self._ensure_server()
-
-        url = f"http://{self.server_host}:{self.server_port}/completion"
+        stream: bool,
+        prompt_key: Optional[str],
+        grammar: Optional[str],
+        stop: Sequence[str] = (),
+        pin_slot: bool = True,
+    ) -> Dict[str, Any]:
+        # -1 lets the server pick any idle slot (batch work spreads across all of them).
+        slot = self.slots.slot_for(prompt_key) if pin_slot else -1
         payload = {
             "prompt": prompt,
             "n_predict": max_tokens,
             "temperature": temperature,
             "top_p": top_p,
             "repeat_penalty": repeat_penalty,
-            "stream": False,
+            "stream": stream,
+            "cache_prompt": self.cache_prompt,
+            # "id_slot" on current servers, "slot_id" on older builds.
+            "id_slot": slot,
+            "slot_id": slot,
         }
-        data = json.dumps(payload).encode("utf-8")
-        req = request.Request(
-            url,
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST",
+        if grammar:
+            payload["grammar"] = grammar
+        if stop:
+            payload["stop"] = list(stop)
+        return payload
+
+    def _run_server_completion(
+        self,
+        prompt: str,
+        *,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        repeat_penalty: float,
+        grammar: Optional[str] = None,
+        stop: Sequence[str] = (),
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        pin_slot: bool = True,
+    ) -> str:
+        """Send completion request to llama-server."""
+        payload = self._completion_payload(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            repeat_penalty=repeat_penalty,
+            stream=False,
+            prompt_key=prompt_key,
+            grammar=grammar,
+            stop=stop,
+            pin_slot=pin_slot,
         )
+        counters: Dict[str, Any] = {"slot": payload["id_slot"]}
+        budget = self._call_timeout(timeout)
+        expires = time.monotonic() + budget
+
+        def send(instance: ServerInstance) -> Any:
+            body = instance.client.request_json(
+                "POST", "/completion", payload, timeout=self._time_left(expires)
+            )
+            if isinstance(body, dict):
+                counters.update(completion_usage(body))
+                self._servers.record_tokens(instance, int(counters.get("tokens_predicted", 0)))
+            return body
+
+        parsed = self._servers.call(send, usage=counters, timeout=budget)
+        if usage is not None:
+            usage.update(counters)
+        # server returns {"content": "..."} or {"completion": "..."}
+        if isinstance(parsed, dict):
+            if "content" in parsed:
+                return parsed["content"].strip()
+            if "completion" in parsed:
+                return parsed["completion"].strip()
+        return str(parsed)
+
+    async def _arun_server_completion(
+        self,
+        prompt: str,
+        *,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        repeat_penalty: float,
+        grammar: Optional[str] = None,
+        stop: Sequence[str] = (),
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """_run_server_completion over the non-blocking client."""
+        payload = self._completion_payload(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            repeat_penalty=repeat_penalty,
+            stream=False,
+            prompt_key=prompt_key,
+            grammar=grammar,
+            stop=stop,
+        )
+        counters: Dict[str, Any] = {"slot": payload["id_slot"]}
+        budget = self._call_timeout(timeout)
+        expires = time.monotonic() + budget
+
+        async def send(instance: ServerInstance) -> Any:
+            body = await instance.aclient.request_json(
+                "POST", "/completion", payload, timeout=self._time_left(expires)
+            )
+            if isinstance(body, dict):
+                counters.update(completion_usage(body))
+                self._servers.record_tokens(instance, int(counters.get("tokens_predicted", 0)))
+            return body
+
+        parsed = await self._servers.acall(send, usage=counters, timeout=budget)
+        if usage is not None:
+            usage.update(counters)
+        if isinstance(parsed, dict):
+            if "content" in parsed:
+                return parsed["content"].strip()
+            if "completion" in parsed:
+                return parsed["completion"].strip()
+        return str(parsed)
+
+    def _stream_server_completion(
+        self,
+        prompt: str,
+        *,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        repeat_penalty: float,
+        grammar: Optional[str] = None,
+        stop: Sequence[str] = (),
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        """Send a streaming completion request and yield content pieces.
+
+        llama-server answers with server-sent events, one ``data: {...}`` line
+        per token batch, the last one carrying ``"stop": true`` and the usage
+        counters.
+        """
+        payload = self._completion_payload(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            repeat_penalty=repeat_penalty,
+            stream=True,
+            prompt_key=prompt_key,
+            grammar=grammar,
+            stop=stop,
+        )
+        counters: Dict[str, Any] = usage if usage is not None else {}
+        counters["slot"] = payload["id_slot"]
+        budget = self._call_timeout(timeout)
+        expires = time.monotonic() + budget
+
+        def send(instance: ServerInstance) -> Iterator[Dict[str, Any]]:
+            # Opened eagerly so the pool can retry a refused connection.
+            events = instance.client.stream_events(
+                "/completion", payload, timeout=self._time_left(expires)
+            )
+
+            def drain() -> Iterator[Dict[str, Any]]:
+                # The final event carries "stop": true; draining to the end of
+                # the stream lets the connection go back to the pool.
+                try:
+                    for event in events:
+                        if event.get("stop"):
+                            counters.update(completion_usage(event))
+                            self._servers.record_tokens(
+                                instance, int(counters.get("tokens_predicted", 0))
+                            )
+                        yield event
+                finally:
+                    events.close()  # closes the connection if the stream was cut short
+
+            return drain()
+
+        # The socket timeout only bounds each read; a server trickling tokens
+        # is stopped here once the whole call has used up its budget.
+        stream = self._servers.stream(send, usage=counters, timeout=budget)
+        emitted = False
         try:
-            with request.urlopen(req, timeout=self.timeout_sec) as resp:
-                body = resp.read().decode("utf-8")
-                parsed = json.loads(body)
-                # server returns {"content": "..."} or {"completion": "..."}
-                if isinstance(parsed, dict):
-                    if "content" in parsed:
-                        return parsed["content"].strip()
-                    if "completion" in parsed:
-                        return parsed["completion"].strip()
-                return str(parsed)
-        except error.HTTPError as exc:
-            raise RuntimeError(f"Server HTTP error: {exc}") from exc
-        except error.URLError as exc:
-            raise RuntimeError(f"Server URL error: {exc}") from exc
+            for event in stream:
+                if not event.get("stop") and time.monotonic() > expires:
+                    counters["truncated"] = True
+                    logger.warning("Stopping llama-server stream after %.1fs budget", budget)
+                    if not emitted:
+                        raise TimeoutError(f"No tokens streamed within {budget:.1f} s")
+                    counters["fallback"] = True
+                    return
+                content = event.get("content")
+                if content:
+                    emitted = True
+                    yield content
+        finally:
+            stream.close()
+
+    def _resolve_sampling(
+        self,
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        top_p: Optional[float],
+        json_mode: Optional[bool] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Sampling parameters; ChatML end markers always stop generation on the server.
+
+        With a grammar the extra stop strings are dropped: the grammar already
+        ends generation after the closing brace, and a stop string matching
+        inside the object would cut it short.
+        """
+        grammar = None
+        if json_mode and self.grammar_enabled:
+            grammar = schema_to_gbnf(json_schema) if json_schema else GENERIC_JSON_GRAMMAR
+            stop = None
+        return {
+            "max_tokens": max_tokens if max_tokens is not None else self.max_tokens,
+            "temperature": temperature if temperature is not None else self.temperature,
+            "top_p": top_p if top_p is not None else self.top_p,
+            "repeat_penalty": self.repeat_penalty,
+            "grammar": grammar,
+            "stop": list(CHATML_STOP_MARKERS) + [marker for marker in stop or [] if marker not in CHATML_STOP_MARKERS],
+        }
 
     def generate(
         self,
@@ -230,54 +743,239 @@ class LlamaCppCliProvider(LLMProvider):
         temperature: Optional[float] = None,
         top_p: Optional[float] = None,
         json_mode: Optional[bool] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
     ) -> str:
         """Generate response from messages using llama.cpp CLI."""
-        _ = json_mode  # reserved for future JSON-mode integrations
+        return self._generate(
+            messages,
+            system_prompt=system_prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            json_mode=json_mode,
+            json_schema=json_schema,
+            stop=stop,
+            prompt_key=prompt_key,
+            timeout=timeout,
+            usage=usage,
+        )
+
+    def _generate(
+        self,
+        messages: List[ChatMessage],
+        *,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        json_mode: Optional[bool] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        pin_slot: bool = True,
+    ) -> str:
         try:
-            recent_messages = messages[-self.history_messages :] if messages else []
-            prompt = self._build_prompt(recent_messages, system_prompt=system_prompt)
-            tokens = max_tokens if max_tokens is not None else self.max_tokens
-            temp = temperature if temperature is not None else self.temperature
-            top_p_val = top_p if top_p is not None else self.top_p
-            repeat_penalty = self.repeat_penalty
+            sampling = self._resolve_sampling(max_tokens, temperature, top_p, json_mode, json_schema, stop)
+            prompt = self._fit_prompt(messages, system_prompt, sampling["max_tokens"])
             if self.server_enabled:
                 response = self._run_server_completion(
-                    prompt,
-                    max_tokens=tokens,
-                    temperature=temp,
-                    top_p=top_p_val,
-                    repeat_penalty=repeat_penalty,
+                    prompt, **sampling, prompt_key=prompt_key, timeout=timeout, usage=usage, pin_slot=pin_slot
                 )
+            elif self.cli_worker_enabled:
+                response = "".join(self._stream_cli_worker(prompt, **sampling, timeout=timeout))
             else:
-                response = self._run_llama_cli(
-                    prompt,
-                    max_tokens=tokens,
-                    temperature=temp,
-                    top_p=top_p_val,
-                    repeat_penalty=repeat_penalty,
-                )
+                response = self._run_llama_cli(prompt, **sampling, timeout=timeout)
 
-            if response.startswith(prompt):
-                response = response[len(prompt) :].strip()
-            response = response.split("<|im_end|>")[0].strip()
-            response = response.split("<|im_start|>")[0].strip()
-            return response if response else "I don't have an answer for that."
+            return self._clean_response(response, prompt)
 
         except FileNotFoundError as err:
             logger.error("LLM provider error: %s", err)
-            return self._fallback_response(messages)
-        except subprocess.TimeoutExpired:
-            logger.error("LLM provider timeout after %ss", self.timeout_sec)
+            return self._fallback_response(messages, usage)
+        except (subprocess.TimeoutExpired, TimeoutError):
+            logger.error("LLM provider timeout after %.1fs", self._call_timeout(timeout))
+            if usage is not None:
+                usage["fallback"] = True
             return "The response took too long. Please try again."
         except subprocess.CalledProcessError as err:
             logger.error("LLM provider subprocess error: %s", err)
-            return self._fallback_response(messages)
+            return self._fallback_response(messages, usage)
+        except Exception as err:  # pragma: no cover - defensive
+            logger.error("Unexpected LLM provider error: %s", err)
+            return self._fallback_response(messages, usage)
+
+    def generate_batch(
+        self,
+        requests: Sequence[GenerationRequest],
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> List[GenerationResult]:
+        """Submit the batch concurrently so llama-server decodes it with continuous batching.
+
+        One worker per server slot across all instances; slot pinning is
+        skipped so items do not queue behind each other on one family's slot.
+        CLI modes fall back to the sequential default.
+        """
+        if not self.server_enabled or not requests:
+            return super().generate_batch(requests, usage)
+        workers = min(len(requests), len(self._servers.instances) * self.slots.parallel)
+        generate = functools.partial(self._generate, pin_slot=False)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llama-batch") as executor:
+            results = list(executor.map(lambda request: self._generate_item(request, generate), requests))
+        totals = batch_usage(results, time.perf_counter() - started)
+        logger.info(
+            "Batch of %d (%d errors): %d tokens in %.2f s, %.1f tokens/s over %d workers",
+            totals["items"],
+            totals["errors"],
+            totals["tokens_predicted"],
+            totals["elapsed_sec"],
+            totals["tokens_per_sec"],
+            workers,
+        )
+        if usage is not None:
+            usage.update(totals, workers=workers)
+        return results
+
+    @staticmethod
+    def _clean_response(response: str, prompt: str) -> str:
+        if response.startswith(prompt):
+            response = response[len(prompt) :].strip()
+        response = response.split("<|im_end|>")[0].strip()
+        response = response.split("<|im_start|>")[0].strip()
+        return response if response else "I don't have an answer for that."
+
+    async def agenerate(
+        self,
+        messages: List[ChatMessage],
+        *,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        json_mode: Optional[bool] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Non-blocking completion against llama-server; CLI modes run in a worker thread."""
+        if not self.server_enabled:
+            return await super().agenerate(
+                messages,
+                system_prompt=system_prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                json_mode=json_mode,
+                json_schema=json_schema,
+                stop=stop,
+                prompt_key=prompt_key,
+                timeout=timeout,
+                usage=usage,
+            )
+        try:
+            sampling = self._resolve_sampling(max_tokens, temperature, top_p, json_mode, json_schema, stop)
+            # Prompt fitting may call /tokenize synchronously; keep it off the event loop.
+            prompt = await asyncio.to_thread(
+                self._fit_prompt, messages, system_prompt, sampling["max_tokens"]
+            )
+            response = await self._arun_server_completion(
+                prompt, **sampling, prompt_key=prompt_key, timeout=timeout, usage=usage
+            )
+            return self._clean_response(response, prompt)
+        except TimeoutError:
+            logger.error("LLM provider timeout after %.1fs", self._call_timeout(timeout))
+            if usage is not None:
+                usage["fallback"] = True
+            return "The response took too long. Please try again."
         except Exception as err:  # pragma: no cover - defensive
             logger.error("Unexpected LLM provider error: %s", err)
-            return self._fallback_response(messages)
+            return self._fallback_response(messages, usage)
 
-    def _fallback_response(self, messages: List[ChatMessage]) -> str:
+    def generate_stream(
+        self,
+        messages: List[ChatMessage],
+        *,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        json_mode: Optional[bool] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        """Stream response chunks from llama-server or a llama-cli worker.
+
+        One-shot llama-cli mode yields the whole response once.
+        """
+        if not self.server_enabled and not self.cli_worker_enabled:
+            yield self.generate(
+                messages,
+                system_prompt=system_prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                json_mode=json_mode,
+                json_schema=json_schema,
+                stop=stop,
+                prompt_key=prompt_key,
+                timeout=timeout,
+                usage=usage,
+            )
+            return
+
+        sampling = self._resolve_sampling(max_tokens, temperature, top_p, json_mode, json_schema, stop)
+        prompt = self._fit_prompt(messages, system_prompt, sampling["max_tokens"])
+        stream_filter = ChatMLStreamFilter()
+        emitted = False
+        try:
+            if self.server_enabled:
+                pieces = self._stream_server_completion(
+                    prompt, **sampling, prompt_key=prompt_key, timeout=timeout, usage=usage
+                )
+            else:
+                pieces = self._stream_cli_worker(prompt, **sampling, timeout=timeout)
+            for piece in pieces:
+                text = stream_filter.feed(piece)
+                if text:
+                    emitted = True
+                    yield text
+                if stream_filter.stopped:
+                    break
+            tail = stream_filter.flush()
+            if tail:
+                emitted = True
+                yield tail
+        except TimeoutError as err:
+            logger.error("LLM provider stream timeout: %s", err)
+            if not emitted:
+                if usage is not None:
+                    usage["fallback"] = True
+                yield "The response took too long. Please try again."
+            return
+        except Exception as err:
+            logger.error("LLM provider stream error: %s", err)
+            if not emitted:
+                yield self._fallback_response(messages, usage)
+            return
+        if not emitted:
+            yield "I don't have an answer for that."
+
+    def _fallback_response(
+        self, messages: List[ChatMessage], usage: Optional[Dict[str, Any]] = None
+    ) -> str:
         """Fallback response when llama.cpp fails."""
+        if usage is not None:
+            usage["fallback"] = True
         user_msg = messages[-1].content if messages else "unknown question"
         return (
             "Local response (llama.cpp failed): "
@@ -0,0 +1,432 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from orja.llm.async_http import AsyncHttpConnectionPool
+from orja.llm.backends.supervisor import ServerProcess, ServerSupervisor, get_supervisor
+from orja.llm.http import HttpConnectionPool, HttpStatusError
+
+logger = logging.getLogger(__name__)
+
+
+class ServerInstance:
+    """One llama-server endpoint plus its load and throughput counters."""
+
+    def __init__(self, host: str, port: int, *, threads: int, timeout: float) -> None:
+        self.host = host
+        self.port = port
+        self.threads = threads
+        self.timeout = timeout
+        self.client = HttpConnectionPool(host, port, timeout=timeout)
+        self._aclient: Optional[AsyncHttpConnectionPool] = None
+        self._aclient_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.process: Optional[ServerProcess] = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failures = 0
+        self.tokens = 0
+        self.busy_sec = 0.0
+        self.queue_sec = 0.0
+
+    @property
+    def name(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    @property
+    def aclient(self) -> AsyncHttpConnectionPool:
+        """Async client bound to the running event loop (recreated if the loop changes)."""
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient = AsyncHttpConnectionPool(self.host, self.port, timeout=self.timeout)
+            self._aclient_loop = loop
+        return self._aclient
+
+    @property
+    def healthy(self) -> Optional[bool]:
+        """Passive health: False if the last request of either client failed."""
+        states = [self.client.healthy]
+        if self._aclient is not None:
+            states.append(self._aclient.healthy)
+        if False in states:
+            return False
+        return True if True in states else None
+
+    def ready(self) -> bool:
+        """Active health check; only used while (re)starting the server."""
+        try:
+            self.client.request_json("GET", "/health", timeout=1.0)
+        except HttpStatusError as exc:
+            # 503 while the model is loading; old builds have no /health at all.
+            return exc.status == 404
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def close(self) -> None:
+        self.client.close()
+        aclient, loop = self._aclient, self._aclient_loop
+        self._aclient = self._aclient_loop = None
+        if aclient is not None and loop is not None and not loop.is_closed():
+            # Stream writers must be closed on their own loop.
+            loop.call_soon_threadsafe(aclient.close)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "instance": self.name,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failures": self.failures,
+            "healthy": self.healthy,
+            "tokens": self.tokens,
+            "tokens_per_sec": round(self.tokens / self.busy_sec, 2) if self.busy_sec else 0.0,
+            "avg_queue_ms": round(self.queue_sec * 1000 / self.completed, 2) if self.completed else 0.0,
+        }
+
+
+class LlamaServerPool:
+    """Dispatches requests to the least-loaded healthy llama-server instance.
+
+    Each instance accepts up to ``capacity`` concurrent requests (its slot
+    count); callers beyond total capacity queue until an instance frees up.
+    When ``build_cmd`` is given the pool launches missing servers through the
+    shared ServerSupervisor (``restart`` holds its crash-restart policy),
+    otherwise it only connects to servers already listening on the ports.
+    After start_in_background() requests wait on ``ready_future`` instead of
+    failing while the servers load.
+    """
+
+    def __init__(
+        self,
+        instances: List[ServerInstance],
+        *,
+        capacity: int,
+        build_cmd: Optional[Callable[[ServerInstance], List[str]]] = None,
+        startup_timeout: float = 45.0,
+        restart: Optional[Dict[str, Any]] = None,
+        supervisor: Optional[ServerSupervisor] = None,
+    ) -> None:
+        if not instances:
+            raise ValueError("LlamaServerPool needs at least one instance")
+        self.instances = instances
+        self.capacity = max(1, capacity)
+        self.build_cmd = build_cmd
+        self.startup_timeout = startup_timeout
+        # server.restart config -> ServerProcess keyword arguments.
+        policy = dict(restart or {})
+        self.restart = {"restart": bool(policy.pop("enabled", True)), **policy}
+        self.supervisor = supervisor or get_supervisor()
+        self.ready_future: Optional[Future] = None
+        self.time_to_ready: Optional[float] = None
+        self._first_request_logged = False
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_port_range(
+        cls,
+        host: str,
+        base_port: int,
+        count: int,
+        *,
+        threads: int,
+        timeout: float,
+        capacity: int,
+        build_cmd: Optional[Callable[[ServerInstance], List[str]]] = None,
+        restart: Optional[Dict[str, Any]] = None,
+    ) -> "LlamaServerPool":
+        instances = [
+            ServerInstance(host, base_port + index, threads=threads, timeout=timeout)
+            for index in range(max(1, count))
+        ]
+        return cls(instances, capacity=capacity, build_cmd=build_cmd, startup_timeout=timeout, restart=restart)
+
+    # -- process management -------------------------------------------------
+
+    def ensure_started(self, instance: ServerInstance, timeout: Optional[float] = None) -> None:
+        """Start llama-server for instance unless one already answers on its port.
+
+        Waits up to timeout (default startup_timeout) for it to become ready.
+        """
+        limit = self.startup_timeout if timeout is None else min(self.startup_timeout, timeout)
+        if instance.process is None and self.build_cmd is not None:
+            # Another provider may already supervise this endpoint; share its process.
+            instance.process = self.supervisor.attach(instance.name)
+        if instance.ready():
+            return
+        if self.build_cmd is None:
+            raise ConnectionError(f"llama-server at {instance.name} is not reachable")
+
+        if instance.process is None:
+            instance.process = self.supervisor.acquire(instance.name, self.build_cmd(instance), **self.restart)
+        instance.process.ensure_running()
+
+        start = time.time()
+        while time.time() - start < limit:
+            if instance.ready():
+                logger.info("llama-server is ready at %s", instance.name)
+                return
+            time.sleep(min(0.5, max(0.0, limit - (time.time() - start))))
+
+        raise TimeoutError(f"llama-server did not become ready within {limit:.1f} seconds")
+
+    def start_all(self) -> None:
+        for instance in self.instances:
+            self.ensure_started(instance)
+
+    def start_in_background(self) -> Future:
+        """Start all instances on a daemon thread; the future resolves once they are ready."""
+        with self._cond:
+            if self.ready_future is None:
+                self.ready_future = Future()
+                threading.Thread(
+                    target=self._background_start,
+                    args=(self.ready_future,),
+                    name="llama-server-start",
+                    daemon=True,
+                ).start()
+            return self.ready_future
+
+    def _background_start(self, future: Future) -> None:
+        started = time.perf_counter()
+        try:
+            self.start_all()
+        except Exception as exc:
+            logger.error("llama-server startup failed: %s", exc)
+            future.set_exception(exc)
+            return
+        self.time_to_ready = time.perf_counter() - started
+        logger.info("llama-server pool ready after %.2f s", self.time_to_ready)
+        future.set_result(self.time_to_ready)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until background startup finishes; False if it failed or timed out."""
+        future = self.ready_future
+        if future is None:
+            return True
+        waited_from = None if future.done() else time.perf_counter()
+        try:
+            future.result(timeout if timeout is not None else self.startup_timeout)
+        except Exception:
+            # The request itself will retry ensure_started and surface the error.
+            return False
+        if waited_from is not None:
+            logger.info("Request waited %.1f ms for llama-server startup", (time.perf_counter() - waited_from) * 1000)
+        return True
+
+    async def await_ready(self, timeout: Optional[float] = None) -> bool:
+        """wait_ready() for coroutines."""
+        future = self.ready_future
+        if future is None or future.done():
+            return self.wait_ready(0)
+        waited_from = time.perf_counter()
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)),
+                timeout if timeout is not None else self.startup_timeout,
+            )
+        except Exception:
+            return False
+        logger.info("Request waited %.1f ms for llama-server startup", (time.perf_counter() - waited_from) * 1000)
+        return True
+
+    def _check_ready(self, timeout: Optional[float]) -> None:
+        """Raise TimeoutError if background startup is still running after waiting timeout."""
+        future = self.ready_future
+        if timeout is not None and future is not None and not future.done():
+            raise TimeoutError(f"llama-server still starting after {timeout:.1f} s")
+
+    # -- dispatch -----------------------------------------------------------
+
+    def _pick(self) -> Optional[ServerInstance]:
+        free = [i for i in self.instances if i.in_flight < self.capacity]
+        if not free:
+            return None
+        # Known-bad instances only get traffic when nothing else is free.
+        healthy = [i for i in free if i.healthy is not False] or free
+        return min(healthy, key=lambda i: (i.in_flight, i.completed))
+
+    def _try_reserve(self) -> Optional[ServerInstance]:
+        with self._cond:
+            instance = self._pick()
+            if instance is not None:
+                instance.in_flight += 1
+            return instance
+
+    def _release(self, instance: ServerInstance, started: float, queue_sec: float, failed: bool) -> None:
+        with self._cond:
+            instance.in_flight -= 1
+            instance.completed += 1
+            instance.queue_sec += queue_sec
+            busy_sec = time.perf_counter() - started
+            instance.busy_sec += busy_sec
+            if failed:
+                instance.failures += 1
+            first = not self._first_request_logged
+            self._first_request_logged = True
+            self._cond.notify()
+        if first:
+            logger.info(
+                "First llama-server request took %.1f ms (%.1f ms queued)",
+                (queue_sec + busy_sec) * 1000,
+                queue_sec * 1000,
+            )
+
+    @staticmethod
+    def _note_queue(instance: ServerInstance, queue_sec: float, usage: Optional[Dict[str, Any]]) -> None:
+        if usage is not None:
+            usage["instance"] = instance.name
+            usage["queue_ms"] = round(queue_sec * 1000, 2)
+
+    @contextmanager
+    def acquire(
+        self, usage: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> Iterator[ServerInstance]:
+        """Reserve a slot on the least-loaded instance for the duration of a request.
+
+        timeout bounds the wait for startup and for a free slot together;
+        TimeoutError is raised when it runs out, None waits indefinitely.
+        """
+        queued_at = time.perf_counter()
+        self.wait_ready(timeout)
+        self._check_ready(timeout)
+        with self._cond:
+            instance = self._pick()
+            while instance is None:
+                remaining = None if timeout is None else timeout - (time.perf_counter() - queued_at)
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No llama-server slot free within {timeout:.1f} s")
+                self._cond.wait(remaining)
+                instance = self._pick()
+            instance.in_flight += 1
+        started = time.perf_counter()
+        queue_sec = started - queued_at
+        self._note_queue(instance, queue_sec, usage)
+        failed = False
+        try:
+            yield instance
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(instance, started, queue_sec, failed)
+
+    @asynccontextmanager
+    async def aacquire(
+        self, usage: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> AsyncIterator[ServerInstance]:
+        """acquire() for coroutines; polls instead of blocking the event loop while queued."""
+        queued_at = time.perf_counter()
+        await self.await_ready(timeout)
+        self._check_ready(timeout)
+        instance = self._try_reserve()
+        while instance is None:
+            if timeout is not None and time.perf_counter() - queued_at >= timeout:
+                raise TimeoutError(f"No llama-server slot free within {timeout:.1f} s")
+            await asyncio.sleep(0.005)
+            instance = self._try_reserve()
+        started = time.perf_counter()
+        queue_sec = started - queued_at
+        self._note_queue(instance, queue_sec, usage)
+        failed = False
+        try:
+            yield instance
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(instance, started, queue_sec, failed)
+
+    def call(
+        self,
+        fn: Callable[[ServerInstance], Any],
+        usage: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Run fn against an instance, restarting it once if the connection fails.
+
+        timeout bounds the wait for a slot (see acquire()).
+        """
+        with self.acquire(usage, timeout) as instance:
+            return self._call_instance(instance, fn, timeout)
+
+    def stream(
+        self,
+        fn: Callable[[ServerInstance], Iterator[Any]],
+        usage: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Any]:
+        """Like call, but keeps the instance reserved until the stream ends."""
+        with self.acquire(usage, timeout) as instance:
+            yield from self._call_instance(instance, fn, timeout)
+
+    async def acall(
+        self,
+        fn: Callable[[ServerInstance], Awaitable[Any]],
+        usage: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Async call(); process (re)starts run in a worker thread."""
+        async with self.aacquire(usage, timeout) as instance:
+            if instance.healthy is False:
+                await asyncio.to_thread(self.ensure_started, instance, timeout)
+            try:
+                return await fn(instance)
+            except ConnectionError as exc:
+                logger.warning("llama-server %s connection failed (%s), reconnecting", instance.name, exc)
+                await asyncio.to_thread(self.ensure_started, instance, timeout)
+                return await fn(instance)
+
+    def _call_instance(
+        self, instance: ServerInstance, fn: Callable[[ServerInstance], Any], timeout: Optional[float] = None
+    ) -> Any:
+        if instance.healthy is False:
+            self.ensure_started(instance, timeout)
+        try:
+            return fn(instance)
+        except ConnectionError as exc:
+            logger.warning("llama-server %s connection failed (%s), reconnecting", instance.name, exc)
+            self.ensure_started(instance, timeout)
+            return fn(instance)
+
+    def request_json(
+        self, method: str, path: str, payload: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> Any:
+        """Send a short utility request (e.g. /tokenize) without reserving a slot.
+
+        Waits at most timeout for startup (raising TimeoutError if it is still
+        running) and uses it as the request timeout.
+        """
+        self.wait_ready(timeout)
+        self._check_ready(timeout)
+        with self._cond:
+            candidates = [i for i in self.instances if i.healthy is not False] or self.instances
+            instance = min(candidates, key=lambda i: i.in_flight)
+        return instance.client.request_json(method, path, payload, timeout=timeout)
+
+    def record_tokens(self, instance: ServerInstance, tokens: int) -> None:
+        with self._cond:
+            instance.tokens += tokens
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            return [instance.stats() for instance in self.instances]
+
+    def close(self) -> None:
+        for instance in self.instances:
+            instance.close()
+
+    def stop(self) -> None:
+        """Close connections and release this pool's servers; the supervisor stops
+        each one once no other provider shares it (frees their RAM)."""
+        self.close()
+        with self._cond:
+            self.ready_future = None
+        for instance in self.instances:
+            process, instance.process = instance.process, None
+            if process is not None:
+                self.supervisor.release(process)
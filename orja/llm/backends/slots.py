@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional
+
+
+class SlotAffinity:
+    """Pins prompt families to fixed llama-server slots.
+
+    llama-server keeps the KV cache of the last prompt per slot, so sending
+    every request of one family (same static system prompt) to the same slot
+    with ``cache_prompt`` lets the server skip re-prefilling that prefix.
+    Requests without a known family share one extra slot so they never evict
+    a pinned prefix.
+    """
+
+    def __init__(self, families: Iterable[str]) -> None:
+        self.slots: Dict[str, int] = {}
+        for name in families:
+            self.slots.setdefault(name, len(self.slots))
+        self.shared_slot = len(self.slots)
+
+    @property
+    def parallel(self) -> int:
+        """Number of server slots to launch (pinned families plus the shared one)."""
+        return self.shared_slot + 1
+
+    def slot_for(self, prompt_key: Optional[str]) -> int:
+        if prompt_key is None:
+            return self.shared_slot
+        return self.slots.get(prompt_key, self.shared_slot)
+
+
+def completion_usage(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract token counters from a llama-server /completion response."""
+    timings = body.get("timings") or {}
+    usage: Dict[str, Any] = {}
+    for key in ("tokens_evaluated", "tokens_predicted", "tokens_cached", "truncated"):
+        if key in body:
+            usage[key] = body[key]
+    if "tokens_cached" not in usage and "prompt_n" in timings and "tokens_evaluated" in body:
+        # Older servers only report how many prompt tokens were actually processed.
+        usage["tokens_cached"] = max(0, int(body["tokens_evaluated"]) - int(timings["prompt_n"]))
+    # Generation ran into n_predict ("stop_type" on current servers, "stopped_limit" on older ones).
+    if body.get("stop_type") == "limit" or body.get("stopped_limit"):
+        usage["stopped_limit"] = True
+    if "prompt_ms" in timings:
+        usage["prompt_ms"] = round(float(timings["prompt_ms"]), 1)
+    if "predicted_ms" in timings:
+        usage["predicted_ms"] = round(float(timings["predicted_ms"]), 1)
+    return usage
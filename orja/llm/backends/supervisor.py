@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+# Server output goes to its own logger so its level can be set separately.
+server_logger = logging.getLogger("orja.llama_server")
+
+_ERROR_MARKERS = ("error", "failed", "abort")
+
+
+class ServerProcess:
+    """One supervised llama-server process.
+
+    stdout and stderr are merged and drained line by line on a daemon thread
+    into the ``orja.llama_server`` logger, so a chatty server can never block
+    on a full pipe. When the process exits unexpectedly it is restarted after
+    an exponential backoff (``backoff_sec`` doubling up to
+    ``max_backoff_sec``); after ``max_restarts`` crashes without a stable run
+    of ``stable_sec`` it is left down until the next request starts it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        cmd: List[str],
+        *,
+        restart: bool = True,
+        backoff_sec: float = 1.0,
+        max_backoff_sec: float = 30.0,
+        max_restarts: int = 5,
+        stable_sec: float = 60.0,
+    ) -> None:
+        self.name = name
+        self.cmd = list(cmd)
+        self.restart = restart
+        self.backoff_sec = max(0.0, backoff_sec)
+        self.max_backoff_sec = max(self.backoff_sec, max_backoff_sec)
+        self.max_restarts = max_restarts
+        self.stable_sec = stable_sec
+        self.proc: Optional[subprocess.Popen] = None
+        self.starts = 0
+        self.crashes = 0
+        self.last_exit_code: Optional[int] = None
+        self.tail: Deque[str] = deque(maxlen=20)
+        self._failures = 0
+        self._started_at = 0.0
+        self._next_start = 0.0
+        self._stopping = False
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def ensure_running(self) -> None:
+        """Start the server now unless it is running; waits out a pending crash backoff."""
+        with self._lock:
+            if self.running:
+                return
+            self._stopping = False
+            delay = self._next_start - time.monotonic()
+        if delay > 0:
+            logger.info("Waiting %.1f s before restarting llama-server on %s", delay, self.name)
+            time.sleep(delay)
+        with self._lock:
+            if not self.running:
+                self._spawn()
+
+    def _spawn(self) -> None:
+        """Launch the process; caller holds the lock."""
+        proc = subprocess.Popen(
+            self.cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+        )
+        logger.info("Started llama-server on %s (pid %d): %s", self.name, proc.pid, " ".join(self.cmd[:3]) + " ...")
+        self.proc = proc
+        self.starts += 1
+        self._started_at = time.monotonic()
+        threading.Thread(
+            target=self._drain, args=(proc,), name=f"llama-server-log-{self.name}", daemon=True
+        ).start()
+
+    def _drain(self, proc: subprocess.Popen) -> None:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            line = line.rstrip()
+            if not line:
+                continue
+            self.tail.append(line)
+            level = logging.WARNING if any(marker in line.lower() for marker in _ERROR_MARKERS) else logging.DEBUG
+            server_logger.log(level, "[%s] %s", self.name, line)
+        self._on_exit(proc, proc.wait())
+
+    def _on_exit(self, proc: subprocess.Popen, code: int) -> None:
+        with self._lock:
+            self.last_exit_code = code
+            if self._stopping or proc is not self.proc:
+                return
+            now = time.monotonic()
+            uptime = now - self._started_at
+            if uptime >= self.stable_sec:
+                self._failures = 0
+            self._failures += 1
+            self.crashes += 1
+            delay = min(self.max_backoff_sec, self.backoff_sec * 2 ** (self._failures - 1))
+            self._next_start = now + delay
+            give_up = not self.restart or self._failures > self.max_restarts
+        logger.error(
+            "llama-server on %s exited with code %s after %.1f s; last output:\n%s",
+            self.name,
+            code,
+            uptime,
+            "\n".join(self.tail),
+        )
+        if give_up:
+            logger.error("Not restarting llama-server on %s after %d crashes", self.name, self._failures)
+            return
+        logger.warning("Restarting llama-server on %s in %.1f s", self.name, delay)
+        time.sleep(delay)
+        with self._lock:
+            if self._stopping or self.running:
+                return
+            self._spawn()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        with self._lock:
+            self._stopping = True
+            proc, self.proc = self.proc, None
+        if proc is None or proc.poll() is not None:
+            return
+        logger.info("Stopping llama-server on %s", self.name)
+        proc.terminate()
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "server": self.name,
+            "running": self.running,
+            "pid": self.proc.pid if self.proc is not None else None,
+            "starts": self.starts,
+            "crashes": self.crashes,
+            "last_exit_code": self.last_exit_code,
+        }
+
+
+class ServerSupervisor:
+    """Process-wide owner of every llama-server launched by orja.
+
+    Servers are keyed by endpoint (host:port), so every provider built from
+    the same config, whether for the pipeline, the legacy router or a model
+    tier, shares one process by reference. Each owner acquire()s the process
+    and release()s it; it is stopped when the last owner lets go, and all
+    remaining servers are stopped at interpreter exit.
+    """
+
+    def __init__(self) -> None:
+        self._processes: Dict[str, ServerProcess] = {}
+        self._owners: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, name: str) -> Optional[ServerProcess]:
+        """Share an already supervised server, or None if there is none on name."""
+        with self._lock:
+            process = self._processes.get(name)
+            if process is not None:
+                self._owners[name] += 1
+            return process
+
+    def acquire(self, name: str, cmd: List[str], **policy: Any) -> ServerProcess:
+        """Supervised process for name, created (not started) on first use."""
+        with self._lock:
+            process = self._processes.get(name)
+            if process is None:
+                process = self._processes[name] = ServerProcess(name, cmd, **policy)
+                self._owners[name] = 0
+            elif process.cmd != list(cmd):
+                logger.warning("llama-server on %s already runs with a different command; sharing it", name)
+            self._owners[name] += 1
+            return process
+
+    def release(self, process: ServerProcess) -> None:
+        """Drop one owner; the last one stops the server."""
+        with self._lock:
+            if self._processes.get(process.name) is not process:
+                return
+            self._owners[process.name] -= 1
+            if self._owners[process.name] > 0:
+                return
+            del self._processes[process.name]
+            del self._owners[process.name]
+        process.stop()
+
+    def stop_all(self) -> None:
+        with self._lock:
+            processes = list(self._processes.values())
+            self._processes.clear()
+            self._owners.clear()
+        for process in processes:
+            process.stop()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{**process.stats(), "owners": self._owners[name]} for name, process in self._processes.items()]
+
+
+_supervisor: Optional[ServerSupervisor] = None
+_supervisor_lock = threading.Lock()
+
+
+def get_supervisor() -> ServerSupervisor:
+    """The shared supervisor; its servers are stopped when the interpreter exits."""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = ServerSupervisor()
+            atexit.register(_supervisor.stop_all)
+        return _supervisor
@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from orja.llm.provider import ChatMessage, GenerationRequest, GenerationResult, LLMProvider, batch_usage
+from orja.memory.connection import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+
+_INSERT_ENTRY = "INSERT OR REPLACE INTO llm_cache (key, prompt_key, response, created_at) VALUES (?, ?, ?, ?)"
+_SELECT_ENTRY = "SELECT response, prompt_key, created_at FROM llm_cache WHERE key = ?"
+_DELETE_EXPIRED = "DELETE FROM llm_cache WHERE created_at < ?"
+# rowid grows with every insert (a replaced key gets a new one), so this keeps
+# at most max_rows of the newest entries without sorting the table.
+_DELETE_OLDEST = "DELETE FROM llm_cache WHERE rowid <= (SELECT MAX(rowid) FROM llm_cache) - ?"
+
+
+class ResponseCache:
+    """Two-tier response cache: an in-memory LRU in front of a SQLite table.
+
+    Entries expire after ttl_sec in both tiers. Each entry remembers the
+    prompt family it was generated for so a changed prompt file can drop
+    exactly its entries. put() only updates memory and queues the row; a
+    background thread writes queued rows over a persistent connection and
+    trims expired and surplus rows every ``prune_every`` inserts.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path],
+        *,
+        memory_entries: int = 256,
+        ttl_sec: float = 86400.0,
+        max_rows: int = 5000,
+        prune_every: int = 100,
+        db_options: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.db_path = db_path
+        self.memory_entries = max(1, memory_entries)
+        self.ttl_sec = ttl_sec
+        self.max_rows = max_rows
+        self.prune_every = max(1, prune_every)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._memory: "OrderedDict[str, Tuple[float, str, Optional[str]]]" = OrderedDict()
+        self._pending: List[Tuple[str, Optional[str], str, float]] = []
+        self._since_prune = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self.db: Optional[ConnectionManager] = None
+        if self.db_path is not None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.db = ConnectionManager(self.db_path, db_options)
+            self._ensure_table()
+            self._writer = threading.Thread(target=self._run_writer, name="orja-response-cache", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    def _ensure_table(self) -> None:
+        with self.db.transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    prompt_key TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache(created_at)")
+
+    @staticmethod
+    def make_key(model: str, prompt: str, sampling: Dict[str, Any]) -> str:
+        payload = json.dumps([model, prompt, sampling], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return (response, tier) where tier is "memory" or "disk"; (None, None) on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, response, _ = entry
+                if now - created_at <= self.ttl_sec:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return response, "memory"
+                del self._memory[key]
+
+        if self.db is not None:
+            rows = self.db.query(_SELECT_ENTRY, (key,))
+            row = rows[0] if rows else None
+            if row is not None and now - row[2] <= self.ttl_sec:
+                self._remember(key, row[2], row[0], row[1])
+                with self._lock:
+                    self.hits += 1
+                return row[0], "disk"
+
+        with self._lock:
+            self.misses += 1
+        return None, None
+
+    def _remember(self, key: str, created_at: float, response: str, prompt_key: Optional[str]) -> None:
+        with self._lock:
+            self._memory[key] = (created_at, response, prompt_key)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def put(self, key: str, response: str, prompt_key: Optional[str]) -> None:
+        """Store an entry; the SQLite write happens on the writer thread."""
+        now = time.time()
+        self._remember(key, now, response, prompt_key)
+        if self.db is None:
+            return
+        with self._lock:
+            self._pending.append((key, prompt_key, response, now))
+        self._wake.set()
+
+    def flush(self) -> int:
+        """Write queued entries (pruning when due); returns the number written."""
+        if self.db is None:
+            return 0
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        try:
+            with self.db.transaction() as conn:
+                conn.executemany(_INSERT_ENTRY, rows)
+                self._since_prune += len(rows)
+                if self._since_prune >= self.prune_every:
+                    conn.execute(_DELETE_EXPIRED, (time.time() - self.ttl_sec,))
+                    conn.execute(_DELETE_OLDEST, (self.max_rows,))
+                    self._since_prune = 0
+        except sqlite3.Error as exc:
+            logger.warning("Could not write %d response cache entries: %s", len(rows), exc)
+            return 0
+        self.writes += len(rows)
+        return len(rows)
+
+    def _run_writer(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the writer thread and write queued entries."""
+        self._stop.set()
+        self._wake.set()
+        if self._writer is not None and self._writer is not threading.current_thread():
+            self._writer.join(timeout=5)
+        self.flush()
+
+    def invalidate(self, prompt_key: Optional[str] = None) -> None:
+        """Drop entries for one prompt family, or everything when prompt_key is None."""
+        with self._lock:
+            if prompt_key is None:
+                self._memory.clear()
+                self._pending = []
+            else:
+                for key in [k for k, v in self._memory.items() if v[2] == prompt_key]:
+                    del self._memory[key]
+                self._pending = [row for row in self._pending if row[1] != prompt_key]
+        if self.db is not None:
+            if prompt_key is None:
+                self.db.execute("DELETE FROM llm_cache")
+            else:
+                self.db.execute("DELETE FROM llm_cache WHERE prompt_key = ?", (prompt_key,))
+        logger.info("Response cache invalidated (%s)", prompt_key or "all")
+
+
+class CachedProvider(LLMProvider):
+    """Serves repeated generate() calls from a ResponseCache.
+
+    The key covers the prompt as the backend renders it, the sampling
+    arguments and the model, so only identical requests share an answer.
+    Fallback responses are never stored; streaming is passed through.
+    """
+
+    def __init__(self, provider: LLMProvider, cache: ResponseCache) -> None:
+        self.provider = provider
+        self.cache = cache
+
+    def generate(
+        self,
+        messages: List[ChatMessage],
+        *,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        json_mode: Optional[bool] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        key, cached = self._lookup(
+            messages, system_prompt, max_tokens, temperature, top_p, json_mode, json_schema, stop, usage
+        )
+        if cached is not None:
+            return cached
+
+        counters: Dict[str, Any] = usage if usage is not None else {}
+        response = self.provider.generate(
+            messages,
+            system_prompt=system_prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            json_mode=json_mode,
+            json_schema=json_schema,
+            stop=stop,
+            prompt_key=prompt_key,
+            timeout=timeout,
+            usage=counters,
+        )
+        if not counters.get("fallback"):
+            self.cache.put(key, response, prompt_key)
+        return response
+
+    def _lookup(
+        self,
+        messages: List[ChatMessage],
+        system_prompt: Optional[str],
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        top_p: Optional[float],
+        json_mode: Optional[bool],
+        json_schema: Optional[Dict[str, Any]],
+        stop: Optional[List[str]],
+        usage: Optional[Dict[str, Any]],
+    ) -> Tuple[str, Optional[str]]:
+        prompt = self.provider.render_prompt(messages, system_prompt=system_prompt, max_tokens=max_tokens)
+        sampling = {
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": top_p,
+            "json_mode": json_mode,
+            "json_schema": json_schema,
+            "stop": stop,
+        }
+        key = ResponseCache.make_key(self.provider.model_name, prompt, sampling)
+        cached, tier = self.cache.get(key)
+        if usage is not None:
+            usage["cache"] = tier or "miss"
+            usage["cache_hits"] = self.cache.hits
+            usage["cache_misses"] = self.cache.misses
+        return key, cached
+
+    async def agenerate(
+        self,
+        messages: List[ChatMessage],
+        *,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        json_mode: Optional[bool] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        # Rendering and SQLite lookups block, so they run in a worker thread.
+        key, cached = await asyncio.to_thread(
+            self._lookup,
+            messages,
+            system_prompt,
+            max_tokens,
+            temperature,
+            top_p,
+            json_mode,
+            json_schema,
+            stop,
+            usage,
+        )
+        if cached is not None:
+            return cached
+
+        counters: Dict[str, Any] = usage if usage is not None else {}
+        response = await self.provider.agenerate(
+            messages,
+            system_prompt=system_prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            json_mode=json_mode,
+            json_schema=json_schema,
+            stop=stop,
+            prompt_key=prompt_key,
+            timeout=timeout,
+            usage=counters,
+        )
+        if not counters.get("fallback"):
+            self.cache.put(key, response, prompt_key)
+        return response
+
+    def generate_batch(
+        self,
+        requests: Sequence[GenerationRequest],
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> List[GenerationResult]:
+        """Serve cached items directly and send only the misses to the wrapped batch call."""
+        started = time.perf_counter()
+        results: List[Optional[GenerationResult]] = [None] * len(requests)
+        keys: List[str] = []
+        misses: List[int] = []
+        for index, request in enumerate(requests):
+            item_usage: Dict[str, Any] = {}
+            key, cached = self._lookup(
+                request.messages,
+                request.system_prompt,
+                request.max_tokens,
+                request.temperature,
+                request.top_p,
+                request.json_mode,
+                request.json_schema,
+                request.stop,
+                item_usage,
+            )
+            keys.append(key)
+            if cached is not None:
+                # Nothing was decoded, so hits do not inflate the batch tokens/s.
+                item_usage["tokens_predicted"] = 0
+                results[index] = GenerationResult(text=cached, usage=item_usage)
+            else:
+                misses.append(index)
+
+        generated = self.provider.generate_batch([requests[index] for index in misses])
+        for index, result in zip(misses, generated):
+            if result.ok and result.text is not None:
+                self.cache.put(keys[index], result.text, requests[index].prompt_key)
+            result.usage["cache"] = "miss"
+            results[index] = result
+
+        if usage is not None:
+            usage.update(batch_usage(results, time.perf_counter() - started), cache_hits=len(requests) - len(misses))
+        return results
+
+    def generate_stream(self, messages: List[ChatMessage], **kwargs: Any) -> Iterator[str]:
+        return self.provider.generate_stream(messages, **kwargs)
+
+    def count_tokens(self, text: str) -> int:
+        return self.provider.count_tokens(text)
+
+    def embed(self, text: str) -> Optional[List[float]]:
+        return self.provider.embed(text)
+
+    def warm_up(self, system_prompts: Dict[str, str]) -> None:
+        self.provider.warm_up(system_prompts)
+
+    def render_prompt(
+        self,
+        messages: List[ChatMessage],
+        *,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        return self.provider.render_prompt(messages, system_prompt=system_prompt, max_tokens=max_tokens)
+
+    @property
+    def model_name(self) -> str:
+        return self.provider.model_name
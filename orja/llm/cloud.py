@@ -1,12 +1,189 @@
 from __future__ import annotations
 
 import logging
+import os
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
 
-logger = logging.getLogger("orja")
+from orja.llm.http import HttpConnectionPool, HttpStatusError
+from orja.llm.provider import ChatMessage, LLMProvider
 
+logger = logging.getLogger(__name__)
 
-class CloudLLM:
-    def generate(self, *args, **kwargs):
-        logger.warning("CloudLLM is a placeholder and not implemented.")
-        raise NotImplementedError("Cloud LLM integration is not implemented yet.")
 
+class CloudLLM(LLMProvider):
+    """Provider for OpenAI-compatible ``/chat/completions`` endpoints.
+
+    Works with any server speaking that API (hosted services, vLLM,
+    llama-server's ``/v1``). Requests go over a keep-alive connection pool;
+    errors return a canned reply with ``usage["fallback"]`` set, like the
+    local backend.
+    """
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        base_url = urlparse(config.get("base_url", "https://api.openai.com/v1"))
+        https = base_url.scheme == "https"
+        self.base_path = base_url.path.rstrip("/")
+        self.model = config.get("model", "gpt-4o-mini")
+        self.max_tokens = config.get("max_tokens", 300)
+        self.temperature = config.get("temperature", 0.7)
+        self.top_p = config.get("top_p", 1.0)
+        self.timeout_sec = float(config.get("timeout_sec", 30))
+        self.system_prompt = config.get("system_prompt", "")
+        api_key = config.get("api_key") or os.environ.get(config.get("api_key_env", "OPENAI_API_KEY"), "")
+        headers = {"Accept": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        self.client = HttpConnectionPool(
+            base_url.hostname or "localhost",
+            base_url.port or (443 if https else 80),
+            timeout=self.timeout_sec,
+            https=https,
+            headers=headers,
+        )
+
+    @property
+    def model_name(self) -> str:
+        return f"cloud:{self.model}"
+
+    def _payload(
+        self,
+        messages: List[ChatMessage],
+        *,
+        system_prompt: Optional[str],
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        top_p: Optional[float],
+        json_mode: Optional[bool],
+        stop: Optional[List[str]],
+        stream: bool,
+    ) -> Dict[str, Any]:
+        applied_system = system_prompt if system_prompt is not None else self.system_prompt
+        chat = [{"role": "system", "content": applied_system}] if applied_system else []
+        chat += [{"role": message.role, "content": message.content} for message in messages]
+        payload: Dict[str, Any] = {
+            "model": self.model,
+            "messages": chat,
+            "max_tokens": max_tokens if max_tokens is not None else self.max_tokens,
+            "temperature": temperature if temperature is not None else self.temperature,
+            "top_p": top_p if top_p is not None else self.top_p,
+            "stream": stream,
+        }
+        if stop:
+            payload["stop"] = list(stop)[:4]  # the API accepts at most four
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        if stream:
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    @staticmethod
+    def _record_usage(body: Dict[str, Any], usage: Optional[Dict[str, Any]]) -> None:
+        counters = body.get("usage") or {}
+        if usage is None or not counters:
+            return
+        if "prompt_tokens" in counters:
+            usage["tokens_evaluated"] = counters["prompt_tokens"]
+        if "completion_tokens" in counters:
+            usage["tokens_predicted"] = counters["completion_tokens"]
+        choices = body.get("choices") or [{}]
+        if choices and choices[0].get("finish_reason") == "length":
+            usage["stopped_limit"] = True
+
+    def _call_timeout(self, timeout: Optional[float]) -> float:
+        return self.timeout_sec if timeout is None else min(self.timeout_sec, timeout)
+
+    @staticmethod
+    def _fallback(usage: Optional[Dict[str, Any]]) -> str:
+        if usage is not None:
+            usage["fallback"] = True
+        return "The cloud model is not available right now. Please try again."
+
+    def generate(
+        self,
+        messages: List[ChatMessage],
+        *,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        json_mode: Optional[bool] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        _ = (json_schema, prompt_key)
+        payload = self._payload(
+            messages,
+            system_prompt=system_prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            json_mode=json_mode,
+            stop=stop,
+            stream=False,
+        )
+        try:
+            body = self.client.request_json(
+                "POST", f"{self.base_path}/chat/completions", payload, timeout=self._call_timeout(timeout)
+            )
+            content = body["choices"][0]["message"]["content"] or ""
+        except (OSError, ValueError, KeyError, IndexError, TypeError, HttpStatusError) as err:
+            logger.error("Cloud LLM request failed: %s", err)
+            return self._fallback(usage)
+        self._record_usage(body, usage)
+        return content.strip() or "I don't have an answer for that."
+
+    def generate_stream(
+        self,
+        messages: List[ChatMessage],
+        *,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        json_mode: Optional[bool] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        _ = (json_schema, prompt_key)
+        payload = self._payload(
+            messages,
+            system_prompt=system_prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            json_mode=json_mode,
+            stop=stop,
+            stream=True,
+        )
+        emitted = False
+        try:
+            events = self.client.stream_events(
+                f"{self.base_path}/chat/completions", payload, timeout=self._call_timeout(timeout)
+            )
+            for event in events:
+                self._record_usage(event, usage)
+                for choice in event.get("choices") or []:
+                    content = (choice.get("delta") or {}).get("content")
+                    if content:
+                        # Leading whitespace of the reply is dropped, as in the local backend.
+                        content = content if emitted else content.lstrip()
+                        if content:
+                            emitted = True
+                            yield content
+        except (OSError, ValueError, RuntimeError, HttpStatusError) as err:
+            logger.error("Cloud LLM stream failed: %s", err)
+            if not emitted:
+                yield self._fallback(usage)
+            return
+        if not emitted:
+            yield "I don't have an answer for that."
+
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, List
+
+# Shared GBNF rules; keys are emitted as literals so the model cannot invent
+# extra fields or reorder them. ws allows at most one newline and no two ws
+# are ever adjacent, so output never contains "\n\n" (an agent stop string).
+_BASE_RULES = {
+    "ws": r'"\n"? [ \t]{0,2}',
+    "string": r'"\"" ( [^"\\\x7F\x00-\x1F] | "\\" ["\\/bfnrt] ){0,120} "\""',
+    "number": r'"-"? ("0" | [1-9] [0-9]{0,5}) ("." [0-9]{1,4})?',
+    "integer": r'"-"? ("0" | [1-9] [0-9]{0,5})',
+    "boolean": r'"true" | "false"',
+    "null": r'"null"',
+    "value": "object | array | string | number | boolean | null",
+    "object": r'"{" ws ( string ws ":" ws value ( ws "," ws string ws ":" ws value ){0,8} ws )? "}"',
+    "array": r'"[" ws ( value ( ws "," ws value ){0,8} ws )? "]"',
+}
+
+GENERIC_JSON_GRAMMAR = "\n".join(
+    ["root ::= object"] + [f"{name} ::= {body}" for name, body in _BASE_RULES.items()]
+)
+
+
+def _literal(value: Any) -> str:
+    """GBNF literal for the JSON encoding of value."""
+    return json.dumps(json.dumps(value, ensure_ascii=False), ensure_ascii=False)
+
+
+class _GrammarBuilder:
+    def __init__(self) -> None:
+        self.rules: Dict[str, str] = {}
+
+    def _add(self, name: str, body: str) -> str:
+        name = re.sub(r"[^a-zA-Z0-9-]", "-", name)
+        base, index = name, 1
+        while name in self.rules and self.rules[name] != body:
+            index += 1
+            name = f"{base}{index}"
+        self.rules[name] = body
+        return name
+
+    def visit(self, schema: Dict[str, Any], name: str) -> str:
+        """Return a GBNF expression matching schema, adding helper rules."""
+        if "enum" in schema:
+            return self._add(name, " | ".join(_literal(v) for v in schema["enum"]))
+        if "const" in schema:
+            return _literal(schema["const"])
+        for key in ("anyOf", "oneOf"):
+            if key in schema:
+                options = [self.visit(option, f"{name}-{i}") for i, option in enumerate(schema[key])]
+                return self._add(name, " | ".join(options))
+
+        schema_type = schema.get("type")
+        if isinstance(schema_type, list):
+            options = [self.visit({**schema, "type": t}, f"{name}-{t}") for t in schema_type]
+            return self._add(name, " | ".join(options))
+        if schema_type == "object":
+            properties: Dict[str, Any] = schema.get("properties") or {}
+            if not properties:
+                return "object"
+            required: List[str] = schema.get("required") or list(properties)
+            parts: List[str] = []
+            for prop in [p for p in properties if p in required]:
+                rule = self.visit(properties[prop], f"{name}-{prop}")
+                parts.append(f'{_literal(prop)} ws ":" ws {rule}')
+            body = ' ws "," ws '.join(parts)
+            return self._add(name, f'"{{" ws {body} ws "}}"')
+        if schema_type == "array":
+            item = self.visit(schema.get("items") or {}, f"{name}-item")
+            return self._add(name, f'"[" ws ( {item} ( ws "," ws {item} ){{0,8}} ws )? "]"')
+        if schema_type in ("string", "number", "integer", "boolean", "null"):
+            return schema_type
+        return "value"
+
+
+@lru_cache(maxsize=32)
+def _compile(schema_json: str) -> str:
+    builder = _GrammarBuilder()
+    root = builder.visit(json.loads(schema_json), "root")
+    lines = [f"root ::= {root}"] if root != "root" else []
+    lines += [f"{name} ::= {body}" for name, body in builder.rules.items()]
+    lines += [f"{name} ::= {body}" for name, body in _BASE_RULES.items()]
+    return "\n".join(lines)
+
+
+def schema_to_gbnf(schema: Dict[str, Any]) -> str:
+    """Compile a (small subset of) JSON schema to a llama.cpp GBNF grammar.
+
+    Supports objects with fixed properties, enum/const, anyOf/oneOf, type
+    lists and the scalar types; anything else falls back to generic JSON.
+    Results are cached per schema.
+    """
+    return _compile(json.dumps(schema))
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from orja.llm.provider import ChatMessage, LLMProvider
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="orja-hedge")
+
+
+class HedgedProvider(LLMProvider):
+    """Races a local and a remote provider and keeps the first good answer.
+
+    The local call starts first. The remote one joins after ``hedge_after_sec``
+    if the local call has not answered yet, or right away when the delay is
+    0 (the evaluator set ``needs_cloud``). A reply marked
+    ``usage["fallback"]`` does not count as good while the other call may
+    still succeed. A losing call cannot be cancelled mid-request: blocking
+    calls run to completion in the background, and losing streams are
+    abandoned at their next chunk.
+    """
+
+    def __init__(self, local: LLMProvider, remote: LLMProvider, *, hedge_after_sec: float = 2.0) -> None:
+        self.local = local
+        self.remote = remote
+        self.hedge_after_sec = max(0.0, hedge_after_sec)
+
+    def _finish(
+        self,
+        usage: Optional[Dict[str, Any]],
+        winner: str,
+        counters: Dict[str, Any],
+        started: float,
+        hedged_at: Optional[float],
+    ) -> None:
+        if usage is None:
+            return
+        usage.update(counters)
+        usage["hedge_winner"] = winner
+        usage["hedged"] = hedged_at is not None
+        if hedged_at is not None:
+            usage["hedge_after_ms"] = round((hedged_at - started) * 1000, 1)
+
+    def generate(
+        self,
+        messages: List[ChatMessage],
+        *,
+        usage: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> str:
+        started = time.perf_counter()
+        counters: Dict[str, Dict[str, Any]] = {"local": {}, "remote": {}}
+        futures: Dict[Future, str] = {}
+
+        def submit(name: str) -> None:
+            provider = self.local if name == "local" else self.remote
+            futures[_executor.submit(provider.generate, messages, usage=counters[name], **kwargs)] = name
+
+        hedged_at: Optional[float] = None
+        if self.hedge_after_sec == 0:
+            hedged_at = started
+            submit("remote")
+        submit("local")
+        results: Dict[str, Tuple[Optional[str], bool]] = {}
+        pending = set(futures)
+        while pending:
+            timeout = None
+            if hedged_at is None:
+                timeout = max(0.0, self.hedge_after_sec - (time.perf_counter() - started))
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    text: Optional[str] = future.result()
+                except Exception as exc:  # pragma: no cover - providers catch their own errors
+                    logger.error("Hedged %s call failed: %s", name, exc)
+                    text = None
+                good = text is not None and not counters[name].get("fallback")
+                results[name] = (text, good)
+                if good:
+                    self._finish(usage, name, counters[name], started, hedged_at)
+                    return text
+            if hedged_at is None and "remote" not in results:
+                # Local is slow or failed: start the remote call.
+                hedged_at = time.perf_counter()
+                logger.info("Local model slow or failing after %.0f ms, hedging to cloud", (hedged_at - started) * 1000)
+                submit("remote")
+                pending = {future for future in futures if not future.done()}
+
+        # Neither answer was good; prefer whatever the local call produced.
+        for name in ("local", "remote"):
+            text, _ = results.get(name, (None, False))
+            if text is not None:
+                self._finish(usage, name, counters[name], started, hedged_at)
+                return text
+        if usage is not None:
+            usage["fallback"] = True
+        return "I could not get an answer right now. Please try again."
+
+    def generate_stream(
+        self,
+        messages: List[ChatMessage],
+        *,
+        usage: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        """Hedged streaming: the first provider to produce a good chunk wins the stream."""
+        started = time.perf_counter()
+        counters: Dict[str, Dict[str, Any]] = {"local": {}, "remote": {}}
+        events: "queue.Queue[Tuple[str, str, Optional[str]]]" = queue.Queue()
+        winner: List[str] = []
+        abandon = threading.Event()
+
+        def pump(name: str) -> None:
+            provider = self.local if name == "local" else self.remote
+            try:
+                for chunk in provider.generate_stream(messages, usage=counters[name], **kwargs):
+                    if abandon.is_set() or (winner and winner[0] != name):
+                        return
+                    kind = "fail" if counters[name].get("fallback") else "chunk"
+                    events.put((name, kind, chunk))
+                    if kind == "fail":
+                        return
+            except Exception as exc:  # pragma: no cover - providers catch their own errors
+                logger.error("Hedged %s stream failed: %s", name, exc)
+                events.put((name, "fail", None))
+                return
+            events.put((name, "end", None))
+
+        def start(name: str) -> None:
+            threading.Thread(target=pump, args=(name,), name=f"orja-hedge-{name}", daemon=True).start()
+
+        hedged_at: Optional[float] = None
+        if self.hedge_after_sec == 0:
+            hedged_at = started
+            start("remote")
+        start("local")
+        failed: Dict[str, Optional[str]] = {}
+        try:
+            while True:
+                timeout = None
+                if hedged_at is None:
+                    timeout = max(0.0, self.hedge_after_sec - (time.perf_counter() - started))
+                try:
+                    name, kind, chunk = events.get(timeout=timeout)
+                except queue.Empty:
+                    name, kind, chunk = "", "timeout", None
+                if kind in ("timeout", "fail") and hedged_at is None:
+                    hedged_at = time.perf_counter()
+                    logger.info("Local stream slow or failing after %.0f ms, hedging to cloud", (hedged_at - started) * 1000)
+                    start("remote")
+                if kind == "timeout" or (winner and name != winner[0]):
+                    continue
+                if kind == "fail":
+                    failed[name] = chunk
+                    if len(failed) == 2:
+                        name = "local" if failed.get("local") else "remote"
+                        self._finish(usage, name, counters[name], started, hedged_at)
+                        if usage is not None:
+                            usage["fallback"] = True
+                        yield failed[name] or "I could not get an answer right now. Please try again."
+                        return
+                    continue
+                if not winner:
+                    winner.append(name)
+                if kind == "end":
+                    self._finish(usage, name, counters[name], started, hedged_at)
+                    return
+                yield chunk
+        finally:
+            abandon.set()
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import http.client
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean a kept-alive socket was closed by the peer while idle.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class HttpStatusError(RuntimeError):
+    """Raised when the server answers with a non-2xx status."""
+
+    def __init__(self, status: int, reason: str, body: str) -> None:
+        super().__init__(f"Server HTTP error {status} {reason}: {body[:200]}")
+        self.status = status
+        self.body = body
+
+
+class HttpConnectionPool:
+    """Keep-alive ``http.client`` connections to a single host.
+
+    Idle connections are reused LIFO; a request that fails on a reused socket
+    is retried once on a fresh connection. Health is tracked passively from
+    request outcomes: ``healthy`` is None until the first request, True after
+    any response, False after a connection-level failure.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        *,
+        timeout: float = 45.0,
+        max_idle: int = 4,
+        https: bool = False,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.https = https
+        self.headers = headers or {}
+        self.healthy: Optional[bool] = None
+        self.last_ok: Optional[float] = None
+        self.consecutive_failures = 0
+        self.connects = 0
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _new_connection(self, timeout: float) -> http.client.HTTPConnection:
+        self.connects += 1
+        if self.https:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _acquire(self, timeout: float) -> tuple:
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            return self._new_connection(timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _release(self, conn: http.client.HTTPConnection, response: http.client.HTTPResponse) -> None:
+        if response.will_close:
+            conn.close()
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _mark_ok(self) -> None:
+        self.healthy = True
+        self.last_ok = time.monotonic()
+        self.consecutive_failures = 0
+
+    def _mark_failed(self) -> None:
+        self.healthy = False
+        self.consecutive_failures += 1
+
+    def _open(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]],
+        timeout: float,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> tuple:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {**self.headers, **(extra_headers or {})}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        for attempt in range(2):
+            conn, reused = self._acquire(timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+            except _STALE_CONNECTION_ERRORS as exc:
+                conn.close()
+                if reused and attempt == 0:
+                    logger.debug("Stale keep-alive connection to %s:%s, reconnecting", self.host, self.port)
+                    continue
+                self._mark_failed()
+                raise ConnectionError(f"Connection to {self.host}:{self.port} failed: {exc}") from exc
+            except OSError:
+                conn.close()
+                self._mark_failed()
+                raise
+            self._mark_ok()
+            return conn, response
+        raise ConnectionError(f"Connection to {self.host}:{self.port} failed")  # pragma: no cover
+
+    def request_json(
+        self,
+        method: str,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        *,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Send a request and decode the JSON response body."""
+        conn, response = self._open(method, path, payload, timeout or self.timeout)
+        try:
+            raw = response.read()
+        except OSError:
+            conn.close()
+            self._mark_failed()
+            raise
+        self._release(conn, response)
+        text = raw.decode("utf-8", errors="replace")
+        if response.status >= 400:
+            raise HttpStatusError(response.status, response.reason, text)
+        return json.loads(text) if text else None
+
+    def stream_events(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        *,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """POST and return an iterator of decoded server-sent ``data:`` events.
+
+        The request is sent eagerly so connection errors surface here. The
+        connection goes back to the pool only if the stream is consumed to the
+        end; abandoning the iterator closes it.
+        """
+        conn, response = self._open(
+            "POST", path, payload, timeout or self.timeout, {"Accept": "text/event-stream"}
+        )
+        if response.status >= 400:
+            text = response.read().decode("utf-8", errors="replace")
+            self._release(conn, response)
+            raise HttpStatusError(response.status, response.reason, text)
+        return self._iter_events(conn, response)
+
+    def _iter_events(
+        self, conn: http.client.HTTPConnection, response: http.client.HTTPResponse
+    ) -> Iterator[Dict[str, Any]]:
+        finished = False
+        try:
+            for raw_line in response:
+                line = raw_line.decode("utf-8").strip()
+                if line.startswith("error:"):
+                    raise RuntimeError(f"Server stream error: {line[len('error:'):].strip()}")
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    break
+                yield json.loads(data)
+            response.read()
+            finished = True
+            self._release(conn, response)
+        finally:
+            if not finished:
+                conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
@@ -18,8 +18,13 @@ class PlaceholderProvider(LLMProvider):
         temperature=None,
         top_p=None,
         json_mode=None,
+        json_schema=None,
+        stop=None,
+        prompt_key=None,
+        timeout=None,
+        usage=None,
     ) -> str:
-        _ = (system_prompt, max_tokens, temperature, top_p, json_mode)
+        _ = (system_prompt, max_tokens, temperature, top_p, json_mode, json_schema, stop, prompt_key, timeout, usage)
         user_msg = messages[-1].content if messages else "tuntematon kysymys"
         safe_prompt = shorten(user_msg, width=240, placeholder="...")
         return (
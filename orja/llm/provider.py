@@ -1,7 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) for when no tokenizer is available."""
+    return (len(text) + 3) // 4
 
 
 class ChatMessage:
@@ -12,6 +20,66 @@ class ChatMessage:
         self.content = content
 
 
+@dataclass
+class GenerationRequest:
+    """One item of a generate_batch() call; fields mirror generate() arguments."""
+
+    messages: List[ChatMessage]
+    system_prompt: Optional[str] = None
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    top_p: Optional[float] = None
+    json_mode: Optional[bool] = None
+    json_schema: Optional[Dict[str, Any]] = None
+    stop: Optional[List[str]] = None
+    prompt_key: Optional[str] = None
+
+    def options(self) -> Dict[str, Any]:
+        return {
+            "system_prompt": self.system_prompt,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "json_mode": self.json_mode,
+            "json_schema": self.json_schema,
+            "stop": self.stop,
+            "prompt_key": self.prompt_key,
+        }
+
+
+@dataclass
+class GenerationResult:
+    """Outcome of one batch item; error is set instead of raising."""
+
+    text: Optional[str]
+    error: Optional[str] = None
+    usage: Dict[str, Any] = field(default_factory=dict)
+    latency_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def batch_usage(results: Sequence[GenerationResult], elapsed_sec: float) -> Dict[str, Any]:
+    """Aggregate counters for a batch; tokens fall back to an estimate when unreported."""
+    tokens = 0
+    for result in results:
+        if not result.ok:
+            continue
+        if "tokens_predicted" in result.usage:
+            tokens += int(result.usage["tokens_predicted"])
+        elif result.text:
+            tokens += estimate_tokens(result.text)
+    return {
+        "items": len(results),
+        "errors": sum(1 for result in results if not result.ok),
+        "tokens_predicted": tokens,
+        "elapsed_sec": round(elapsed_sec, 3),
+        "tokens_per_sec": round(tokens / elapsed_sec, 2) if elapsed_sec > 0 else 0.0,
+    }
+
+
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
 
@@ -25,10 +93,159 @@ class LLMProvider(ABC):
         temperature: Optional[float] = None,
         top_p: Optional[float] = None,
         json_mode: Optional[bool] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
     ) -> str:
-        """Generate a response from a list of messages."""
+        """Generate a response from a list of messages.
+
+        With json_mode, backends that support constrained decoding restrict
+        output to JSON (matching json_schema when given). stop lists extra
+        strings that end generation early. timeout caps the seconds the call
+        may take (the caller's remaining deadline); backends use the lower of
+        it and their own configured timeout. prompt_key names
+        the prompt family (a PromptLoader key) the request belongs to;
+        backends may use it for cache affinity. When a usage dict is passed,
+        backends fill it with whatever counters they report, and set
+        ``usage["fallback"]`` when the text is a canned error reply.
+        """
         raise NotImplementedError
 
+    async def agenerate(
+        self,
+        messages: List[ChatMessage],
+        *,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        json_mode: Optional[bool] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Async generate(); backends without a native client run it in a worker thread."""
+        return await asyncio.to_thread(
+            self.generate,
+            messages,
+            system_prompt=system_prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            json_mode=json_mode,
+            json_schema=json_schema,
+            stop=stop,
+            prompt_key=prompt_key,
+            timeout=timeout,
+            usage=usage,
+        )
+
+    def generate_stream(
+        self,
+        messages: List[ChatMessage],
+        *,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        json_mode: Optional[bool] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        stop: Optional[List[str]] = None,
+        prompt_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        """Yield the response in chunks as they are produced.
+
+        Backends without native streaming yield the full response once.
+        """
+        yield self.generate(
+            messages,
+            system_prompt=system_prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            json_mode=json_mode,
+            json_schema=json_schema,
+            stop=stop,
+            prompt_key=prompt_key,
+            timeout=timeout,
+            usage=usage,
+        )
+
+    def generate_batch(
+        self,
+        requests: Sequence[GenerationRequest],
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> List[GenerationResult]:
+        """Generate every request; results come back in request order.
+
+        A failing item gets GenerationResult.error instead of aborting the
+        batch. usage receives batch_usage() totals. This default runs the
+        items one after another; backends that decode in parallel override it.
+        """
+        started = time.perf_counter()
+        results = [self._generate_item(request) for request in requests]
+        if usage is not None:
+            usage.update(batch_usage(results, time.perf_counter() - started))
+        return results
+
+    def _generate_item(
+        self, request: GenerationRequest, generate: Optional[Callable[..., str]] = None
+    ) -> GenerationResult:
+        item_usage: Dict[str, Any] = {}
+        started = time.perf_counter()
+        try:
+            text = (generate or self.generate)(request.messages, **request.options(), usage=item_usage)
+        except Exception as exc:
+            return GenerationResult(
+                text=None,
+                error=str(exc) or type(exc).__name__,
+                usage=item_usage,
+                latency_ms=(time.perf_counter() - started) * 1000,
+            )
+        return GenerationResult(
+            text=text,
+            error="fallback" if item_usage.get("fallback") else None,
+            usage=item_usage,
+            latency_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    def count_tokens(self, text: str) -> int:
+        """Number of tokens text encodes to; backends without a tokenizer estimate."""
+        return estimate_tokens(text)
+
+    def embed(self, text: str) -> Optional[List[float]]:
+        """Embedding vector for text, or None when the backend has no embedding model."""
+        _ = text
+        return None
+
+    def warm_up(self, system_prompts: Dict[str, str]) -> None:
+        """Prime the backend with each prompt family's system prompt; no-op by default."""
+        _ = system_prompts
+
+    def render_prompt(
+        self,
+        messages: List[ChatMessage],
+        *,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        """The prompt text as this backend would send it (used for cache keys)."""
+        _ = max_tokens
+        lines = [f"system: {system_prompt or ''}"]
+        lines += [f"{message.role}: {message.content}" for message in messages]
+        return "\n".join(lines)
+
+    @property
+    def model_name(self) -> str:
+        """Identifies the model behind this provider (part of cache keys)."""
+        return type(self).__name__
+
 
 class ProviderFactory:
     """Factory for creating LLM providers based on configuration."""
@@ -45,5 +262,8 @@ class ProviderFactory:
             from orja.llm.placeholder import PlaceholderProvider
 
             return PlaceholderProvider()
-        raise ValueError(f"Unknown LLM backend: {backend}")
+        if backend == "cloud":
+            from orja.llm.cloud import CloudLLM
 
+            return CloudLLM(config.get("cloud", {}))
+        raise ValueError(f"Unknown LLM backend: {backend}")
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import atexit
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from orja.llm.provider import LLMProvider, ProviderFactory
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "default"
+# KV cache, compute buffers and server runtime on top of the weights, for models without ram_mb.
+RUNTIME_OVERHEAD_MB = 150.0
+
+
+def estimate_ram_mb(model_path: str, configured: Optional[float] = None) -> float:
+    """Resident size of a llama-server for a GGUF file: configured ram_mb, else file size + overhead."""
+    if configured:
+        return float(configured)
+    try:
+        return Path(model_path).stat().st_size / (1024 * 1024) + RUNTIME_OVERHEAD_MB
+    except OSError:
+        return RUNTIME_OVERHEAD_MB
+
+
+class ModelRegistry:
+    """Maps evaluator difficulty to one of several local GGUF models.
+
+    The base provider (``llm.llama_cpp.model_path``) is registered as
+    "default" and stays resident, since the evaluator and router use it on
+    every turn. Models listed in ``llm.llama_cpp.models`` get their own
+    llama-server on their own port and are started on first use. If loading
+    one would exceed ``ram_budget_mb``, idle extra models are stopped in
+    least-recently-used order first; a model handed out by provider_for()
+    is pinned until release() and never picked for unloading. A model that
+    still does not fit is skipped for that turn, which then stays on the
+    default model.
+    """
+
+    def __init__(self, base: LLMProvider, llm_config: Dict[str, Any]) -> None:
+        self.base = base
+        self.llm_config = llm_config
+        llama_config = llm_config.get("llama_cpp", {})
+        self.tiers: Dict[str, str] = dict(llama_config.get("tiers") or {})
+        self.ram_budget_mb = float(llama_config.get("ram_budget_mb") or 0)  # 0: no limit
+        self.specs: Dict[str, Dict[str, Any]] = {
+            spec["name"]: spec for spec in llama_config.get("models") or [] if spec.get("name")
+        }
+        self.enabled = bool(self.specs) and (
+            llm_config.get("backend") == "llama_cpp_cli"
+            and llama_config.get("server", {}).get("enabled", False)
+        )
+        if self.specs and not self.enabled:
+            logger.warning("Model tiers need the llama_cpp_cli backend with llama-server; using one model")
+        self._providers: Dict[str, LLMProvider] = {}
+        self._resident: "OrderedDict[str, float]" = OrderedDict()
+        self._pins: Dict[str, int] = {}  # turns holding each model, see provider_for()
+        self._resident[DEFAULT_MODEL] = estimate_ram_mb(
+            llama_config.get("model_path", ""), llama_config.get("ram_mb")
+        )
+        self._latency: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        if self.enabled:
+            atexit.register(self.close)
+
+    def model_for(self, difficulty: str) -> str:
+        name = self.tiers.get(difficulty, DEFAULT_MODEL)
+        if name != DEFAULT_MODEL and (not self.enabled or name not in self.specs):
+            return DEFAULT_MODEL
+        return name
+
+    def provider_for(self, difficulty: str, timeout: Optional[float] = None) -> Tuple[str, LLMProvider]:
+        """(model name, provider) for a turn of the given difficulty.
+
+        timeout bounds the wait for a cold model to load; if it is not ready
+        by then the turn stays on the default model while it keeps loading.
+        The returned model is pinned against unloading; pass its name to
+        release() once the turn is done with it.
+        """
+        name = self.model_for(difficulty)
+        if name == DEFAULT_MODEL:
+            return DEFAULT_MODEL, self.base
+        provider = self._acquire(name, timeout)
+        if provider is None:
+            return DEFAULT_MODEL, self.base
+        return name, provider
+
+    def release(self, name: str) -> None:
+        """Unpin a model returned by provider_for()."""
+        if name == DEFAULT_MODEL:
+            return
+        with self._lock:
+            self._unpin(name)
+
+    def _unpin(self, name: str) -> None:
+        pins = self._pins.get(name, 0) - 1
+        if pins > 0:
+            self._pins[name] = pins
+        else:
+            self._pins.pop(name, None)
+
+    def _build(self, name: str) -> LLMProvider:
+        spec = self.specs[name]
+        config = copy.deepcopy(self.llm_config)
+        llama_config = config.setdefault("llama_cpp", {})
+        for key in ("model_path", "ctx_size", "threads"):
+            if spec.get(key) is not None:
+                llama_config[key] = spec[key]
+        server = llama_config.setdefault("server", {})
+        # Loaded in the background so a turn waits for it no longer than its deadline.
+        server.update(
+            port=int(spec["port"]), instances=int(spec.get("instances", 1)), autostart=False, background_start=True
+        )
+        llama_config["embedding"] = {"enabled": False}
+        return ProviderFactory.create_provider(config)
+
+    def _acquire(self, name: str, timeout: Optional[float] = None) -> Optional[LLMProvider]:
+        # Victims are chosen and the new model reserved and pinned under the lock;
+        # stopping and starting servers happens outside it, so other turns are not
+        # held up. The pin stops another turn from unloading the model before this
+        # one has sent its request (server_in_flight is still 0 until then).
+        victims: List[Tuple[str, LLMProvider]] = []
+        with self._lock:
+            provider = self._providers.get(name)
+            loading = name not in self._resident
+            if not loading:
+                self._resident.move_to_end(name)
+            else:
+                provider, victims = self._reserve(name)
+                if provider is None:
+                    return None
+            self._pins[name] = self._pins.get(name, 0) + 1
+        for victim, victim_provider in victims:
+            victim_provider.stop_servers()
+        if loading:
+            try:
+                provider.start_servers()
+            except Exception:
+                with self._lock:
+                    self._resident.pop(name, None)
+                    self._unpin(name)
+                raise
+        if not provider.wait_servers_ready(timeout):
+            logger.warning("Model %s not ready (loading or failed); staying on %s", name, DEFAULT_MODEL)
+            self.release(name)
+            return None
+        return provider
+
+    def _reserve(self, name: str) -> Tuple[Optional[LLMProvider], List[Tuple[str, LLMProvider]]]:
+        """Pick the models to unload for name and mark it resident; call with the lock held.
+
+        Returns (provider, victims to stop), or (None, []) if it does not fit.
+        """
+        need = estimate_ram_mb(self.specs[name].get("model_path", ""), self.specs[name].get("ram_mb"))
+        used = sum(self._resident.values())
+        victims: List[Tuple[str, LLMProvider]] = []
+        if self.ram_budget_mb:
+            for victim in self._resident:
+                if used + need <= self.ram_budget_mb:
+                    break
+                if victim == DEFAULT_MODEL or self._pins.get(victim):
+                    continue
+                if getattr(self._providers[victim], "server_in_flight", 0):
+                    continue
+                victims.append((victim, self._providers[victim]))
+                used -= self._resident[victim]
+            if used + need > self.ram_budget_mb:
+                logger.warning(
+                    "Model %s needs %.0f MB but only %.0f of %.0f MB are free; staying on %s",
+                    name,
+                    need,
+                    self.ram_budget_mb - used,
+                    self.ram_budget_mb,
+                    DEFAULT_MODEL,
+                )
+                return None, []
+
+        for victim, _ in victims:
+            logger.info("Unloading model %s (%.0f MB) to fit %s", victim, self._resident.pop(victim), name)
+        provider = self._providers.get(name)
+        if provider is None:
+            provider = self._providers[name] = self._build(name)
+        logger.info("Loading model %s (%.0f MB, %.0f MB resident)", name, need, used + need)
+        self._resident[name] = need
+        return provider, victims
+
+    def record(self, difficulty: str, model: str, latency_ms: float) -> None:
+        """Track per-tier latency and log the running average."""
+        with self._lock:
+            count, total = self._latency.get((difficulty, model), (0, 0.0))
+            count, total = count + 1, total + latency_ms
+            self._latency[(difficulty, model)] = (count, total)
+        logger.info(
+            "Tier %s on %s: %.1f ms (avg %.1f ms over %d turns)",
+            difficulty,
+            model,
+            latency_ms,
+            total / count,
+            count,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "resident": dict(self._resident),
+                "ram_budget_mb": self.ram_budget_mb,
+                "latency": {
+                    f"{difficulty}/{model}": {"turns": count, "avg_ms": round(total / count, 1)}
+                    for (difficulty, model), (count, total) in self._latency.items()
+                },
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            providers = [self._providers[name] for name in self._resident if name != DEFAULT_MODEL]
+            self._resident = OrderedDict((k, v) for k, v in self._resident.items() if k == DEFAULT_MODEL)
+        for provider in providers:
+            provider.stop_servers()
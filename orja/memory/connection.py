@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# WAL lets readers run alongside the writer and turns each commit into an
+# append to the -wal file; with synchronous=NORMAL the file is only fsynced at
+# checkpoints, so a power cut can lose the last commits but never corrupts
+# the database. WAL needs a local filesystem (not NFS/SMB shares).
+# auto_vacuum only takes effect on a new database (or after a full VACUUM);
+# INCREMENTAL lets maintenance hand free pages back in small slices.
+DEFAULT_OPTIONS: Dict[str, Any] = {
+    "persistent_connections": True,
+    "auto_vacuum": "INCREMENTAL",
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size_kb": 8192,
+    "busy_timeout_ms": 5000,
+    "statement_cache": 128,
+}
+
+_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SYNCHRONOUS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+_AUTO_VACUUM = {"NONE", "FULL", "INCREMENTAL"}
+
+
+class ConnectionManager:
+    """Long-lived SQLite connections, one per thread.
+
+    Each thread that touches the database gets its own connection, opened
+    once with the configured pragmas and kept for the life of the thread;
+    connections of threads that have exited are closed when the next one is
+    opened. sqlite3 keeps up to ``statement_cache`` prepared statements per
+    connection keyed by SQL text, so callers that use constant SQL strings
+    skip re-parsing. ``persistent_connections: false`` restores a fresh
+    connection per operation (used by the benchmark as the baseline).
+    """
+
+    def __init__(self, db_path: Path, options: Optional[Dict[str, Any]] = None) -> None:
+        self.db_path = db_path
+        self.options = {**DEFAULT_OPTIONS, **(options or {})}
+        self.persistent = bool(self.options["persistent_connections"])
+        journal_mode = str(self.options["journal_mode"]).upper()
+        synchronous = str(self.options["synchronous"]).upper()
+        auto_vacuum = str(self.options["auto_vacuum"]).upper()
+        if journal_mode not in _JOURNAL_MODES:
+            raise ValueError(f"Unknown database.journal_mode: {journal_mode}")
+        if synchronous not in _SYNCHRONOUS:
+            raise ValueError(f"Unknown database.synchronous: {synchronous}")
+        if auto_vacuum not in _AUTO_VACUUM:
+            raise ValueError(f"Unknown database.auto_vacuum: {auto_vacuum}")
+        self.auto_vacuum = auto_vacuum
+        self.pragmas: List[Tuple[str, Any]] = [
+            # Before journal_mode: switching to WAL writes the header of a new file.
+            ("auto_vacuum", auto_vacuum),
+            ("journal_mode", journal_mode),
+            ("synchronous", synchronous),
+            ("cache_size", -int(self.options["cache_size_kb"])),  # negative: KiB
+            ("busy_timeout", int(self.options["busy_timeout_ms"])),
+            ("temp_store", "MEMORY"),
+        ]
+        self.opened = 0
+        self._local = threading.local()
+        self._connections: List[Tuple[threading.Thread, sqlite3.Connection]] = []
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=int(self.options["statement_cache"]),
+        )
+        if self.persistent:
+            for name, value in self.pragmas:
+                conn.execute(f"PRAGMA {name}={value}")
+        self.opened += 1
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._lock:
+                self._prune()
+                self._connections.append((threading.current_thread(), conn))
+        return conn
+
+    def _prune(self) -> None:
+        """Close connections left behind by finished threads; caller holds the lock."""
+        alive = []
+        for thread, conn in self._connections:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            else:
+                conn.close()
+        self._connections = alive
+
+    @contextmanager
+    def _use(self) -> Iterator[sqlite3.Connection]:
+        if self.persistent:
+            yield self.connection()
+            return
+        conn = self._open()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Connection inside a transaction: committed on success, rolled back on error."""
+        with self._use() as conn:
+            with conn:
+                yield conn
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """Run one write statement in its own transaction; returns lastrowid."""
+        with self.transaction() as conn:
+            return conn.execute(sql, params).lastrowid or 0
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        with self._use() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        """Close every connection (all threads); later calls reopen lazily."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for _, conn in connections:
+            conn.close()
+        self._local = threading.local()
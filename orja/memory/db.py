@@ -1,10 +1,179 @@
 from __future__ import annotations
 
+import json
+import logging
 import sqlite3
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from orja.memory.connection import ConnectionManager
+from orja.memory.session_cache import SessionHistoryCache
+
+logger = logging.getLogger(__name__)
+
+# Constant SQL text so each connection's statement cache reuses the prepared statement.
+_INSERT_MESSAGE = "INSERT INTO messages (timestamp_utc, role, content, session_id) VALUES (?, ?, ?, ?)"
+_INSERT_EVENT = """
+    INSERT INTO pipeline_events (
+        timestamp_utc,
+        session_id,
+        step_name,
+        input_summary,
+        output_json,
+        success,
+        latency_ms,
+        metrics_json
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_RECENT_MESSAGES = (
+    "SELECT id, timestamp_utc, role, content, session_id FROM messages ORDER BY id DESC LIMIT ?"
+)
+_RECENT_SESSION_MESSAGES = (
+    "SELECT id, timestamp_utc, role, content, session_id FROM messages "
+    "WHERE session_id = ? "
+    "ORDER BY id DESC LIMIT ?"
+)
+_SESSION_MESSAGES_AFTER = (
+    "SELECT id, timestamp_utc, role, content, session_id FROM messages "
+    "WHERE session_id = ? AND id > ? "
+    "ORDER BY id ASC LIMIT ?"
+)
+_GET_SUMMARY = (
+    "SELECT session_id, summary, covered_message_id, updated_utc FROM session_summaries WHERE session_id = ?"
+)
+_SAVE_SUMMARY = (
+    "INSERT OR REPLACE INTO session_summaries (session_id, summary, covered_message_id, updated_utc) "
+    "VALUES (?, ?, ?, ?)"
+)
+_RECENT_EVENT_METRICS = (
+    "SELECT metrics_json FROM pipeline_events "
+    "WHERE step_name = ? AND success = 1 AND metrics_json IS NOT NULL "
+    "ORDER BY id DESC LIMIT ?"
+)
+
+
+def _create_base_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp_utc TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            session_id TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS pipeline_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp_utc TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            step_name TEXT NOT NULL,
+            input_summary TEXT,
+            output_json TEXT,
+            success INTEGER NOT NULL,
+            latency_ms REAL,
+            metrics_json TEXT
+        )
+        """
+    )
+    # Databases created before metrics were recorded lack the column.
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(pipeline_events)")}
+    if "metrics_json" not in columns:
+        conn.execute("ALTER TABLE pipeline_events ADD COLUMN metrics_json TEXT")
+
+
+def _add_query_indexes(conn: sqlite3.Connection) -> None:
+    # History fetch: WHERE session_id = ? ORDER BY id DESC.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id)")
+    # Per-session step lookups and time-range scans over events.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_pipeline_events_session_step "
+        "ON pipeline_events (session_id, step_name, timestamp_utc)"
+    )
+    # Token budget lookups: WHERE step_name = ? ... ORDER BY id DESC.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pipeline_events_step ON pipeline_events (step_name, id)")
+
+
+def _add_event_rollups(conn: sqlite3.Connection) -> None:
+    # Hourly per-step aggregates kept after raw events pass their retention.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS pipeline_event_rollups (
+            hour_utc TEXT NOT NULL,
+            step_name TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            successes INTEGER NOT NULL,
+            latency_avg_ms REAL,
+            latency_p50_ms REAL,
+            latency_p95_ms REAL,
+            latency_p99_ms REAL,
+            latency_max_ms REAL,
+            PRIMARY KEY (hour_utc, step_name)
+        )
+        """
+    )
+    # Rollup and retention scan events by time.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pipeline_events_time ON pipeline_events (timestamp_utc)")
+
+
+def _add_session_summaries(conn: sqlite3.Connection) -> None:
+    # Running summary per session, covering messages up to covered_message_id.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS session_summaries (
+            session_id TEXT PRIMARY KEY,
+            summary TEXT NOT NULL,
+            covered_message_id INTEGER NOT NULL,
+            updated_utc TEXT NOT NULL
+        )
+        """
+    )
+
+
+# Schema history, applied in order; PRAGMA user_version records the last one
+# applied. Append new steps, never edit or reorder released ones.
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "messages and pipeline_events tables", _create_base_tables),
+    (2, "indexes for history and event lookups", _add_query_indexes),
+    (3, "hourly pipeline event rollups", _add_event_rollups),
+    (4, "session summaries", _add_session_summaries),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Bring the database up to SCHEMA_VERSION; returns the version it started at.
+
+    All pending steps run in one IMMEDIATE transaction, so a failed step leaves
+    the schema untouched and two processes starting together migrate once.
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {current} is newer than this orja supports ({SCHEMA_VERSION})"
+        )
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        started = time.perf_counter()
+        step(conn)
+        logger.info(
+            "Applied database migration %d (%s) in %.0f ms",
+            version,
+            description,
+            (time.perf_counter() - started) * 1000,
+        )
+    if current < SCHEMA_VERSION:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return current
 
 
 @dataclass
@@ -14,57 +183,62 @@ class Message:
     role: str
     content: str
     session_id: str
+    # History line as agents see it, formatted once per message.
+    line: str = field(default="", repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not self.line:
+            self.line = f"{self.role}: {self.content}"
+
+
+@dataclass
+class SessionSummary:
+    session_id: str
+    summary: str
+    covered_message_id: int
+    updated_utc: str
 
 
 class MemoryStore:
-    def __init__(self, db_path: Path) -> None:
+    """Conversation messages and pipeline events in SQLite.
+
+    options are the ``database`` config keys understood by ConnectionManager
+    (journal mode, synchronous, cache size, persistent connections). The
+    schema is brought up to date with migrate() when the store opens.
+    ``history_cache`` keeps each active session's latest messages in memory
+    (SessionHistoryCache) so per-session history reads skip SQLite.
+    """
+
+    def __init__(self, db_path: Path, options: Optional[Dict[str, Any]] = None) -> None:
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = ConnectionManager(db_path, options)
+        cache_cfg = (options or {}).get("history_cache", {})
+        self.history_cache: Optional[SessionHistoryCache] = None
+        if cache_cfg.get("enabled", True):
+            self.history_cache = SessionHistoryCache(
+                max_sessions=int(cache_cfg.get("max_sessions", 32)),
+                max_messages=int(cache_cfg.get("max_messages", 50)),
+            )
         self._ensure_tables()
 
-    def _get_connection(self) -> sqlite3.Connection:
-        return sqlite3.connect(self.db_path, check_same_thread=False)
-
     def _ensure_tables(self) -> None:
-        with self._get_connection() as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp_utc TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    session_id TEXT NOT NULL
-                )
-                """
-            )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS pipeline_events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp_utc TEXT NOT NULL,
-                    session_id TEXT NOT NULL,
-                    step_name TEXT NOT NULL,
-                    input_summary TEXT,
-                    output_json TEXT,
-                    success INTEGER NOT NULL,
-                    latency_ms REAL
-                )
-                """
-            )
-            conn.commit()
+        with self.db.transaction() as conn:
+            migrate(conn)
+
+    def schema_version(self) -> int:
+        return self.db.query("PRAGMA user_version")[0][0]
 
     def add_message(self, role: str, content: str, session_id: str, timestamp: datetime) -> None:
         iso_ts = timestamp.isoformat()
-        with self._get_connection() as conn:
-            conn.execute(
-                "INSERT INTO messages (timestamp_utc, role, content, session_id) VALUES (?, ?, ?, ?)",
-                (iso_ts, role, content, session_id),
+        message_id = self.db.execute(_INSERT_MESSAGE, (iso_ts, role, content, session_id))
+        if self.history_cache is not None:
+            self.history_cache.append(
+                Message(id=message_id, timestamp_utc=iso_ts, role=role, content=content, session_id=session_id)
             )
-            conn.commit()
 
-    def add_pipeline_event(
-        self,
+    @staticmethod
+    def pipeline_event_row(
         *,
         session_id: str,
         step_name: str,
@@ -73,49 +247,45 @@ class MemoryStore:
         success: bool,
         latency_ms: float | None,
         timestamp: datetime,
-    ) -> None:
-        iso_ts = timestamp.isoformat()
-        with self._get_connection() as conn:
-            conn.execute(
-                """
-                INSERT INTO pipeline_events (
-                    timestamp_utc,
-                    session_id,
-                    step_name,
-                    input_summary,
-                    output_json,
-                    success,
-                    latency_ms
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    iso_ts,
-                    session_id,
-                    step_name,
-                    input_summary,
-                    output_json,
-                    1 if success else 0,
-                    latency_ms,
-                ),
-            )
-            conn.commit()
+        metrics: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Any, ...]:
+        """Column values of one pipeline_events row, in _INSERT_EVENT order."""
+        metrics_json = json.dumps(metrics, ensure_ascii=False) if metrics else None
+        return (
+            timestamp.isoformat(),
+            session_id,
+            step_name,
+            input_summary,
+            output_json,
+            1 if success else 0,
+            latency_ms,
+            metrics_json,
+        )
+
+    def add_pipeline_event(self, **fields: Any) -> None:
+        """Insert one event right away; fields as for pipeline_event_row()."""
+        self.db.execute(_INSERT_EVENT, self.pipeline_event_row(**fields))
+
+    def add_pipeline_events(self, rows: Sequence[Tuple[Any, ...]]) -> None:
+        """Insert rows from pipeline_event_row() with one executemany and one commit."""
+        if not rows:
+            return
+        with self.db.transaction() as conn:
+            conn.executemany(_INSERT_EVENT, rows)
 
     def recent_messages(self, limit: int = 20, session_id: str | None = None) -> List[Message]:
-        with self._get_connection() as conn:
-            if session_id:
-                cursor = conn.execute(
-                    "SELECT id, timestamp_utc, role, content, session_id FROM messages "
-                    "WHERE session_id = ? "
-                    "ORDER BY id DESC LIMIT ?",
-                    (session_id, limit),
-                )
-            else:
-                cursor = conn.execute(
-                    "SELECT id, timestamp_utc, role, content, session_id FROM messages "
-                    "ORDER BY id DESC LIMIT ?",
-                    (limit,),
-                )
-            rows = cursor.fetchall()
+        """Latest messages, newest first; per-session reads go through the history cache."""
+        if session_id and self.history_cache is not None:
+            return self.history_cache.recent(session_id, limit, self._load_session_messages)
+        if session_id:
+            return self._load_session_messages(session_id, limit)
+        return self._messages(self.db.query(_RECENT_MESSAGES, (limit,)))
+
+    def _load_session_messages(self, session_id: str, limit: int) -> List[Message]:
+        return self._messages(self.db.query(_RECENT_SESSION_MESSAGES, (session_id, limit)))
+
+    @staticmethod
+    def _messages(rows: List[Tuple[Any, ...]]) -> List[Message]:
         return [
             Message(
                 id=row[0],
@@ -127,3 +297,33 @@ class MemoryStore:
             for row in rows
         ]
 
+    def session_messages_after(self, session_id: str, after_id: int, limit: int) -> List[Message]:
+        """Messages of a session with id above after_id, oldest first."""
+        return self._messages(self.db.query(_SESSION_MESSAGES_AFTER, (session_id, after_id, limit)))
+
+    def session_summary(self, session_id: str) -> Optional[SessionSummary]:
+        rows = self.db.query(_GET_SUMMARY, (session_id,))
+        return SessionSummary(*rows[0]) if rows else None
+
+    def save_session_summary(
+        self, session_id: str, summary: str, covered_message_id: int, timestamp: datetime
+    ) -> SessionSummary:
+        saved = SessionSummary(session_id, summary, covered_message_id, timestamp.isoformat())
+        self.db.execute(_SAVE_SUMMARY, (saved.session_id, saved.summary, saved.covered_message_id, saved.updated_utc))
+        return saved
+
+    def recent_event_metrics(self, step_name: str, limit: int = 200) -> List[Dict[str, Any]]:
+        """Decoded metrics of the latest successful events of one step, newest first."""
+        rows = self.db.query(_RECENT_EVENT_METRICS, (step_name, limit))
+        metrics: List[Dict[str, Any]] = []
+        for (raw,) in rows:
+            try:
+                decoded = json.loads(raw)
+            except (TypeError, ValueError):
+                continue
+            if isinstance(decoded, dict):
+                metrics.append(decoded)
+        return metrics
+
+    def close(self) -> None:
+        self.db.close()
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from orja.memory.db import MemoryStore
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop", "sample", "block")
+# Session id and step name of the writer's own periodic stats events.
+STATS_SESSION_ID = "system"
+STATS_STEP_NAME = "event_writer"
+_STOP = object()
+
+
+class EventWriter:
+    """Writes pipeline_events rows on a background thread in group commits.
+
+    Callers submit() rows built by MemoryStore.pipeline_event_row() into a
+    bounded queue and return at once. The writer thread collects up to
+    ``batch_size`` rows, or whatever arrived within ``flush_interval_sec``,
+    and inserts them with one executemany and one commit. When the disk falls
+    behind and the queue fills, ``overflow`` decides:
+
+    - drop: new events are discarded while the queue is full;
+    - sample: once the queue is half full only every ``sample_every``-th
+      event is kept (failed steps always are), full means drop;
+    - block: the caller waits up to ``block_timeout_sec`` for room, then drops.
+
+    Every ``stats_interval_sec`` in which events arrived, the writer records
+    its own health as an "event_writer" pipeline event (queue depth, drops,
+    batch write latency for the interval; success is False if anything was
+    dropped or failed), so it shows up in the hourly rollups and in
+    ``orja maintain``. close() (also run at exit) flushes whatever is still queued.
+    """
+
+    def __init__(
+        self,
+        store: MemoryStore,
+        *,
+        max_queue: int = 1000,
+        batch_size: int = 64,
+        flush_interval_sec: float = 0.5,
+        overflow: str = "drop",
+        sample_every: int = 10,
+        block_timeout_sec: float = 1.0,
+        stats_interval_sec: float = 300.0,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown event writer overflow policy: {overflow}")
+        self.store = store
+        self.max_queue = max(1, max_queue)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_sec = max(0.0, flush_interval_sec)
+        self.overflow = overflow
+        self.sample_every = max(1, sample_every)
+        self.block_timeout_sec = max(0.0, block_timeout_sec)
+        self.stats_interval_sec = max(0.0, stats_interval_sec)  # 0: no stats events
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=self.max_queue)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        # Held from the closed check to the enqueue, and by close() around
+        # queueing _STOP, so no row can land behind _STOP. Separate from _lock
+        # because a "block" submit may wait here for room.
+        self._submit_lock = threading.Lock()
+        self._pending = 0  # submitted but not yet committed
+        self._seen_under_pressure = 0
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.failed = 0
+        self.batches = 0
+        self.write_ms_total = 0.0
+        self.write_ms_max = 0.0
+        self.max_depth = 0
+        self._interval_max_depth = 0
+        self._interval_write_ms_max = 0.0
+        self._reported: Dict[str, Any] = {}
+        self._report_at = time.monotonic() + self.stats_interval_sec
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="orja-event-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # -- producer side ------------------------------------------------------
+
+    def submit(self, row: Tuple[Any, ...]) -> bool:
+        """Queue one pipeline_events row; False if the overflow policy discarded it."""
+        with self._submit_lock:
+            if not self._closed:
+                return self._enqueue(row)
+        self.store.add_pipeline_events([row])
+        return True
+
+    def _enqueue(self, row: Tuple[Any, ...]) -> bool:
+        """Apply the overflow policy and queue row; caller holds _submit_lock."""
+        depth = self._queue.qsize()
+        if self.overflow == "sample" and depth * 2 >= self.max_queue and row[5]:
+            with self._lock:
+                self._seen_under_pressure += 1
+                keep = self._seen_under_pressure % self.sample_every == 0
+                if not keep:
+                    self.sampled_out += 1
+            if not keep:
+                return False
+        with self._lock:
+            self._pending += 1
+        try:
+            if self.overflow == "block":
+                self._queue.put(row, timeout=self.block_timeout_sec)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self._pending -= 1
+                self.dropped += 1
+                dropped = self.dropped
+                self._idle.notify_all()
+            if dropped == 1 or dropped % 100 == 0:
+                logger.warning(
+                    "Event queue full (%d), %d pipeline events dropped so far", self.max_queue, dropped
+                )
+            return False
+        with self._lock:
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, depth + 1)
+            self._interval_max_depth = max(self._interval_max_depth, depth + 1)
+        return True
+
+    # -- writer thread ------------------------------------------------------
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self._until_report())
+            except queue.Empty:
+                self._report()
+                continue
+            if item is _STOP:
+                break
+            batch: List[Tuple[Any, ...]] = [item]
+            deadline = time.monotonic() + self.flush_interval_sec
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            self._report()
+        self._drain()
+
+    def _drain(self) -> None:
+        """Write anything still queued behind _STOP; normally empty, as close() queues _STOP last."""
+        batch: List[Tuple[Any, ...]] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch: List[Tuple[Any, ...]]) -> None:
+        started = time.perf_counter()
+        try:
+            self.store.add_pipeline_events(batch)
+            ok = True
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.warning("Failed to persist %d pipeline events: %s", len(batch), exc)
+            ok = False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._pending -= len(batch)
+            self.batches += 1
+            if ok:
+                self.written += len(batch)
+            else:
+                self.failed += len(batch)
+            self.write_ms_total += elapsed_ms
+            self.write_ms_max = max(self.write_ms_max, elapsed_ms)
+            self._interval_write_ms_max = max(self._interval_write_ms_max, elapsed_ms)
+            self._idle.notify_all()
+        logger.debug("Wrote %d pipeline events in %.2f ms", len(batch), elapsed_ms)
+
+    def _until_report(self) -> Optional[float]:
+        if not self.stats_interval_sec:
+            return None
+        return max(0.0, self._report_at - time.monotonic())
+
+    def _report(self) -> None:
+        """Record an "event_writer" stats event once per stats_interval_sec, if events arrived."""
+        if not self.stats_interval_sec or time.monotonic() < self._report_at:
+            return
+        self._report_at = time.monotonic() + self.stats_interval_sec
+        with self._lock:
+            totals = {
+                "submitted": self.submitted,
+                "written": self.written,
+                "dropped": self.dropped,
+                "sampled_out": self.sampled_out,
+                "failed": self.failed,
+                "batches": self.batches,
+                "write_ms_total": self.write_ms_total,
+            }
+            max_depth, write_ms_max = self._interval_max_depth, self._interval_write_ms_max
+            self._interval_max_depth, self._interval_write_ms_max = 0, 0.0
+        interval = {key: value - self._reported.get(key, 0) for key, value in totals.items()}
+        self._reported = totals
+        if not (interval["submitted"] or interval["dropped"] or interval["sampled_out"]):
+            return  # nothing happened; no event for an idle assistant
+        batches = interval["batches"]
+        metrics = {
+            "interval_sec": self.stats_interval_sec,
+            "queue_depth": self._queue.qsize(),
+            "max_depth": max_depth,
+            "max_queue": self.max_queue,
+            "submitted": interval["submitted"],
+            "written": interval["written"],
+            "dropped": interval["dropped"],
+            "sampled_out": interval["sampled_out"],
+            "failed": interval["failed"],
+            "batches": batches,
+            "write_ms_avg": round(interval["write_ms_total"] / batches, 2) if batches else 0.0,
+            "write_ms_max": round(write_ms_max, 2),
+            "dropped_total": totals["dropped"],
+        }
+        row = MemoryStore.pipeline_event_row(
+            session_id=STATS_SESSION_ID,
+            step_name=STATS_STEP_NAME,
+            input_summary=f"last {self.stats_interval_sec:.0f} s",
+            output_json="",
+            success=not (interval["dropped"] or interval["failed"]),
+            latency_ms=metrics["write_ms_max"],
+            timestamp=datetime.now(timezone.utc),
+            metrics=metrics,
+        )
+        try:
+            self.store.add_pipeline_events([row])
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.warning("Failed to record event writer stats: %s", exc)
+        logger.info(
+            "Event writer: %d written in %d batches (avg %.2f ms, max %.2f ms), queue %d/%d (max %d), "
+            "%d dropped, %d sampled out",
+            metrics["written"],
+            batches,
+            metrics["write_ms_avg"],
+            metrics["write_ms_max"],
+            metrics["queue_depth"],
+            self.max_queue,
+            max_depth,
+            metrics["dropped"],
+            metrics["sampled_out"],
+        )
+
+    # -- control ------------------------------------------------------------
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Wait until everything submitted so far is committed; False on timeout."""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._pending <= 0, timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush queued events and stop the writer thread."""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            try:
+                # After every queued row; waits for the writer to make room if full.
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                logger.warning(
+                    "Event writer did not drain within %.1f s, %d events still queued", timeout, self._queue.qsize()
+                )
+                return
+        self._thread.join(timeout)
+        stats = self.stats()
+        logger.info(
+            "Event writer closed: %d written in %d batches (avg %.2f ms, max %.2f ms), %d dropped, %d sampled out",
+            stats["written"],
+            stats["batches"],
+            stats["write_ms_avg"],
+            stats["write_ms_max"],
+            stats["dropped"],
+            stats["sampled_out"],
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_depth": self.max_depth,
+                "submitted": self.submitted,
+                "written": self.written,
+                "dropped": self.dropped,
+                "sampled_out": self.sampled_out,
+                "failed": self.failed,
+                "batches": self.batches,
+                "write_ms_avg": round(self.write_ms_total / self.batches, 2) if self.batches else 0.0,
+                "write_ms_max": round(self.write_ms_max, 2),
+            }
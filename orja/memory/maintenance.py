@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from orja.memory.db import MemoryStore
+from orja.memory.event_writer import STATS_STEP_NAME
+
+logger = logging.getLogger(__name__)
+
+_HOUR_FORMAT = "%Y-%m-%dT%H"
+_AUTO_VACUUM_CODES = {"NONE": 0, "FULL": 1, "INCREMENTAL": 2}
+_INSERT_ROLLUP = """
+    INSERT OR REPLACE INTO pipeline_event_rollups (
+        hour_utc,
+        step_name,
+        count,
+        successes,
+        latency_avg_ms,
+        latency_p50_ms,
+        latency_p95_ms,
+        latency_p99_ms,
+        latency_max_ms
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _always() -> bool:
+    return True
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _percentile(ordered: List[float], percentile: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(percentile / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Maintenance:
+    """Keeps the SQLite store bounded: hourly rollups, retention, incremental vacuum.
+
+    Raw pipeline_events of every finished hour are summarised per step into
+    pipeline_event_rollups (count, successes, latency average, p50/p95/p99,
+    max). Raw events older than ``retention_days`` are deleted once their
+    hour is rolled up, rollups after ``rollup_retention_days``; 0 keeps
+    forever. The freed pages are returned to the filesystem with
+    ``PRAGMA incremental_vacuum``, ``vacuum_pages`` at a time. Every step
+    works in short slices and calls should_continue() between them, so an
+    idle-time run stops as soon as the user speaks again.
+    """
+
+    def __init__(
+        self,
+        store: MemoryStore,
+        *,
+        retention_days: float = 14,
+        rollup_retention_days: float = 365,
+        delete_batch: int = 2000,
+        vacuum_pages: int = 256,
+        clock: Callable[[], datetime] = _utcnow,
+    ) -> None:
+        self.store = store
+        self.retention_days = retention_days
+        self.rollup_retention_days = rollup_retention_days
+        self.delete_batch = max(1, delete_batch)
+        self.vacuum_pages = max(1, vacuum_pages)
+        self._clock = clock
+
+    # -- rollups ------------------------------------------------------------
+
+    def _next_unrolled_hour(self) -> Optional[str]:
+        """Hour prefix after the newest rollup, or None if nothing is rolled up yet."""
+        rows = self.store.db.query("SELECT MAX(hour_utc) FROM pipeline_event_rollups")
+        if not rows or rows[0][0] is None:
+            return None
+        last = datetime.strptime(rows[0][0][:13], _HOUR_FORMAT)
+        return (last + timedelta(hours=1)).strftime(_HOUR_FORMAT)
+
+    def rollup(self, should_continue: Callable[[], bool] = _always) -> Tuple[int, bool]:
+        """Summarise finished hours not rolled up yet, one hour per transaction.
+
+        Returns (hours rolled up, finished).
+        """
+        current_hour = self._clock().strftime(_HOUR_FORMAT)
+        start = self._next_unrolled_hour() or ""
+        hours = [
+            row[0]
+            for row in self.store.db.query(
+                "SELECT DISTINCT substr(timestamp_utc, 1, 13) FROM pipeline_events "
+                "WHERE timestamp_utc >= ? AND timestamp_utc < ? ORDER BY 1",
+                (start, current_hour),
+            )
+        ]
+        rolled = 0
+        for hour in hours:
+            if not should_continue():
+                return rolled, False
+            self._rollup_hour(hour)
+            rolled += 1
+        return rolled, True
+
+    def _rollup_hour(self, hour: str) -> None:
+        next_hour = (datetime.strptime(hour, _HOUR_FORMAT) + timedelta(hours=1)).strftime(_HOUR_FORMAT)
+        steps: Dict[str, Tuple[List[float], List[int]]] = {}
+        with self.store.db.transaction() as conn:
+            rows = conn.execute(
+                "SELECT step_name, success, latency_ms FROM pipeline_events "
+                "WHERE timestamp_utc >= ? AND timestamp_utc < ?",
+                (hour, next_hour),
+            ).fetchall()
+            for step_name, success, latency_ms in rows:
+                latencies, outcomes = steps.setdefault(step_name, ([], []))
+                outcomes.append(1 if success else 0)
+                if latency_ms is not None:
+                    latencies.append(float(latency_ms))
+            rollups = []
+            for step_name, (latencies, outcomes) in steps.items():
+                latencies.sort()
+                rollups.append(
+                    (
+                        f"{hour}:00:00+00:00",
+                        step_name,
+                        len(outcomes),
+                        sum(outcomes),
+                        round(sum(latencies) / len(latencies), 2) if latencies else None,
+                        _percentile(latencies, 50),
+                        _percentile(latencies, 95),
+                        _percentile(latencies, 99),
+                        latencies[-1] if latencies else None,
+                    )
+                )
+            conn.executemany(_INSERT_ROLLUP, rollups)
+
+    # -- retention ----------------------------------------------------------
+
+    def prune(self, should_continue: Callable[[], bool] = _always) -> Tuple[int, int, bool]:
+        """Delete expired raw events (only hours already rolled up) and rollups.
+
+        Returns (events deleted, rollups deleted, finished).
+        """
+        now = self._clock()
+        rollups_deleted = 0
+        if self.rollup_retention_days > 0:
+            cutoff = (now - timedelta(days=self.rollup_retention_days)).isoformat()
+            with self.store.db.transaction() as conn:
+                rollups_deleted = conn.execute(
+                    "DELETE FROM pipeline_event_rollups WHERE hour_utc < ?", (cutoff,)
+                ).rowcount
+        if self.retention_days <= 0:
+            return 0, rollups_deleted, True
+        cutoff = (now - timedelta(days=self.retention_days)).isoformat()
+        # Never drop events whose hour has not been summarised yet.
+        cutoff = min(cutoff, self._next_unrolled_hour() or "")
+        deleted = 0
+        while cutoff:
+            if not should_continue():
+                return deleted, rollups_deleted, False
+            with self.store.db.transaction() as conn:
+                count = conn.execute(
+                    "DELETE FROM pipeline_events WHERE id IN "
+                    "(SELECT id FROM pipeline_events WHERE timestamp_utc < ? LIMIT ?)",
+                    (cutoff, self.delete_batch),
+                ).rowcount
+            deleted += count
+            if count < self.delete_batch:
+                break
+        return deleted, rollups_deleted, True
+
+    # -- vacuum -------------------------------------------------------------
+
+    def auto_vacuum_mode(self) -> int:
+        return self.store.db.query("PRAGMA auto_vacuum")[0][0]
+
+    def incremental_vacuum_enabled(self) -> bool:
+        return self.auto_vacuum_mode() == _AUTO_VACUUM_CODES["INCREMENTAL"]
+
+    def free_pages(self) -> int:
+        return self.store.db.query("PRAGMA freelist_count")[0][0]
+
+    def vacuum(self, should_continue: Callable[[], bool] = _always) -> Tuple[int, bool]:
+        """Release free pages vacuum_pages at a time; returns (pages freed, finished).
+
+        Does nothing unless the database was created with (or converted to)
+        auto_vacuum=INCREMENTAL; see convert_auto_vacuum().
+        """
+        if not self.incremental_vacuum_enabled():
+            return 0, True
+        freed = 0
+        while True:
+            before = self.free_pages()
+            if before == 0:
+                return freed, True
+            if not should_continue():
+                return freed, False
+            with self.store.db.transaction() as conn:
+                conn.execute(f"PRAGMA incremental_vacuum({self.vacuum_pages})").fetchall()
+            after = self.free_pages()
+            freed += before - after
+            if after >= before:
+                return freed, True
+
+    def convert_auto_vacuum(self) -> bool:
+        """Switch an existing database to the configured auto_vacuum mode with a full VACUUM.
+
+        Rewrites the whole file, so it needs free space for a copy and blocks
+        other writers; only the maintain command calls it. Returns True if
+        the database was converted.
+        """
+        wanted = self.store.db.auto_vacuum
+        if self.auto_vacuum_mode() == _AUTO_VACUUM_CODES[wanted]:
+            return False
+        logger.info("Converting %s to auto_vacuum=%s (full VACUUM)", self.store.db_path, wanted)
+        conn = self.store.db.connection()
+        conn.execute(f"PRAGMA auto_vacuum={wanted}")
+        conn.execute("VACUUM")
+        return True
+
+    # -- health -------------------------------------------------------------
+
+    def event_writer_health(self, hours: float = 24) -> Optional[Dict[str, Any]]:
+        """Totals of the event writer's periodic stats events over the last hours; None if none."""
+        since = (self._clock() - timedelta(hours=hours)).isoformat()
+        rows = self.store.db.query(
+            "SELECT success, metrics_json FROM pipeline_events "
+            "WHERE step_name = ? AND timestamp_utc >= ? ORDER BY id",
+            (STATS_STEP_NAME, since),
+        )
+        if not rows:
+            return None
+        health: Dict[str, Any] = {
+            "reports": len(rows),
+            "unhealthy_reports": 0,
+            "written": 0,
+            "dropped": 0,
+            "sampled_out": 0,
+            "failed": 0,
+            "max_depth": 0,
+            "write_ms_max": 0.0,
+        }
+        for success, metrics_json in rows:
+            if not success:
+                health["unhealthy_reports"] += 1
+            try:
+                metrics = json.loads(metrics_json or "{}")
+            except ValueError:
+                continue
+            for key in ("written", "dropped", "sampled_out", "failed"):
+                health[key] += int(metrics.get(key, 0))
+            health["max_depth"] = max(health["max_depth"], int(metrics.get("max_depth", 0)))
+            health["write_ms_max"] = max(health["write_ms_max"], float(metrics.get("write_ms_max", 0.0)))
+        return health
+
+    # -- everything ---------------------------------------------------------
+
+    def run(self, should_continue: Callable[[], bool] = _always) -> Dict[str, Any]:
+        """Rollup, retention, then vacuum; stops early when should_continue() turns False."""
+        hours, finished = self.rollup(should_continue)
+        events_deleted = rollups_deleted = pages_freed = 0
+        if finished:
+            events_deleted, rollups_deleted, finished = self.prune(should_continue)
+        if finished:
+            pages_freed, finished = self.vacuum(should_continue)
+        if finished and pages_freed and self.store.db.options["journal_mode"].upper() == "WAL":
+            # Vacuumed pages sit in the -wal file until a checkpoint truncates the database.
+            self.store.db.query("PRAGMA wal_checkpoint(TRUNCATE)")
+        report = {
+            "hours_rolled_up": hours,
+            "events_deleted": events_deleted,
+            "rollups_deleted": rollups_deleted,
+            "pages_freed": pages_freed,
+            "complete": finished,
+        }
+        if hours or events_deleted or rollups_deleted or pages_freed:
+            logger.info(
+                "Database maintenance: %d hours rolled up, %d events and %d rollups deleted, "
+                "%d pages freed%s",
+                hours,
+                events_deleted,
+                rollups_deleted,
+                pages_freed,
+                "" if finished else " (interrupted)",
+            )
+        return report
+
+
+class MaintenanceScheduler:
+    """Runs Maintenance on a daemon thread while the assistant is idle.
+
+    A run starts once idle_for() has reached ``idle_sec`` and repeats every
+    ``interval_sec``; between slices it pauses ``slice_pause_sec`` and gives
+    up as soon as a request arrives, retrying at the next idle spell.
+    """
+
+    def __init__(
+        self,
+        maintenance: Maintenance,
+        idle_for: Callable[[], float],
+        *,
+        interval_sec: float = 3600,
+        idle_sec: float = 30,
+        slice_pause_sec: float = 0.1,
+    ) -> None:
+        self.maintenance = maintenance
+        self.idle_for = idle_for
+        self.interval_sec = max(1.0, interval_sec)
+        self.idle_sec = max(0.0, idle_sec)
+        self.slice_pause_sec = max(0.0, slice_pause_sec)
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="orja-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _idle(self) -> bool:
+        return self.idle_for() >= self.idle_sec
+
+    def _may_continue(self) -> bool:
+        return not self._stop.wait(self.slice_pause_sec) and self._idle()
+
+    def _run(self) -> None:
+        wait = self.idle_sec
+        while not self._stop.wait(wait):
+            if not self._idle():
+                wait = max(1.0, self.idle_sec - self.idle_for())
+                continue
+            try:
+                self.last_report = self.maintenance.run(self._may_continue)
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.warning("Database maintenance failed: %s", exc)
+                self.last_report = {"complete": True, "error": str(exc)}
+            wait = self.interval_sec if self.last_report.get("complete") else max(1.0, self.idle_sec)
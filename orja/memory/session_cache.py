@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from orja.memory.db import Message
+
+Loader = Callable[[str, int], List["Message"]]
+
+
+class SessionHistoryCache:
+    """Write-through ring buffer of the latest messages per session.
+
+    Each cached session keeps up to ``max_messages`` Message objects (each
+    carrying its formatted ``role: content`` line) in a bounded deque. A
+    session is loaded from SQLite on its first read; from then on the store
+    appends every message it writes, so later turns never read history back.
+    At most ``max_sessions`` sessions are kept; the least recently used one
+    is evicted when another is loaded.
+    """
+
+    def __init__(self, *, max_sessions: int = 32, max_messages: int = 50) -> None:
+        self.max_sessions = max(1, max_sessions)
+        self.max_messages = max(1, max_messages)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._sessions: "OrderedDict[str, Deque[Message]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def recent(self, session_id: str, limit: int, load: Loader) -> List[Message]:
+        """Latest limit messages of a session, newest first; load(session_id, n) on a miss."""
+        if limit > self.max_messages:
+            # Deeper than the ring: the caller has to ask SQLite.
+            return load(session_id, limit)
+        with self._lock:
+            ring = self._sessions.get(session_id)
+            if ring is not None:
+                self.hits += 1
+                self._sessions.move_to_end(session_id)
+            else:
+                # Loaded under the lock so a concurrent append cannot land in between.
+                self.misses += 1
+                ring = deque(reversed(load(session_id, self.max_messages)), maxlen=self.max_messages)
+                self._sessions[session_id] = ring
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evictions += 1
+            count = min(limit, len(ring))
+            return [ring[-1 - index] for index in range(count)]
+
+    def append(self, message: Message) -> None:
+        """Record a message just written; sessions not in the cache are left to load lazily."""
+        with self._lock:
+            ring = self._sessions.get(message.session_id)
+            if ring is None or (ring and ring[-1].id >= message.id):
+                return
+            ring.append(message)
+
+    def invalidate(self, session_id: Optional[str] = None) -> None:
+        with self._lock:
+            if session_id is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
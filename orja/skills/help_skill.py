@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+from orja.skills.result import SkillResult
 
-def help_skill(_: str) -> str:
-    return (
+
+def help_skill(_: str) -> SkillResult:
+    return SkillResult.final(
         "Wake word: 'hey slave'. Available: "
         "time → current time, "
         "help → this message, "
         "timer → set a timer (placeholder)."
     )
-
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+# How a skill's output may be delivered to the user.
+FINAL = "final"  # text is the answer as-is
+TEMPLATE = "template"  # answer is rendered from template + data
+LLM = "llm"  # text is raw material for the responder
+SKILL_RESULT_KINDS = (FINAL, TEMPLATE, LLM)
+
+
+@dataclass
+class SkillResult:
+    """Skill output plus a declaration of whether it still needs the LLM."""
+
+    text: str
+    kind: str = LLM
+    template: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if self.kind not in SKILL_RESULT_KINDS:
+            raise ValueError(f"Unknown skill result kind: {self.kind}")
+
+    def __str__(self) -> str:
+        return self.text
+
+    @classmethod
+    def final(cls, text: str) -> "SkillResult":
+        return cls(text=text, kind=FINAL)
+
+    @classmethod
+    def templated(cls, template: str, **data: Any) -> "SkillResult":
+        return cls(text=template.format(**data), kind=TEMPLATE, template=template, data=data)
+
+    @classmethod
+    def coerce(cls, value: Any) -> "SkillResult":
+        """Wrap plain-string skill output; it is always handed to the responder."""
+        if isinstance(value, SkillResult):
+            return value
+        return cls(text=str(value), kind=LLM)
+
+    @property
+    def is_direct(self) -> bool:
+        return self.kind in (FINAL, TEMPLATE)
+
+    def render(self, template: Optional[str] = None) -> str:
+        """Answer text, optionally re-rendered with a configured template."""
+        if self.kind == TEMPLATE and template:
+            try:
+                return template.format(**self.data)
+            except (KeyError, IndexError, ValueError):
+                return self.text
+        return self.text
@@ -3,9 +3,15 @@ from __future__ import annotations
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+from orja.skills.result import SkillResult
 
-def time_skill(_: str) -> str:
+
+def time_skill(_: str) -> SkillResult:
     tz = ZoneInfo("Europe/Helsinki")
     now_local = datetime.now(tz)
-    return f"The current time in Finland is {now_local:%H:%M:%S}."
-
+    return SkillResult.templated(
+        "The current time in Finland is {time}.",
+        time=f"{now_local:%H:%M:%S}",
+        date=f"{now_local:%Y-%m-%d}",
+        timezone="Europe/Helsinki",
+    )
@@ -3,6 +3,8 @@ from __future__ import annotations
 import re
 from typing import Optional
 
+from orja.skills.result import SkillResult
+
 
 def _extract_minutes(command: str) -> Optional[str]:
     match = re.search(r"(\d+)\s*(min|mins|minuuttia|min|minute)?", command, re.IGNORECASE)
@@ -11,9 +13,10 @@ def _extract_minutes(command: str) -> Optional[str]:
     return None
 
 
-def timer_skill(command: str, minutes: int | None = None) -> str:
+def timer_skill(command: str, minutes: int | None = None) -> SkillResult:
     parsed = str(minutes) if minutes is not None else _extract_minutes(command)
     if parsed:
-        return f"OK, timer set for {parsed} minutes (placeholder)."
-    return "Timer not recognized, please provide the minutes."
+        return SkillResult.templated("OK, timer set for {minutes} minutes (placeholder).", minutes=parsed)
+    # Let the responder phrase the follow-up question.
+    return SkillResult("Timer not recognized, please provide the minutes.")
 
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Compare one-by-one generate() with generate_batch() against stand-in servers.
+Starts N fake servers, runs the same prompts sequentially and as one batch
+through LlamaCppCliProvider, and prints wall time and tokens/s for both.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from fake_llama_server import start_in_thread  # noqa: E402
+from orja.llm.backends.llama_cpp_cli import LlamaCppCliProvider  # noqa: E402
+from orja.llm.provider import ChatMessage, GenerationRequest  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--instances", type=int, default=1)
+    parser.add_argument("--base-port", type=int, default=18290)
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake completion")
+    args = parser.parse_args()
+
+    servers = [
+        start_in_thread(port=args.base_port + index, latency=args.latency, reply="ok " * 20)
+        for index in range(args.instances)
+    ]
+    provider = LlamaCppCliProvider(
+        {
+            "llama_cpp": {
+                "server": {
+                    "enabled": True,
+                    "managed": False,
+                    "port": args.base_port,
+                    "instances": args.instances,
+                    "slots": ["evaluator_system", "router_system", "responder_system"],
+                }
+            }
+        }
+    )
+    requests = [
+        GenerationRequest(
+            messages=[ChatMessage(role="user", content=f"transcript line {index}")],
+            max_tokens=32,
+            prompt_key="evaluator_system",
+        )
+        for index in range(args.requests)
+    ]
+
+    started = time.perf_counter()
+    tokens = 0
+    for request in requests:
+        usage: dict = {}
+        provider.generate(request.messages, **request.options(), usage=usage)
+        tokens += int(usage.get("tokens_predicted", 0))
+    elapsed = time.perf_counter() - started
+    print(f"sequential: {args.requests} requests in {elapsed:.2f} s, {tokens / elapsed:.1f} tokens/s")
+
+    usage = {}
+    provider.generate_batch(requests, usage=usage)
+    print(
+        f"batch:      {usage['items']} requests in {usage['elapsed_sec']:.2f} s, "
+        f"{usage['tokens_per_sec']:.1f} tokens/s, {usage['workers']} workers, "
+        f"{usage['errors']} errors"
+    )
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
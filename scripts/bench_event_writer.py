@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Cost of recording pipeline_events on the request path: an inline insert and
+commit per event vs EventWriter, which queues the row and commits batches on a
+background thread. Reports per-event submit latency as the request sees it,
+the writer's batch latency and queue depth, and the overflow counters for a
+deliberately small queue. Point --dir at the SD card, where commits are slow.
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from orja.memory.db import MemoryStore  # noqa: E402
+from orja.memory.event_writer import EventWriter  # noqa: E402
+
+
+def make_row(index: int) -> tuple:
+    return MemoryStore.pipeline_event_row(
+        session_id="bench",
+        step_name=f"step{index % 6}",
+        input_summary=f"question {index}",
+        output_json='{"action": "chat"}',
+        success=index % 50 != 0,
+        latency_ms=12.5,
+        timestamp=datetime.now(timezone.utc),
+        metrics={"tokens_predicted": 20 + index % 30},
+    )
+
+
+def summarize(label: str, timings: list) -> None:
+    timings.sort()
+    print(
+        f"{label:24s} per event: median {statistics.median(timings) * 1000:7.1f} us  "
+        f"p99 {timings[int(len(timings) * 0.99) - 1] * 1000:7.1f} us"
+    )
+
+
+def fresh_store(base: Path, name: str) -> MemoryStore:
+    path = base / f"bench-{name}.sqlite"
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+    return MemoryStore(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=3000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--dir", default=None, help="directory for the test databases (default: temp dir)")
+    args = parser.parse_args()
+    logging.getLogger("orja").setLevel(logging.ERROR)  # overflow runs drop on purpose
+    base = Path(args.dir) if args.dir else Path(tempfile.mkdtemp(prefix="orja-events-bench-"))
+
+    store = fresh_store(base, "inline")
+    timings = []
+    for index in range(args.events):
+        row = make_row(index)
+        started = time.perf_counter()
+        store.add_pipeline_events([row])
+        timings.append((time.perf_counter() - started) * 1000)
+    summarize("inline insert", timings)
+    store.close()
+
+    store = fresh_store(base, "batched")
+    writer = EventWriter(store, max_queue=args.events, batch_size=args.batch_size, flush_interval_sec=0.2)
+    timings = []
+    for index in range(args.events):
+        row = make_row(index)
+        started = time.perf_counter()
+        writer.submit(row)
+        timings.append((time.perf_counter() - started) * 1000)
+    summarize("batched writer", timings)
+    writer.close()
+    stats = writer.stats()
+    print(
+        f"{'':24s} {stats['written']} rows in {stats['batches']} batches, "
+        f"batch write avg {stats['write_ms_avg']} ms max {stats['write_ms_max']} ms, "
+        f"max queue depth {stats['max_depth']}"
+    )
+    store.close()
+
+    for policy in ("drop", "sample", "block"):
+        store = fresh_store(base, f"overflow-{policy}")
+        writer = EventWriter(store, max_queue=64, batch_size=16, overflow=policy, block_timeout_sec=0.05)
+        for index in range(args.events):
+            writer.submit(make_row(index))
+        writer.close()
+        stats = writer.stats()
+        print(
+            f"overflow={policy:7s} queue 64: written {stats['written']}, dropped {stats['dropped']}, "
+            f"sampled out {stats['sampled_out']}"
+        )
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
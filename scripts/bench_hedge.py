@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Compare local-only replies with hedged local/cloud replies against stand-in servers.
+Starts a slow fake llama-server (the local model) and a fast fake
+/v1/chat/completions endpoint (the cloud model), then times the same prompts
+through the local provider alone and through HedgedProvider.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from fake_llama_server import start_in_thread  # noqa: E402
+from orja.llm.backends.llama_cpp_cli import LlamaCppCliProvider  # noqa: E402
+from orja.llm.cloud import CloudLLM  # noqa: E402
+from orja.llm.hedge import HedgedProvider  # noqa: E402
+from orja.llm.provider import ChatMessage, LLMProvider  # noqa: E402
+
+
+def run(provider: LLMProvider, rounds: int, stream: bool) -> tuple:
+    latencies = []
+    winners = {"local": 0, "remote": 0}
+    for index in range(rounds):
+        messages = [ChatMessage(role="user", content=f"question {index}")]
+        usage: dict = {}
+        started = time.perf_counter()
+        if stream:
+            "".join(provider.generate_stream(messages, usage=usage, prompt_key="responder_system"))
+        else:
+            provider.generate(messages, usage=usage, prompt_key="responder_system")
+        latencies.append((time.perf_counter() - started) * 1000)
+        winners[usage.get("hedge_winner", "local")] += 1
+    return latencies, winners
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--local-latency", type=float, default=1.5, help="seconds per local completion")
+    parser.add_argument("--cloud-latency", type=float, default=0.3, help="seconds per cloud completion")
+    parser.add_argument("--hedge-after", type=float, default=0.5, help="seconds before the cloud joins")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+
+    local_server = start_in_thread(latency=args.local_latency, reply="local reply")
+    cloud_server = start_in_thread(latency=args.cloud_latency, reply="cloud reply")
+    local = LlamaCppCliProvider(
+        {"llama_cpp": {"server": {"enabled": True, "managed": False, "port": local_server.server_address[1]}}}
+    )
+    cloud = CloudLLM({"base_url": f"http://127.0.0.1:{cloud_server.server_address[1]}/v1", "api_key": "bench"})
+
+    modes = [
+        ("local only", local),
+        (f"hedged after {args.hedge_after:.2f}s", HedgedProvider(local, cloud, hedge_after_sec=args.hedge_after)),
+        ("hedged at once (needs_cloud)", HedgedProvider(local, cloud, hedge_after_sec=0.0)),
+    ]
+    for label, provider in modes:
+        latencies, winners = run(provider, args.rounds, args.stream)
+        print(
+            f"{label:30s} median {statistics.median(latencies):7.1f} ms  "
+            f"max {max(latencies):7.1f} ms  local/cloud wins {winners['local']}/{winners['remote']}"
+        )
+    cloud.close()
+
+
+if __name__ == "__main__":
+    main()
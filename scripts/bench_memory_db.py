@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Per-turn database overhead of MemoryStore: a connection per operation with
+SQLite defaults (the old behaviour) vs persistent per-thread connections with
+WAL, without and with the per-session history cache. One turn is what the
+pipeline writes and reads for a user request: history load, user message,
+pipeline events, budget lookup, reply message.
+Point --dir at the SD card to measure the storage the assistant actually uses.
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from orja.memory.db import MemoryStore  # noqa: E402
+
+MODES = {
+    "per-call connect": {"persistent_connections": False, "history_cache": {"enabled": False}},
+    "persistent + WAL": {"history_cache": {"enabled": False}},
+    "+ history cache": {},
+}
+
+
+def run_turn(store: MemoryStore, turn: int, events: int) -> None:
+    now = datetime.now(timezone.utc)
+    store.recent_messages(limit=20, session_id="bench")
+    store.add_message("user", f"question {turn}", "bench", now)
+    for step in range(events):
+        store.add_pipeline_event(
+            session_id="bench",
+            step_name=f"step{step}",
+            input_summary=f"question {turn}",
+            output_json='{"action": "chat"}',
+            success=True,
+            latency_ms=12.5,
+            timestamp=now,
+            metrics={"tokens_predicted": 20 + step},
+        )
+    store.recent_event_metrics("step0", limit=200)
+    store.add_message("assistant", f"answer {turn}", "bench", now)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--events", type=int, default=6, help="pipeline events per turn")
+    parser.add_argument("--dir", default=None, help="directory for the test databases (default: temp dir)")
+    args = parser.parse_args()
+
+    base = Path(args.dir) if args.dir else Path(tempfile.mkdtemp(prefix="orja-db-bench-"))
+    for label, options in MODES.items():
+        path = base / f"bench-{label.split()[-1]}.sqlite"
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+        store = MemoryStore(path, options)
+        run_turn(store, -1, args.events)  # warm-up: schema and first connection
+        timings = []
+        for turn in range(args.turns):
+            started = time.perf_counter()
+            run_turn(store, turn, args.events)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(
+            f"{label:18s} per turn: median {statistics.median(timings):7.2f} ms  "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:7.2f} ms  "
+            f"connections opened {store.db.opened}"
+        )
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
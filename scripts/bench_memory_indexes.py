@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+History lookups on a large database, without and with the schema version 2
+indexes. Seeds --rows messages and as many pipeline_events spread over
+--sessions sessions, times recent_messages(session_id=...) and the token
+budget's recent_event_metrics() with the indexes dropped (schema version 1),
+then reopens the store so migrate() recreates them and times again.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from orja.memory.db import MemoryStore  # noqa: E402
+
+# Measure SQLite itself, not the in-memory history cache.
+OPTIONS = {"history_cache": {"enabled": False}}
+INDEXES = ("idx_messages_session", "idx_pipeline_events_session_step", "idx_pipeline_events_step")
+STEPS = ("evaluator", "router", "responder", "triage", "skill_time", "degrade")
+
+
+def seed(store: MemoryStore, rows: int, sessions: int) -> None:
+    rng = random.Random(7)
+    batch = 50_000
+    with store.db.transaction() as conn:
+        for start in range(0, rows, batch):
+            count = min(batch, rows - start)
+            messages = []
+            events = []
+            for offset in range(count):
+                index = start + offset
+                session = f"session-{rng.randrange(sessions)}"
+                ts = f"2026-01-01T00:00:{index % 60:02d}+00:00"
+                messages.append((ts, "user" if index % 2 else "assistant", f"message {index}", session))
+                events.append(
+                    (ts, session, STEPS[index % len(STEPS)], "q", "{}", 1, 10.0, '{"tokens_predicted": 24}')
+                )
+            conn.executemany(
+                "INSERT INTO messages (timestamp_utc, role, content, session_id) VALUES (?, ?, ?, ?)", messages
+            )
+            conn.executemany(
+                "INSERT INTO pipeline_events (timestamp_utc, session_id, step_name, input_summary, "
+                "output_json, success, latency_ms, metrics_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                events,
+            )
+
+
+def measure(store: MemoryStore, sessions: int, queries: int) -> dict:
+    rng = random.Random(11)
+    history = []
+    metrics = []
+    for _ in range(queries):
+        session = f"session-{rng.randrange(sessions)}"
+        started = time.perf_counter()
+        store.recent_messages(limit=20, session_id=session)
+        history.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        store.recent_event_metrics("responder", limit=200)
+        metrics.append((time.perf_counter() - started) * 1000)
+    return {"recent_messages": statistics.median(history), "recent_event_metrics": statistics.median(metrics)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--dir", default=None, help="directory for the test database (default: temp dir)")
+    args = parser.parse_args()
+
+    base = Path(args.dir) if args.dir else Path(tempfile.mkdtemp(prefix="orja-index-bench-"))
+    path = base / "bench-indexes.sqlite"
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+    store = MemoryStore(path, OPTIONS)
+    started = time.perf_counter()
+    seed(store, args.rows, args.sessions)
+    print(f"seeded {args.rows} messages + {args.rows} events in {time.perf_counter() - started:.1f} s")
+    with store.db.transaction() as conn:
+        for name in INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.execute("PRAGMA user_version = 1")
+    before = measure(store, args.sessions, args.queries)
+    store.close()
+
+    started = time.perf_counter()
+    store = MemoryStore(path, OPTIONS)  # migrates 1 -> 2
+    print(f"migration to schema version {store.schema_version()} took {time.perf_counter() - started:.1f} s")
+    after = measure(store, args.sessions, args.queries)
+    store.close()
+
+    for name in before:
+        print(
+            f"{name:22s} median: no index {before[name]:8.2f} ms   indexed {after[name]:8.2f} ms   "
+            f"x{before[name] / max(after[name], 1e-6):.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
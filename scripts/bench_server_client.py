@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-call HTTP overhead of the llama-server client.
+Compares the old path (TCP probe + fresh urllib connection per call) with the
+keep-alive connection pool, against a local stand-in server.
+"""
+
+import argparse
+import json
+import socket
+import statistics
+import sys
+import time
+from pathlib import Path
+from urllib import request
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from fake_llama_server import start_in_thread  # noqa: E402
+from orja.llm.http import HttpConnectionPool  # noqa: E402
+
+PAYLOAD = {"prompt": "<|im_start|>user\nhi<|im_end|>\n", "n_predict": 8, "stream": False}
+
+
+def legacy_call(host: str, port: int) -> None:
+    with socket.create_connection((host, port), timeout=1):
+        pass
+    req = request.Request(
+        f"http://{host}:{port}/completion",
+        data=json.dumps(PAYLOAD).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with request.urlopen(req, timeout=10) as resp:
+        json.loads(resp.read().decode("utf-8"))
+
+
+def measure(label: str, call, iterations: int) -> float:
+    for _ in range(10):
+        call()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    mean = statistics.mean(samples)
+    p50 = statistics.median(samples)
+    p95 = sorted(samples)[int(len(samples) * 0.95) - 1]
+    print(f"{label:<22} mean={mean:7.3f} ms  p50={p50:7.3f} ms  p95={p95:7.3f} ms")
+    return mean
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    server = start_in_thread()
+    host, port = server.server_address[0], server.server_address[1]
+    pool = HttpConnectionPool(host, port, timeout=10)
+
+    print(f"{args.iterations} calls against stand-in server on {host}:{port}")
+    before = measure("probe + urllib", lambda: legacy_call(host, port), args.iterations)
+    after = measure("keep-alive pool", lambda: pool.request_json("POST", "/completion", PAYLOAD), args.iterations)
+    print(f"per-call saving: {before - after:.3f} ms ({before / after:.1f}x), pool connects={pool.connects}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Exercise the llama-server pool against stand-in servers.
+Starts N fake servers on a port range, sends concurrent completions through
+LlamaCppCliProvider (unmanaged pool) and prints per-instance load stats.
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from fake_llama_server import start_in_thread  # noqa: E402
+from orja.llm.backends.llama_cpp_cli import LlamaCppCliProvider  # noqa: E402
+from orja.llm.provider import ChatMessage  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--instances", type=int, default=3)
+    parser.add_argument("--base-port", type=int, default=18090)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake completion")
+    args = parser.parse_args()
+
+    servers = [
+        start_in_thread(port=args.base_port + index, latency=args.latency, reply="ok " * 20)
+        for index in range(args.instances)
+    ]
+    provider = LlamaCppCliProvider(
+        {
+            "llama_cpp": {
+                "server": {
+                    "enabled": True,
+                    "managed": False,
+                    "port": args.base_port,
+                    "instances": args.instances,
+                    "slots": ["a"],
+                }
+            }
+        }
+    )
+
+    def one(index: int) -> str:
+        return provider.generate([ChatMessage(role="user", content=f"request {index}")], max_tokens=16)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(one, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, "
+        f"{args.instances} instances x {provider.slots.parallel} slots: {elapsed:.2f} s"
+    )
+    for stats in provider.server_stats():
+        print(
+            f"  {stats['instance']:<18} completed={stats['completed']:<4} "
+            f"failures={stats['failures']:<3} tokens/s={stats['tokens_per_sec']:<8} "
+            f"avg_queue_ms={stats['avg_queue_ms']}"
+        )
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
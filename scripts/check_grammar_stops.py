@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Check that grammar-constrained output cannot contain a configured stop string.
+Agents send their stop strings (e.g. "\\n\\n") together with the GBNF grammar,
+so a grammar that can emit one would be cut off mid-object. Samples random
+outputs from the generic JSON grammar and every agent schema grammar,
+biased towards the longest whitespace, and checks each one parses as JSON
+and contains none of the stop strings in config/config.yaml. Exits non-zero
+on failure.
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from orja.agents.schemas import EVALUATOR_SCHEMA, router_schema, triage_schema  # noqa: E402
+from orja.core.config import load_config  # noqa: E402
+from orja.llm.grammar import GENERIC_JSON_GRAMMAR, schema_to_gbnf  # noqa: E402
+
+_TOKEN = re.compile(
+    r'\s+|(?P<lit>"(?:[^"\\]|\\.)*")|(?P<cls>\[(?:[^\]\\]|\\.)*\])|(?P<rep>\{\d+(?:,\d*)?\})'
+    r"|(?P<name>[a-zA-Z0-9-]+)|(?P<op>[()|?*+])"
+)
+_ESCAPE = re.compile(r"\\(x[0-9a-fA-F]{2}|.)")
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+# Characters a negated class may pick from: printable ASCII, whitespace, one non-ASCII letter.
+_UNIVERSE = [chr(code) for code in range(0x20, 0x7F)] + ["\n", "\t", "ä"]
+_MAX_DEPTH = 6
+
+
+def _unescape(text: str) -> str:
+    def replace(match: "re.Match[str]") -> str:
+        value = match.group(1)
+        if value.startswith("x") and len(value) == 3:
+            return chr(int(value[1:], 16))
+        return _ESCAPES.get(value, value)
+
+    return _ESCAPE.sub(replace, text)
+
+
+def _char_class(text: str) -> List[str]:
+    body = text[1:-1]
+    negated = body.startswith("^")
+    chars = [match.group(0) for match in re.finditer(r"\\x[0-9a-fA-F]{2}|\\.|.", body[1:] if negated else body)]
+    chars = [_unescape(char) for char in chars]
+    members: Set[str] = set()
+    index = 0
+    while index < len(chars):
+        if index + 2 < len(chars) and chars[index + 1] == "-":
+            members.update(chr(code) for code in range(ord(chars[index]), ord(chars[index + 2]) + 1))
+            index += 3
+        else:
+            members.add(chars[index])
+            index += 1
+    if negated:
+        return [char for char in _UNIVERSE if char not in members]
+    return sorted(members)
+
+
+class Grammar:
+    """Parser and random sampler for the GBNF subset orja.llm.grammar emits."""
+
+    def __init__(self, text: str) -> None:
+        self.rules: Dict[str, Any] = {}
+        for line in text.splitlines():
+            name, body = line.split("::=", 1)
+            self.rules[name.strip()] = self._parse(body)
+
+    def _parse(self, body: str) -> Any:
+        tokens: List[Tuple[str, str]] = []
+        for match in _TOKEN.finditer(body):
+            if match.lastgroup:
+                tokens.append((match.lastgroup, match.group(0)))
+        node, rest = self._alternation(tokens)
+        if rest:
+            raise ValueError(f"Unparsed grammar tokens: {rest}")
+        return node
+
+    def _alternation(self, tokens: List[Tuple[str, str]]) -> Tuple[Any, List[Tuple[str, str]]]:
+        options = []
+        while True:
+            sequence, tokens = self._sequence(tokens)
+            options.append(sequence)
+            if tokens and tokens[0] == ("op", "|"):
+                tokens = tokens[1:]
+                continue
+            return ("alt", options), tokens
+
+    def _sequence(self, tokens: List[Tuple[str, str]]) -> Tuple[Any, List[Tuple[str, str]]]:
+        items = []
+        while tokens and tokens[0] not in (("op", "|"), ("op", ")")):
+            kind, text = tokens[0]
+            tokens = tokens[1:]
+            if kind == "lit":
+                node: Any = ("lit", _unescape(text[1:-1]))
+            elif kind == "cls":
+                node = ("cls", _char_class(text))
+            elif kind == "name":
+                node = ("ref", text)
+            elif text == "(":
+                node, tokens = self._alternation(tokens)
+                tokens = tokens[1:]  # ")"
+            else:
+                raise ValueError(f"Unexpected grammar token {text!r}")
+            while tokens and (tokens[0][0] == "rep" or tokens[0][1] in "?*+"):
+                suffix = tokens[0][1]
+                tokens = tokens[1:]
+                if suffix == "?":
+                    low, high = 0, 1
+                elif suffix == "*":
+                    low, high = 0, 3
+                elif suffix == "+":
+                    low, high = 1, 3
+                else:
+                    low_text, _, high_text = suffix[1:-1].partition(",")
+                    low = int(low_text)
+                    high = int(high_text) if high_text else low + 3
+                    if "," not in suffix:
+                        high = low
+                node = ("rep", node, low, high)
+            items.append(node)
+        return ("seq", items), tokens
+
+    def sample(self, rng: random.Random) -> str:
+        out: List[str] = []
+        self._emit(self.rules["root"], rng, 0, out)
+        return "".join(out)
+
+    def _emit(self, node: Any, rng: random.Random, depth: int, out: List[str]) -> None:
+        kind = node[0]
+        if kind == "lit":
+            out.append(node[1])
+        elif kind == "cls":
+            out.append(rng.choice(node[1]))
+        elif kind == "ref":
+            self._emit(self.rules[node[1]], rng, depth + 1, out)
+        elif kind == "seq":
+            for item in node[1]:
+                self._emit(item, rng, depth, out)
+        elif kind == "alt":
+            # Deep in recursive rules take the last option (a scalar) to terminate.
+            option = node[1][-1] if depth > _MAX_DEPTH else rng.choice(node[1])
+            self._emit(option, rng, depth, out)
+        else:
+            _, item, low, high = node
+            if depth > _MAX_DEPTH:
+                count = low
+            else:
+                # Favour the longest run: that is where repeated whitespace comes from.
+                count = high if rng.random() < 0.5 else rng.randint(low, high)
+            for _ in range(count):
+                self._emit(item, rng, depth, out)
+
+
+def configured_stops(config: Dict[str, Any]) -> Set[str]:
+    stops: Set[str] = set()
+    for agent in (config.get("agents") or {}).values():
+        if isinstance(agent, dict):
+            stops.update(agent.get("stop") or [])
+    return stops
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=3000, help="outputs sampled per grammar")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    stops = configured_stops(load_config(project_root / "config" / "config.yaml"))
+    skills = ["help", "time", "timer"]
+    grammars = {
+        "generic json": GENERIC_JSON_GRAMMAR,
+        "evaluator": schema_to_gbnf(EVALUATOR_SCHEMA),
+        "router": schema_to_gbnf(router_schema(skills)),
+        "triage": schema_to_gbnf(triage_schema(skills)),
+    }
+    rng = random.Random(args.seed)
+    failures = []
+    for label, text in grammars.items():
+        grammar = Grammar(text)
+        hits = 0
+        example = ""
+        for _ in range(args.samples):
+            output = grammar.sample(rng)
+            json.loads(output)
+            if any(stop in output for stop in stops):
+                hits += 1
+                example = example or output
+        print(f"{label:13s} {args.samples} samples, {hits} contain a stop string {sorted(stops)!r}")
+        if hits:
+            failures.append(f"{label}: e.g. {example[:160]!r}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Check that a streamed llama-server completion stops at the call deadline.
+The stand-in server trickles one token every --token-delay seconds, far
+slower than --timeout allows for the whole reply; generate_stream() must
+return shortly after the budget with usage["truncated"] set, and fall back
+when no token arrived in time. Exits non-zero on failure.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from fake_llama_server import start_in_thread  # noqa: E402
+from orja.llm.backends.llama_cpp_cli import LlamaCppCliProvider  # noqa: E402
+from orja.llm.provider import ChatMessage  # noqa: E402
+
+
+def stream_once(provider: LlamaCppCliProvider, timeout: float) -> tuple:
+    usage: dict = {}
+    started = time.perf_counter()
+    text = "".join(
+        provider.generate_stream(
+            [ChatMessage(role="user", content="tell me a long story")], timeout=timeout, usage=usage
+        )
+    )
+    return text, usage, time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--timeout", type=float, default=1.0, help="call budget in seconds")
+    parser.add_argument("--token-delay", type=float, default=0.2, help="seconds between streamed tokens")
+    args = parser.parse_args()
+
+    reply = " ".join(f"word{index}" for index in range(100))
+    failures = []
+    cases = [
+        ("slow tokens", args.token_delay, 0.0, True),
+        ("slow first token", 0.0, args.timeout * 2, False),
+    ]
+    for label, token_delay, latency, expect_text in cases:
+        server = start_in_thread(reply=reply, token_delay=token_delay, latency=latency)
+        provider = LlamaCppCliProvider(
+            {"llama_cpp": {"server": {"enabled": True, "managed": False, "port": server.server_address[1]}}}
+        )
+        text, usage, elapsed = stream_once(provider, args.timeout)
+        print(
+            f"{label:18s} {elapsed:5.2f} s for a {args.timeout:.2f} s budget, {len(text.split())} words, "
+            f"truncated={usage.get('truncated', False)} fallback={usage.get('fallback', False)}"
+        )
+        if elapsed > args.timeout + max(0.5, token_delay * 2):
+            failures.append(f"{label}: took {elapsed:.2f} s")
+        if not usage.get("fallback"):
+            failures.append(f"{label}: usage['fallback'] not set")
+        if expect_text and not (usage.get("truncated") and text.startswith("word0")):
+            failures.append(f"{label}: expected a truncated partial reply, got {text[:40]!r}")
+        server.shutdown()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Compare the split (evaluator + router) and fused (triage) agent modes.
+Runs sample requests through both with the configured provider and prints
+per-mode latency and how often the fused call agrees with the split calls
+on difficulty, action and skill. --fake points the provider at a stand-in
+server instead (latency only; its fixed reply makes agreement meaningless).
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from fake_llama_server import start_in_thread  # noqa: E402
+from orja.agents.evaluator import EvaluatorAgent  # noqa: E402
+from orja.agents.router import RouterAgent  # noqa: E402
+from orja.agents.triage import TriageAgent  # noqa: E402
+from orja.core.config import load_config  # noqa: E402
+from orja.core.prompts import PromptLoader  # noqa: E402
+from orja.llm.provider import ProviderFactory  # noqa: E402
+
+SAMPLE_REQUESTS = [
+    "what time is it?",
+    "set a timer for 10 minutes",
+    "what can you do?",
+    "tell me a joke about cats",
+    "explain how a transistor works",
+    "remind me in 5 minutes to check the oven",
+    "hi there",
+    "compare python and rust for a small cli tool",
+]
+SKILLS = ["help", "time", "timer"]
+
+
+async def run_split(evaluator: EvaluatorAgent, router: RouterAgent, text: str, summaries: str):
+    return await asyncio.gather(
+        evaluator.arun(text, []),
+        router.arun(text, available_skills=SKILLS, skill_summaries=summaries),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fake", action="store_true", help="use a stand-in llama-server")
+    parser.add_argument("--port", type=int, default=18190, help="port for --fake")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake completion")
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+
+    config = load_config(project_root / "config" / "config.yaml")
+    llm_config = config.get("llm", {})
+    server = None
+    if args.fake:
+        reply = '{"difficulty": "easy", "reason": "short", "action": "chat", "skill": null, "arguments": {}}'
+        server = start_in_thread(port=args.port, latency=args.latency, reply=reply)
+        llm_config = {
+            **llm_config,
+            "backend": "llama_cpp_cli",
+            "llama_cpp": {
+                **llm_config.get("llama_cpp", {}),
+                "embedding": {"enabled": False},
+                "server": {"enabled": True, "managed": False, "port": args.port, "instances": 1},
+            },
+        }
+
+    logger = logging.getLogger("compare_triage")
+    provider = ProviderFactory.create_provider(llm_config)
+    prompts = PromptLoader(project_root / "prompts")
+    agents_cfg = config.get("agents", {})
+    json_mode = llm_config.get("json_strict", True)
+    evaluator = EvaluatorAgent(provider, prompts, agents_cfg.get("evaluator", {}), logger, json_mode=json_mode)
+    router = RouterAgent(provider, prompts, agents_cfg.get("router", {}), logger, json_mode=json_mode)
+    triage = TriageAgent(provider, prompts, agents_cfg.get("triage", {}), logger, json_mode=json_mode)
+    summaries = prompts.get_prompt("skill_summaries")
+
+    split_ms, fused_ms = [], []
+    agree = {"difficulty": 0, "action": 0, "skill": 0}
+    total = 0
+    for _ in range(args.rounds):
+        for text in SAMPLE_REQUESTS:
+            started = time.perf_counter()
+            evaluation, route = asyncio.run(run_split(evaluator, router, text, summaries))
+            split_ms.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            fused_eval, fused_route = asyncio.run(
+                triage.arun(text, [], available_skills=SKILLS, skill_summaries=summaries)
+            )
+            fused_ms.append((time.perf_counter() - started) * 1000)
+
+            total += 1
+            agree["difficulty"] += evaluation["difficulty"] == fused_eval["difficulty"]
+            agree["action"] += route["action"] == fused_route["action"]
+            agree["skill"] += route.get("skill") == fused_route.get("skill")
+            print(
+                f"{text[:40]:<40} split={evaluation['difficulty']}/{route['action']}/{route.get('skill')} "
+                f"fused={fused_eval['difficulty']}/{fused_route['action']}/{fused_route.get('skill')}"
+            )
+
+    for mode, samples in (("split", split_ms), ("fused", fused_ms)):
+        print(
+            f"{mode:<6} mean={statistics.mean(samples):.1f} ms "
+            f"median={statistics.median(samples):.1f} ms max={max(samples):.1f} ms"
+        )
+    print(
+        "agreement: "
+        + ", ".join(f"{key}={count}/{total}" for key, count in agree.items())
+        + f"; triage parse failures={triage.parse_failures}/{triage.calls}"
+    )
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
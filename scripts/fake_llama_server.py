@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Stand-in for llama-server used by the benchmark scripts.
+Implements /health, /tokenize, /embedding, /completion and the OpenAI-style
+/v1/chat/completions (plain and SSE streaming) over HTTP/1.1 keep-alive, with an
+optional injected latency per request and delay between streamed tokens. Prompt caching is
+simulated per slot by counting the words shared with the slot's last prompt.
+
+Run standalone:  python scripts/fake_llama_server.py --port 8081 --latency 0.05
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+DEFAULT_REPLY = '{"action":"chat","skill":null,"arguments":{},"confidence":0.4}'
+
+
+class FakeLlamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "FakeLlamaServer"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - stdlib signature
+        return
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self) -> None:  # noqa: N802 - stdlib naming
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:  # noqa: N802 - stdlib naming
+        body = self._read_json()
+        if self.path == "/tokenize":
+            # Words and punctuation stand in for real tokens; no latency, no request count.
+            pieces = re.findall(r"\w+|[^\w\s]", str(body.get("content", "")))
+            self._send_json(200, {"tokens": [hash(p) & 0xFFFF for p in pieces]})
+            return
+        if self.path == "/embedding":
+            # Hashed bag of words: requests sharing words get similar vectors.
+            vector = [0.0] * 64
+            for word in re.findall(r"\w+", str(body.get("content", "")).lower()):
+                vector[sum(word.encode("utf-8")) % 64] += 1.0
+            self._send_json(200, {"embedding": vector})
+            return
+        with self.server.stats_lock:
+            self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.path == "/v1/chat/completions":
+            self._chat_completions(body)
+            return
+        if self.path != "/completion":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        pieces, stop_type = self._reply_pieces(body.get("stop"), int(body.get("n_predict", -1)))
+        prompt_words = str(body.get("prompt", "")).split()
+        prompt_tokens = len(prompt_words)
+        cached = self.server.cached_prefix(body.get("id_slot", -1), prompt_words, body.get("cache_prompt", False))
+
+        if not body.get("stream"):
+            self._send_json(
+                200,
+                {
+                    "content": "".join(pieces),
+                    "tokens_predicted": len(pieces),
+                    "tokens_evaluated": prompt_tokens,
+                    "tokens_cached": cached,
+                    "stop": True,
+                    "stop_type": stop_type,
+                },
+            )
+            return
+
+        events = [{"content": piece, "stop": False} for piece in pieces]
+        events.append(
+            {
+                "content": "",
+                "stop": True,
+                "stop_type": stop_type,
+                "tokens_predicted": len(pieces),
+                "tokens_evaluated": prompt_tokens,
+                "tokens_cached": cached,
+            }
+        )
+        self._send_events(events)
+
+    def _reply_pieces(self, stops: Any, n_predict: int) -> Tuple[List[str], str]:
+        """Configured reply cut at the first stop string and at n_predict words (one word = one token)."""
+        reply = self.server.reply
+        for stop in stops or []:
+            if stop and stop in reply:
+                reply = reply[: reply.index(stop)]
+        words = reply.split(" ")
+        stop_type = "eos"
+        if 0 <= n_predict < len(words):
+            words = words[:n_predict]
+            stop_type = "limit"
+        return [w if i == 0 else " " + w for i, w in enumerate(words)], stop_type
+
+    def _send_events(self, events: List[Dict[str, Any]], done: bool = False) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for index, event in enumerate(events):
+                if index and self.server.token_delay:
+                    time.sleep(self.server.token_delay)
+                self._send_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            if done:
+                self._send_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading (deadline hit); drop the connection.
+            self.close_connection = True
+
+    def _chat_completions(self, body: Dict[str, Any]) -> None:
+        stops = body.get("stop")
+        pieces, stop_type = self._reply_pieces([stops] if isinstance(stops, str) else stops, int(body.get("max_tokens", -1)))
+        finish_reason = "length" if stop_type == "limit" else "stop"
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages") or [])
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(pieces),
+            "total_tokens": prompt_tokens + len(pieces),
+        }
+        model = body.get("model", "fake")
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": "".join(pieces)}
+            choice = {"index": 0, "message": message, "finish_reason": finish_reason}
+            self._send_json(200, {"object": "chat.completion", "model": model, "choices": [choice], "usage": usage})
+            return
+
+        events: List[Dict[str, Any]] = [
+            {"object": "chat.completion.chunk", "model": model, "choices": [{"index": 0, "delta": {"content": p}}]}
+            for p in pieces
+        ]
+        events.append(
+            {
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+            }
+        )
+        if (body.get("stream_options") or {}).get("include_usage"):
+            events.append({"object": "chat.completion.chunk", "model": model, "choices": [], "usage": usage})
+        self._send_events(events, done=True)
+
+
+class FakeLlamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        *,
+        latency: float = 0.0,
+        reply: str = DEFAULT_REPLY,
+        token_delay: float = 0.0,
+    ) -> None:
+        super().__init__(address, FakeLlamaHandler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.reply = reply
+        self.requests = 0
+        self.stats_lock = threading.Lock()
+        self.slot_prompts: Dict[int, list] = {}
+
+    def cached_prefix(self, slot: int, words: list, cache_prompt: bool) -> int:
+        with self.stats_lock:
+            previous = self.slot_prompts.get(slot, []) if cache_prompt else []
+            shared = 0
+            for old, new in zip(previous, words):
+                if old != new:
+                    break
+                shared += 1
+            self.slot_prompts[slot] = words
+        return shared
+
+
+def start_in_thread(host: str = "127.0.0.1", port: int = 0, **kwargs: Any) -> FakeLlamaServer:
+    """Start a stand-in server on a background thread; port 0 picks a free port."""
+    server = FakeLlamaServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--reply", default=DEFAULT_REPLY, help="text every completion returns")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed events")
+    parser.add_argument("--startup-delay", type=float, default=0.0, help="seconds before listening (model load)")
+    args = parser.parse_args()
+    time.sleep(args.startup_delay)
+    server = FakeLlamaServer(
+        (args.host, args.port), latency=args.latency, reply=args.reply, token_delay=args.token_delay
+    )
+    print(f"Fake llama-server listening on {args.host}:{server.server_address[1]}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()